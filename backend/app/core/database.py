@@ -1,11 +1,26 @@
 import os
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Optional
+
 import psycopg2
+from psycopg2 import errors as pg_errors
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
+from app.core import sql_metrics
+from app.core.sql_metrics import InstrumentedConnection
+
 # Load variables from .env file explicitly
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # DB Configuration - Supabase takes precedence
 DATABASE_URL = os.getenv("DATABASE_URL") or os.getenv("SUPABASE_DB_URL")
 DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -15,15 +30,56 @@ DB_PASS = os.getenv("DB_PASS", "abc123")
 DB_PORT = os.getenv("DB_PORT", "5433")
 DB_SSLMODE = os.getenv("DB_SSLMODE")
 
-def get_db_connection():
+# Read Replica (optional). Read-only routes fall back to the primary when the
+# replica is unreachable or lags more than DB_REPLICA_MAX_LAG_SECONDS.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "30"))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "5"))
+
+# Pool Configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "10"))
+
+# Async Pool Configuration (asyncpg, used by async read endpoints)
+DB_ASYNC_POOL_MIN_SIZE = int(os.getenv("DB_ASYNC_POOL_MIN_SIZE", "1"))
+DB_ASYNC_POOL_MAX_SIZE = int(os.getenv("DB_ASYNC_POOL_MAX_SIZE", "20"))
+# Set to 0 when connecting through a transaction-mode pooler (pgbouncer/Supavisor)
+DB_ASYNC_STATEMENT_CACHE_SIZE = int(os.getenv("DB_ASYNC_STATEMENT_CACHE_SIZE", "100"))
+# Explicit server-side prepared statements for hot queries (disable behind a transaction-mode pooler)
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() == "true"
+
+# Per-route time budgets (milliseconds): statement_timeout / lock_timeout
+DB_BUDGET_AGENT_MS = int(os.getenv("DB_BUDGET_AGENT_MS", "3000"))
+DB_BUDGET_AGENT_LOCK_MS = int(os.getenv("DB_BUDGET_AGENT_LOCK_MS", "1000"))
+DB_BUDGET_DEFAULT_MS = int(os.getenv("DB_BUDGET_DEFAULT_MS", "15000"))
+DB_BUDGET_DEFAULT_LOCK_MS = int(os.getenv("DB_BUDGET_DEFAULT_LOCK_MS", "5000"))
+DB_BUDGET_REPORT_MS = int(os.getenv("DB_BUDGET_REPORT_MS", "120000"))
+DB_BUDGET_REPORT_LOCK_MS = int(os.getenv("DB_BUDGET_REPORT_LOCK_MS", "10000"))
+
+
+def get_db_connection(read_only: bool = False):
     """
     Establishes a connection to the database.
+    Opens a new, unpooled connection; request handlers and jobs should
+    borrow from the pool via get_db() / pooled_connection() instead.
+    read_only=True connects to the read replica when one is configured.
     """
     try:
-        if DATABASE_URL:
+        if read_only and DATABASE_REPLICA_URL:
+            conn = psycopg2.connect(
+                DATABASE_REPLICA_URL,
+                sslmode=DB_SSLMODE or "require",
+                connection_factory=InstrumentedConnection
+            )
+        elif DATABASE_URL:
             conn = psycopg2.connect(
                 DATABASE_URL,
-                sslmode=DB_SSLMODE or "require"
+                sslmode=DB_SSLMODE or "require",
+                connection_factory=InstrumentedConnection
             )
         else:
             conn = psycopg2.connect(
@@ -31,19 +87,777 @@ def get_db_connection():
                 database=DB_NAME,
                 user=DB_USER,
                 password=DB_PASS,
-                port=DB_PORT
+                port=DB_PORT,
+                connection_factory=InstrumentedConnection
             )
         return conn
     except psycopg2.OperationalError as e:
         print(f"Error connecting to DB: {e}")
         raise e
 
+
+class PoolError(Exception):
+    pass
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection could be borrowed within the pool timeout."""
+    pass
+
+
+class _PoolEntry:
+    __slots__ = ("conn", "created_at", "last_used_at")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    - Keeps between min_size and max_size connections open.
+    - Pings connections that sat idle longer than ping_after before lending them.
+    - Recycles connections older than max_lifetime.
+    - Rolls back any open transaction when a connection is returned.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], "extensions.connection"],
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        timeout: float = DB_POOL_TIMEOUT,
+        max_lifetime: float = DB_POOL_MAX_LIFETIME,
+        max_idle: float = DB_POOL_MAX_IDLE,
+        ping_after: float = DB_POOL_PING_AFTER,
+        name: str = "primary",
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.name = name
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle: deque = deque()
+        self._in_use: dict = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            "borrows": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "opened": 0,
+            "closed": 0,
+            "recycled": 0,
+            "ping_failures": 0,
+        }
+
+    # --- Borrow / Return ---
+
+    def getconn(self, timeout: Optional[float] = None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        entry = None
+
+        with self._cond:
+            waited = False
+            while True:
+                if self._closed:
+                    raise PoolError(f"Connection pool '{self.name}' is closed")
+                if self._idle:
+                    # LIFO keeps the most recently used (warmest) connections busy
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"Timed out after {timeout:.1f}s waiting for a connection from pool '{self.name}'"
+                    )
+                waited = True
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            if waited:
+                wait_time = time.monotonic() - started
+                self._stats["waits"] += 1
+                self._stats["wait_time_total"] += wait_time
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+
+        if entry is not None and not self._check(entry):
+            self._close_entry(entry)
+            entry = None
+
+        if entry is None:
+            try:
+                entry = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        with self._cond:
+            self._in_use[id(entry.conn)] = entry
+            self._stats["borrows"] += 1
+        return entry.conn
+
+    def putconn(self, conn, discard: bool = False):
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            # Not ours (or returned twice); make sure it does not leak.
+            self._close_conn(conn)
+            return
+
+        if not discard:
+            discard = not self._reset(conn)
+        if not discard and self._expired(entry, time.monotonic()):
+            with self._cond:
+                self._stats["recycled"] += 1
+            discard = True
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+                to_close = [entry]
+            else:
+                entry.last_used_at = time.monotonic()
+                self._idle.append(entry)
+                to_close = self._prune_idle()
+                self._size -= len(to_close)
+            self._cond.notify()
+
+        for stale in to_close:
+            self._close_entry(stale)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Borrow a connection for the duration of the block.
+        Any uncommitted work is rolled back when the block exits.
+        """
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    # --- Lifecycle ---
+
+    def warm(self):
+        """Open connections until min_size are available."""
+        opened = []
+        try:
+            while True:
+                with self._cond:
+                    if self._closed or self._size >= self.min_size:
+                        break
+                    self._size += 1
+                try:
+                    opened.append(self._open())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                    raise
+        finally:
+            with self._cond:
+                self._idle.extend(opened)
+                self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_entry(entry)
+
+    def stats(self) -> dict:
+        with self._cond:
+            waits = self._stats["waits"]
+            return {
+                "name": self.name,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiting": self._waiting,
+                "borrows": self._stats["borrows"],
+                "waits": waits,
+                "wait_time_total_ms": round(self._stats["wait_time_total"] * 1000, 2),
+                "wait_time_avg_ms": round(self._stats["wait_time_total"] * 1000 / waits, 2) if waits else 0.0,
+                "wait_time_max_ms": round(self._stats["wait_time_max"] * 1000, 2),
+                "timeouts": self._stats["timeouts"],
+                "opened": self._stats["opened"],
+                "closed": self._stats["closed"],
+                "recycled": self._stats["recycled"],
+                "ping_failures": self._stats["ping_failures"],
+            }
+
+    # --- Internals ---
+
+    def _open(self) -> _PoolEntry:
+        conn = self._connect()
+        with self._cond:
+            self._stats["opened"] += 1
+        return _PoolEntry(conn)
+
+    def _expired(self, entry: _PoolEntry, now: float) -> bool:
+        return bool(self.max_lifetime) and (now - entry.created_at) >= self.max_lifetime
+
+    def _check(self, entry: _PoolEntry) -> bool:
+        """Liveness check performed before a connection is lent out."""
+        conn = entry.conn
+        now = time.monotonic()
+        if conn.closed:
+            return False
+        if self._expired(entry, now):
+            with self._cond:
+                self._stats["recycled"] += 1
+            return False
+        if now - entry.last_used_at < self.ping_after:
+            return True
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+            finally:
+                cur.close()
+            conn.rollback()
+            return True
+        except Exception as exc:
+            logger.warning("Discarding dead pooled connection", extra={"pool": self.name, "error": str(exc)})
+            with self._cond:
+                self._stats["ping_failures"] += 1
+            return False
+
+    def _reset(self, conn) -> bool:
+        """Return the connection to a clean idle state. False means discard it."""
+        if conn.closed:
+            return False
+        try:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+            return True
+        except Exception:
+            return False
+
+    def _prune_idle(self) -> list:
+        """Called with the lock held: drop surplus connections idle for too long."""
+        pruned = []
+        if not self.max_idle:
+            return pruned
+        now = time.monotonic()
+        while (
+            self._idle
+            and self._size - len(pruned) > self.min_size
+            and now - self._idle[0].last_used_at >= self.max_idle
+        ):
+            pruned.append(self._idle.popleft())
+        return pruned
+
+    def _close_entry(self, entry: _PoolEntry):
+        self._close_conn(entry.conn)
+        with self._cond:
+            self._stats["closed"] += 1
+
+    @staticmethod
+    def _close_conn(conn):
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+
+
+class ReplicaLagMonitor:
+    """
+    Caches the replica's replay lag so routing decisions cost nothing per request.
+    Only one caller at a time refreshes the value once it is older than the interval.
+    """
+
+    LAG_SQL = """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """
+
+    def __init__(self, max_lag: float = DB_REPLICA_MAX_LAG_SECONDS, interval: float = DB_REPLICA_LAG_CHECK_INTERVAL):
+        self.max_lag = max_lag
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._checking = False
+        self._checked_at: Optional[float] = None
+        self._lag: Optional[float] = None
+        self._error: Optional[str] = None
+        self._fallbacks = 0
+
+    def begin_check(self) -> bool:
+        """True if the caller should refresh the lag now."""
+        with self._lock:
+            if self._checking:
+                return False
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.interval:
+                return False
+            self._checking = True
+            return True
+
+    def record(self, lag: float):
+        with self._lock:
+            self._lag = float(lag)
+            self._error = None
+            self._checked_at = time.monotonic()
+            self._checking = False
+
+    def record_failure(self, exc: Exception):
+        with self._lock:
+            self._lag = None
+            self._error = str(exc)
+            self._checked_at = time.monotonic()
+            self._checking = False
+        logger.warning("Read replica unavailable, routing reads to primary", extra={"error": str(exc)})
+
+    def usable(self) -> bool:
+        with self._lock:
+            healthy = self._lag is not None and self._lag <= self.max_lag
+            if not healthy:
+                self._fallbacks += 1
+            return healthy
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "configured": bool(DATABASE_REPLICA_URL),
+                "lag_seconds": self._lag,
+                "max_lag_seconds": self.max_lag,
+                "error": self._error,
+                "fallbacks": self._fallbacks,
+            }
+
+
+replica_monitor = ReplicaLagMonitor()
+
+_pools: dict = {}
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(read_only: bool = False) -> ConnectionPool:
+    """
+    Process-wide connection pool, created on first use.
+    read_only=True returns the replica pool (the primary when no replica is configured).
+    A forked child gets its own pools rather than sharing the parent's sockets.
+    """
+    global _pools, _pool_pid
+    role = "replica" if read_only and DATABASE_REPLICA_URL else "primary"
+    pid = os.getpid()
+    pool = _pools.get(role) if _pool_pid == pid else None
+    if pool is None:
+        with _pool_lock:
+            if _pool_pid != pid:
+                _pools = {}
+                _pool_pid = pid
+            pool = _pools.get(role)
+            if pool is None:
+                pool = ConnectionPool(lambda: get_db_connection(read_only=role == "replica"), name=role)
+                _pools[role] = pool
+    return pool
+
+
+def close_pool():
+    global _pools
+    with _pool_lock:
+        if _pool_pid == os.getpid():
+            for pool in _pools.values():
+                pool.close()
+        _pools = {}
+
+
+def replica_available() -> bool:
+    """
+    True when read-only work may go to the replica right now.
+    """
+    if not DATABASE_REPLICA_URL:
+        return False
+    if replica_monitor.begin_check():
+        try:
+            with get_pool(read_only=True).connection() as conn:
+                cur = conn.cursor()
+                try:
+                    cur.execute(ReplicaLagMonitor.LAG_SQL)
+                    lag = cur.fetchone()[0]
+                finally:
+                    cur.close()
+            replica_monitor.record(lag)
+        except Exception as exc:
+            replica_monitor.record_failure(exc)
+    return replica_monitor.usable()
+
+
+class QueryBudget:
+    """
+    Time budget for the statements of one request or job.
+    Applied as session-level statement_timeout / lock_timeout on the borrowed
+    connection and cleared again before it goes back to the pool.
+    """
+
+    def __init__(self, name: str, statement_timeout_ms: int, lock_timeout_ms: int):
+        self.name = name
+        self.statement_timeout_ms = int(statement_timeout_ms)
+        self.lock_timeout_ms = int(lock_timeout_ms)
+
+    @property
+    def set_sql(self) -> str:
+        return (
+            f"SET statement_timeout = {self.statement_timeout_ms}; "
+            f"SET lock_timeout = {self.lock_timeout_ms}"
+        )
+
+    def __repr__(self):
+        return f"QueryBudget({self.name!r}, {self.statement_timeout_ms}ms, lock {self.lock_timeout_ms}ms)"
+
+
+QUERY_BUDGETS = {
+    # Agent hot paths: fail fast rather than hold a connection agents are waiting on
+    "agent": QueryBudget("agent", DB_BUDGET_AGENT_MS, DB_BUDGET_AGENT_LOCK_MS),
+    "default": QueryBudget("default", DB_BUDGET_DEFAULT_MS, DB_BUDGET_DEFAULT_LOCK_MS),
+    # Reports scan whole portfolios
+    "report": QueryBudget("report", DB_BUDGET_REPORT_MS, DB_BUDGET_REPORT_LOCK_MS),
+}
+
+RESET_BUDGET_SQL = "RESET statement_timeout; RESET lock_timeout"
+
+# statement_timeout surfaces as QueryCanceled, lock_timeout as LockNotAvailable
+DB_LOCK_TIMEOUT_ERRORS: tuple = (pg_errors.LockNotAvailable,)
+DB_TIMEOUT_ERRORS: tuple = (pg_errors.QueryCanceled, pg_errors.LockNotAvailable)
+try:
+    from asyncpg import exceptions as _asyncpg_errors
+
+    DB_LOCK_TIMEOUT_ERRORS += (_asyncpg_errors.LockNotAvailableError,)
+    DB_TIMEOUT_ERRORS += (_asyncpg_errors.QueryCanceledError, _asyncpg_errors.LockNotAvailableError)
+except ImportError:  # pragma: no cover - asyncpg is optional for sync-only deployments
+    pass
+
+
+def resolve_budget(budget) -> QueryBudget:
+    if isinstance(budget, QueryBudget):
+        return budget
+    try:
+        return QUERY_BUDGETS[budget]
+    except KeyError:
+        raise ValueError(f"Unknown query budget {budget!r}; expected one of {sorted(QUERY_BUDGETS)}")
+
+
+def _run_outside_transaction(conn, sql: str):
+    # autocommit so the SET/RESET survives whatever the caller later commits or rolls back
+    previous = conn.autocommit
+    conn.autocommit = True
+    try:
+        cur = conn.cursor()
+        try:
+            cur.execute(sql)
+        finally:
+            cur.close()
+    finally:
+        conn.autocommit = previous
+
+
+def _clear_budget(conn) -> bool:
+    """Undo a budget before the connection is pooled again. False means discard it."""
+    if conn.closed:
+        return False
+    try:
+        if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        _run_outside_transaction(conn, RESET_BUDGET_SQL)
+        return True
+    except Exception as exc:
+        logger.warning("Could not reset query budget; discarding connection", extra={"error": str(exc)})
+        return False
+
+
+@contextmanager
+def pooled_connection(timeout: Optional[float] = None, read_only: bool = False, budget=None):
+    """
+    Borrow a pooled connection for background jobs and scripts.
+    read_only=True prefers the read replica and falls back to the primary.
+    budget (a QUERY_BUDGETS name or QueryBudget) bounds statement and lock waits.
+    """
+    budget = resolve_budget(budget) if budget is not None else None
+    pool = get_pool(read_only=read_only and replica_available())
+    try:
+        conn = pool.getconn(timeout)
+    except psycopg2.OperationalError as exc:
+        if pool.name != "replica":
+            raise
+        replica_monitor.record_failure(exc)
+        pool = get_pool()
+        conn = pool.getconn(timeout)
+    discard = False
+    try:
+        if budget is not None:
+            try:
+                _run_outside_transaction(conn, budget.set_sql)
+            except Exception:
+                discard = True
+                raise
+        yield conn
+    finally:
+        if budget is not None and not discard:
+            discard = not _clear_budget(conn)
+        pool.putconn(conn, discard=discard)
+
+
 def get_db():
     """
-    Dependency for FastAPI routers to get a DB cursor.
+    Dependency for FastAPI routers to get a pooled DB connection.
+    """
+    with pooled_connection() as conn:
+        yield conn
+
+
+def get_read_db():
+    """
+    Dependency for read-only routes (reports, lookups).
+    Served from the read replica when it is healthy, otherwise the primary.
     """
-    conn = get_db_connection()
+    with pooled_connection(read_only=True) as conn:
+        yield conn
+
+
+def get_budgeted_db(budget: str = "default", read_only: bool = False) -> Callable:
+    """
+    Dependency factory: a pooled connection bounded by a named time budget.
+
+        def report(db=Depends(get_budgeted_db("report", read_only=True))): ...
+
+    Timeouts raise DB_TIMEOUT_ERRORS, which main.py turns into 503/504 responses.
+    """
+    resolved = resolve_budget(budget)
+
+    def dependency():
+        with pooled_connection(read_only=read_only, budget=resolved) as conn:
+            yield conn
+
+    dependency.__name__ = f"get_db_{resolved.name}"
+    return dependency
+
+
+# --- Async access (asyncpg) ---
+
+_async_pools: dict = {}
+_async_pool_lock: Optional[asyncio.Lock] = None
+
+
+def _async_connect_kwargs(read_only: bool = False) -> dict:
+    if read_only and DATABASE_REPLICA_URL:
+        return {"dsn": DATABASE_REPLICA_URL, "ssl": DB_SSLMODE or "require"}
+    if DATABASE_URL:
+        return {"dsn": DATABASE_URL, "ssl": DB_SSLMODE or "require"}
+    kwargs = {
+        "host": DB_HOST,
+        "database": DB_NAME,
+        "user": DB_USER,
+        "password": DB_PASS,
+        "port": int(DB_PORT),
+    }
+    if DB_SSLMODE:
+        kwargs["ssl"] = DB_SSLMODE
+    return kwargs
+
+
+async def get_async_pool(read_only: bool = False):
+    """
+    Process-wide asyncpg pool, created lazily inside the running event loop.
+    """
+    global _async_pool_lock
+    role = "replica" if read_only and DATABASE_REPLICA_URL else "primary"
+    pool = _async_pools.get(role)
+    if pool is not None:
+        return pool
+    if _async_pool_lock is None:
+        _async_pool_lock = asyncio.Lock()
+    async with _async_pool_lock:
+        pool = _async_pools.get(role)
+        if pool is None:
+            import asyncpg
+
+            pool = await asyncpg.create_pool(
+                min_size=DB_ASYNC_POOL_MIN_SIZE,
+                max_size=DB_ASYNC_POOL_MAX_SIZE,
+                max_inactive_connection_lifetime=DB_POOL_MAX_IDLE,
+                statement_cache_size=DB_ASYNC_STATEMENT_CACHE_SIZE,
+                **_async_connect_kwargs(read_only=role == "replica"),
+            )
+            _async_pools[role] = pool
+    return pool
+
+
+async def close_async_pool():
+    for role in list(_async_pools):
+        pool = _async_pools.pop(role)
+        await pool.close()
+
+
+async def async_replica_available() -> bool:
+    if not DATABASE_REPLICA_URL:
+        return False
+    if replica_monitor.begin_check():
+        try:
+            pool = await get_async_pool(read_only=True)
+            async with pool.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+                lag = await conn.fetchval(ReplicaLagMonitor.LAG_SQL)
+            replica_monitor.record(lag)
+        except Exception as exc:
+            replica_monitor.record_failure(exc)
+    return replica_monitor.usable()
+
+
+async def _acquire_async(read_only: bool = False):
+    pool = await get_async_pool(read_only=read_only)
+    try:
+        conn = await pool.acquire(timeout=DB_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise PoolTimeout(f"Timed out after {DB_POOL_TIMEOUT:.1f}s waiting for an async connection")
+    return pool, conn
+
+
+@asynccontextmanager
+async def _borrow_async(read_only: bool = False):
+    use_replica = read_only and await async_replica_available()
+    try:
+        pool, conn = await _acquire_async(read_only=use_replica)
+    except (OSError, PoolTimeout) as exc:
+        if not use_replica:
+            raise
+        replica_monitor.record_failure(exc)
+        pool, conn = await _acquire_async()
     try:
         yield conn
     finally:
-        conn.close()
+        await pool.release(conn)
+
+
+async def get_async_db():
+    """
+    Async dependency yielding a pooled asyncpg connection.
+    Use for read-only handlers declared with `async def`.
+    """
+    async with _borrow_async() as conn:
+        yield conn
+
+
+async def get_async_read_db():
+    """
+    Async counterpart of get_read_db: replica when healthy, otherwise primary.
+    """
+    async with _borrow_async(read_only=True) as conn:
+        yield conn
+
+
+def get_budgeted_async_db(budget: str = "default", read_only: bool = False) -> Callable:
+    """
+    Async counterpart of get_budgeted_db. asyncpg runs RESET ALL when the
+    connection is released, which clears the budget.
+    """
+    resolved = resolve_budget(budget)
+
+    async def dependency():
+        async with _borrow_async(read_only=read_only) as conn:
+            await conn.execute(resolved.set_sql)
+            yield conn
+
+    dependency.__name__ = f"get_async_db_{resolved.name}"
+    return dependency
+
+
+_prepared_statements: dict = {}
+
+
+async def prepared(conn, query: str):
+    """
+    Server-side prepared statement for `query`, prepared once per pooled connection
+    and reused by every later borrower of that connection.
+    """
+    # Key on the real connection; asyncpg hands out a new proxy object per acquire.
+    raw = getattr(conn, "_con", None) or conn
+    statements = _prepared_statements.get(raw)
+    if statements is None:
+        statements = _prepared_statements[raw] = {}
+        raw.add_termination_listener(lambda closed: _prepared_statements.pop(closed, None))
+    stmt = statements.get(query)
+    if stmt is None:
+        stmt = await conn.prepare(query)
+        statements[query] = stmt
+    return stmt
+
+
+async def _instrumented(conn, query: str, args: tuple, call):
+    started = time.perf_counter()
+    try:
+        result = await call()
+    except Exception:
+        await sql_metrics.observe_async(conn, query, args, time.perf_counter() - started, -1, True)
+        raise
+    if isinstance(result, list):
+        rows = len(result)
+    else:
+        rows = 0 if result is None else 1
+    await sql_metrics.observe_async(conn, query, args, time.perf_counter() - started, rows, False)
+    return result
+
+
+async def fetch_all_prepared(conn, query: str, *args: Any) -> list:
+    """fetch_all() through a per-connection prepared statement."""
+    if not DB_PREPARED_STATEMENTS:
+        return await fetch_all(conn, query, *args)
+    stmt = await prepared(conn, query)
+    rows = await _instrumented(conn, query, args, lambda: stmt.fetch(*args))
+    return [dict(row) for row in rows]
+
+
+async def fetch_all(conn, query: str, *args: Any) -> list:
+    """Run a query and return every row as a plain dict."""
+    rows = await _instrumented(conn, query, args, lambda: conn.fetch(query, *args))
+    return [dict(row) for row in rows]
+
+
+async def fetch_one(conn, query: str, *args: Any) -> Optional[dict]:
+    """Run a query and return the first row as a dict, or None."""
+    row = await _instrumented(conn, query, args, lambda: conn.fetchrow(query, *args))
+    return dict(row) if row is not None else None
+
+
+async def fetch_value(conn, query: str, *args: Any):
+    """Run a query and return the first column of the first row."""
+    return await _instrumented(conn, query, args, lambda: conn.fetchval(query, *args))
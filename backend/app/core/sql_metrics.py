@@ -0,0 +1,396 @@
+"""
+SQL instrumentation: per-route statement timing, histograms and a slow-query log.
+
+psycopg2 connections opened by app.core.database use InstrumentedConnection,
+whose cursors time every execute(); the asyncpg helpers report through
+record(). The calling route comes from QueryRouteMiddleware (HTTP requests)
+or route_label() (background jobs).
+"""
+import contextvars
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+SQL_METRICS_ENABLED = os.getenv("SQL_METRICS_ENABLED", "true").lower() == "true"
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "500"))
+SQL_SLOW_QUERY_EXPLAIN = os.getenv("SQL_SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+SQL_SLOW_QUERY_LOG_SIZE = int(os.getenv("SQL_SLOW_QUERY_LOG_SIZE", "200"))
+SQL_METRICS_MAX_STATEMENTS = int(os.getenv("SQL_METRICS_MAX_STATEMENTS", "200"))
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+current_route: contextvars.ContextVar = contextvars.ContextVar("sql_metrics_route", default="background")
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_TUPLE = r"\((?:[^()]|\([^()]*\))*\)"
+_VALUES_RE = re.compile(r"\bVALUES\s*" + _TUPLE + r"(?:\s*,\s*" + _TUPLE + r")*", re.IGNORECASE)
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _as_text(query: Any, conn=None) -> str:
+    if isinstance(query, bytes):
+        return query.decode("utf-8", "replace")
+    if hasattr(query, "as_string") and conn is not None:
+        try:
+            return query.as_string(conn)
+        except Exception:
+            pass
+    return str(query)
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Reduce a statement to its shape: literals and placeholders become '?',
+    VALUES/IN lists collapse, whitespace is squeezed.
+    """
+    text = _COMMENT_RE.sub(" ", query)
+    text = _STRING_RE.sub("?", text)
+    text = _PARAM_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _VALUES_RE.sub("VALUES (...)", text)
+    text = _IN_LIST_RE.sub("IN (...)", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def fingerprint(query: str) -> tuple:
+    normalized = normalize_sql(query)
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    return digest, normalized
+
+
+def _bucket_label(index: int) -> str:
+    if index < len(HISTOGRAM_BUCKETS_MS):
+        return f"<={HISTOGRAM_BUCKETS_MS[index]}ms"
+    return f">{HISTOGRAM_BUCKETS_MS[-1]}ms"
+
+
+def _bucket_index(duration_ms: float) -> int:
+    for index, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+        if duration_ms <= bound:
+            return index
+    return len(HISTOGRAM_BUCKETS_MS)
+
+
+class _Aggregate:
+    __slots__ = ("count", "errors", "rows", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def add(self, duration_ms: float, rows: int, error: bool):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        if rows and rows > 0:
+            self.rows += rows
+        if error:
+            self.errors += 1
+        self.buckets[_bucket_index(duration_ms)] += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return None
+        target = self.count * fraction
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= target:
+                if index < len(HISTOGRAM_BUCKETS_MS):
+                    return float(HISTOGRAM_BUCKETS_MS[index])
+                return round(self.max_ms, 2)
+        return round(self.max_ms, 2)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.total_ms, 2),
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "histogram": {_bucket_label(i): hits for i, hits in enumerate(self.buckets) if hits},
+        }
+
+
+class QueryStatsRegistry:
+    """
+    Thread-safe in-process aggregation of statement timings keyed by route and fingerprint.
+    """
+
+    def __init__(self, slow_ms: float = SQL_SLOW_QUERY_MS, slow_log_size: int = SQL_SLOW_QUERY_LOG_SIZE,
+                 max_statements: int = SQL_METRICS_MAX_STATEMENTS):
+        self.slow_ms = slow_ms
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._routes: dict = {}
+        self._statements: dict = {}
+        self._sql_text: dict = {}
+        self._slow: deque = deque(maxlen=slow_log_size)
+        self._since = time.time()
+
+    def record(self, route: str, query: str, duration: float, rows: int = -1,
+               error: bool = False, explain: Optional[str] = None) -> bool:
+        """
+        Record one statement. Returns True when it crossed the slow threshold.
+        """
+        duration_ms = duration * 1000
+        fp, normalized = fingerprint(query)
+        slow = duration_ms >= self.slow_ms
+        with self._lock:
+            route_agg = self._routes.get(route)
+            if route_agg is None:
+                route_agg = self._routes[route] = _Aggregate()
+                self._statements[route] = {}
+            route_agg.add(duration_ms, rows, error)
+
+            statements = self._statements[route]
+            stmt_agg = statements.get(fp)
+            if stmt_agg is None:
+                if len(statements) >= self.max_statements:
+                    fp, normalized = "other", "(statements beyond SQL_METRICS_MAX_STATEMENTS)"
+                    stmt_agg = statements.get(fp)
+                if stmt_agg is None:
+                    stmt_agg = statements[fp] = _Aggregate()
+                self._sql_text.setdefault(fp, normalized)
+            stmt_agg.add(duration_ms, rows, error)
+
+            if slow:
+                self._slow.append({
+                    "at": time.time(),
+                    "route": route,
+                    "fingerprint": fp,
+                    "sql": normalized,
+                    "duration_ms": round(duration_ms, 2),
+                    "rows": rows,
+                    "error": error,
+                    "explain": explain,
+                })
+        if slow:
+            logger.warning(
+                "Slow query",
+                extra={"route": route, "fingerprint": fp, "duration_ms": round(duration_ms, 2), "rows": rows},
+            )
+        return slow
+
+    def attach_explain(self, fp: str, explain: str):
+        with self._lock:
+            for entry in reversed(self._slow):
+                if entry["fingerprint"] == fp and entry["explain"] is None:
+                    entry["explain"] = explain
+                    break
+
+    def snapshot(self, route: Optional[str] = None, limit: int = 20) -> dict:
+        with self._lock:
+            routes = []
+            for name, agg in self._routes.items():
+                if route and name != route:
+                    continue
+                statements = sorted(
+                    self._statements[name].items(), key=lambda item: item[1].total_ms, reverse=True
+                )[:limit]
+                routes.append({
+                    "route": name,
+                    **agg.to_dict(),
+                    "statements": [
+                        {"fingerprint": fp, "sql": self._sql_text.get(fp), **stmt.to_dict()}
+                        for fp, stmt in statements
+                    ],
+                })
+            routes.sort(key=lambda item: item["total_ms"], reverse=True)
+            slow = [entry for entry in self._slow if not route or entry["route"] == route]
+            return {
+                "since": self._since,
+                "slow_threshold_ms": self.slow_ms,
+                "routes": routes,
+                "slow_queries": list(reversed(slow))[:limit],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._statements.clear()
+            self._sql_text.clear()
+            self._slow.clear()
+            self._since = time.time()
+
+
+registry = QueryStatsRegistry()
+
+
+@contextmanager
+def route_label(label: str):
+    """Attribute statements issued inside the block (e.g. a background job) to `label`."""
+    token = current_route.set(label)
+    try:
+        yield
+    finally:
+        current_route.reset(token)
+
+
+def explainable(query: str) -> bool:
+    head = query.lstrip().split(None, 1)[0].upper() if query.strip() else ""
+    return head in ("SELECT", "WITH")
+
+
+async def observe_async(conn, query: str, args: tuple, duration: float, rows: int, error: bool):
+    """Record an asyncpg statement, attaching EXPLAIN output for slow ones when enabled."""
+    try:
+        slow = registry.record(current_route.get(), query, duration, rows, error)
+        if slow and SQL_SLOW_QUERY_EXPLAIN and not error and explainable(query):
+            try:
+                plan = await conn.fetch("EXPLAIN " + query, *args)
+                explain = "\n".join(row[0] for row in plan)
+            except Exception as exc:
+                explain = f"EXPLAIN failed: {exc}"
+            registry.attach_explain(fingerprint(query)[0], explain)
+    except Exception as exc:
+        logger.debug("SQL metrics recording failed", extra={"error": str(exc)})
+
+
+# --- psycopg2 wiring ---
+
+class _InstrumentedCursorMixin:
+    def execute(self, query, vars=None):
+        if not SQL_METRICS_ENABLED:
+            return super().execute(query, vars)
+        started = time.perf_counter()
+        error = False
+        try:
+            return super().execute(query, vars)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._observe(query, vars, time.perf_counter() - started, error)
+
+    def executemany(self, query, vars_list):
+        if not SQL_METRICS_ENABLED:
+            return super().executemany(query, vars_list)
+        started = time.perf_counter()
+        error = False
+        try:
+            return super().executemany(query, vars_list)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._observe(query, None, time.perf_counter() - started, error)
+
+    def copy_expert(self, sql, file, size=8192):
+        if not SQL_METRICS_ENABLED:
+            return super().copy_expert(sql, file, size)
+        started = time.perf_counter()
+        error = False
+        try:
+            return super().copy_expert(sql, file, size)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._observe(sql, None, time.perf_counter() - started, error)
+
+    def _observe(self, query, vars, duration: float, error: bool):
+        try:
+            text = _as_text(query, self.connection)
+            slow = registry.record(current_route.get(), text, duration, self.rowcount, error)
+            if slow and SQL_SLOW_QUERY_EXPLAIN and not error and explainable(text):
+                registry.attach_explain(fingerprint(text)[0], self._explain(text, vars))
+        except Exception as exc:
+            logger.debug("SQL metrics recording failed", extra={"error": str(exc)})
+
+    def _explain(self, text: str, vars) -> Optional[str]:
+        conn = self.connection
+        if conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INERROR:
+            return None
+        # Plain cursor so the EXPLAIN itself is not recorded
+        cur = extensions.cursor(conn)
+        try:
+            cur.execute("EXPLAIN " + text, vars)
+            return "\n".join(row[0] for row in cur.fetchall())
+        except Exception as exc:
+            return f"EXPLAIN failed: {exc}"
+        finally:
+            cur.close()
+
+
+_cursor_classes: dict = {}
+
+
+def instrumented_cursor_class(base):
+    cls = _cursor_classes.get(base)
+    if cls is None:
+        cls = type(f"Instrumented{base.__name__}", (_InstrumentedCursorMixin, base), {})
+        _cursor_classes[base] = cls
+    return cls
+
+
+class InstrumentedConnection(extensions.connection):
+    """
+    psycopg2 connection whose cursors (whatever cursor_factory the caller asks for) are timed.
+    """
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory or extensions.cursor
+        kwargs["cursor_factory"] = instrumented_cursor_class(factory)
+        return super().cursor(*args, **kwargs)
+
+
+# --- HTTP wiring ---
+
+def resolve_route_label(scope) -> str:
+    """'METHOD /route/{template}' for the route that will handle this request."""
+    from starlette.routing import Match
+
+    method = scope.get("method", "")
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", []):
+        try:
+            match, _ = route.matches(scope)
+        except Exception:
+            continue
+        if match == Match.FULL:
+            return f"{method} {getattr(route, 'path', scope.get('path', ''))}"
+    return f"{method} (unmatched)"
+
+
+class QueryRouteMiddleware:
+    """
+    ASGI middleware that labels every statement run while serving a request with its route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        token = current_route.set(resolve_route_label(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
@@ -0,0 +1,186 @@
+"""
+Cold-start support: optional per-module import profiling and background warm-up.
+
+Imported first by app.main, so this module must stay stdlib-only.
+STARTUP_PROFILE=true logs the slowest imports once the app module has loaded.
+"""
+import builtins
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+STARTUP_PROFILE_TOP = int(os.getenv("STARTUP_PROFILE_TOP", "25"))
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
+_stats: dict = {
+    "process_started_at": time.time(),
+    "import_seconds": None,
+    "warmup": {},
+}
+_import_started: Optional[float] = None
+
+
+class ImportProfiler:
+    """
+    Times first-time imports made on the importing thread by wrapping builtins.__import__.
+    Records cumulative and self (excluding nested imports) seconds per module.
+    """
+
+    def __init__(self):
+        self.records: dict = {}
+        self._stack: list = []
+        self._original = None
+        self._thread = None
+
+    def install(self):
+        if self._original is not None:
+            return
+        self._original = builtins.__import__
+        self._thread = threading.get_ident()
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _label(self, name, globals, fromlist, level) -> Optional[str]:
+        if level:
+            package = (globals or {}).get("__package__") or ""
+            try:
+                name = importlib.util.resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                return None
+        if name not in sys.modules:
+            return name
+        # "from pkg import a, b" where pkg is loaded but the submodules are not
+        missing = [item for item in (fromlist or ()) if item != "*" and f"{name}.{item}" not in sys.modules]
+        if missing and hasattr(sys.modules[name], "__path__"):
+            return f"{name}.{missing[0]}" if len(missing) == 1 else f"{name}.{{{','.join(missing)}}}"
+        return None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original
+        if original is None or threading.get_ident() != self._thread:
+            return (original or _builtin_import)(name, globals, locals, fromlist, level)
+        label = self._label(name, globals, fromlist, level)
+        if label is None:
+            return original(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            record = self.records.setdefault(label, [0.0, 0.0])
+            record[0] += elapsed
+            record[1] += elapsed - children
+
+    def top(self, limit: int = 25, key: str = "cumulative") -> list:
+        index = 0 if key == "cumulative" else 1
+        ranked = sorted(self.records.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+        return [
+            {"module": name, "cumulative_ms": round(cum * 1000, 1), "self_ms": round(own * 1000, 1)}
+            for name, (cum, own) in ranked
+        ]
+
+
+_builtin_import = builtins.__import__
+profiler = ImportProfiler()
+
+
+def begin():
+    """Call before the application's own imports."""
+    global _import_started
+    _import_started = time.perf_counter()
+    if STARTUP_PROFILE:
+        profiler.install()
+
+
+def finish_imports():
+    """Call once the application module has finished importing."""
+    if _import_started is not None:
+        _stats["import_seconds"] = round(time.perf_counter() - _import_started, 3)
+    if STARTUP_PROFILE:
+        profiler.uninstall()
+        top = profiler.top(STARTUP_PROFILE_TOP)
+        _stats["imports"] = top
+        lines = [f"{row['cumulative_ms']:>9.1f} {row['self_ms']:>9.1f}  {row['module']}" for row in top]
+        logger.warning(
+            "Startup import profile (%.3fs total)\n  cum(ms)  self(ms)  module\n%s",
+            _stats["import_seconds"] or 0.0,
+            "\n".join(lines),
+        )
+
+
+def _record(name: str, started: float, error: Optional[Exception] = None):
+    entry = {"ok": error is None, "seconds": round(time.perf_counter() - started, 3)}
+    if error is not None:
+        entry["error"] = str(error)
+        logger.warning("Startup warm-up step failed", extra={"step": name, "error": str(error)})
+    _stats["warmup"][name] = entry
+
+
+def _timed(name: str, fn):
+    started = time.perf_counter()
+    try:
+        fn()
+    except Exception as exc:
+        _record(name, started, exc)
+    else:
+        _record(name, started)
+
+
+def _warm_up():
+    from app.core import auth, database
+
+    _timed("db_pool", lambda: database.get_pool().warm())
+    if database.DATABASE_REPLICA_URL:
+        _timed("db_replica_pool", lambda: database.get_pool(read_only=True).warm())
+    if os.getenv("SUPABASE_URL"):
+        # The first authenticated request would otherwise pay for the JWKS fetch
+        _timed("jwks", auth._get_jwks)
+
+
+def start_background_warm_up() -> Optional[threading.Thread]:
+    """
+    Open pool connections and prefetch auth keys off the request path so the
+    first request on a fresh instance does not pay for them.
+    """
+    if not STARTUP_WARMUP:
+        return None
+    thread = threading.Thread(target=_warm_up, name="startup-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+async def warm_up_async():
+    """Create the asyncpg pool ahead of the first async request."""
+    if not STARTUP_WARMUP:
+        return
+    from app.core import database
+
+    started = time.perf_counter()
+    try:
+        await database.get_async_pool()
+    except Exception as exc:
+        _record("async_pool", started, exc)
+    else:
+        _record("async_pool", started)
+
+
+def stats() -> dict:
+    result = dict(_stats)
+    result["uptime_seconds"] = round(time.time() - _stats["process_started_at"], 1)
+    return result
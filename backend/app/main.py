@@ -1,20 +1,29 @@
-from fastapi import FastAPI, Depends
+from app.core import startup
+
+startup.begin()  # Must run before the imports below for STARTUP_PROFILE to see them
+
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
+import asyncio
 import os
-from zoneinfo import ZoneInfo
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 
 load_dotenv() # Load variables from .env if it exists
 
 from app.core.compliance import router as compliance_router
 from app.routers import ingest, operations, webhooks, campaigns
 from app.core.auth import require_auth
-from app.services.scheduled_runner import run_due_scheduled_payments
+from app.core.database import (
+    DB_LOCK_TIMEOUT_ERRORS,
+    DB_TIMEOUT_ERRORS,
+    PoolTimeout,
+    close_async_pool,
+    close_pool,
+)
+from app.core.sql_metrics import QueryRouteMiddleware
 
 app = FastAPI(title="CollectSecure API", version="1.0.0")
-scheduler = None
 
 # CORS (Allow Frontend)
 app.add_middleware(
@@ -26,23 +35,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Attribute SQL timings to the route serving each request
+app.add_middleware(QueryRouteMiddleware)
+
+
+# Background work (ingest, campaign sends, scheduled payment runs) goes through
+# the job queue and runs in `python -m app.worker`, not in this process.
+
 
 @app.on_event("startup")
-def start_scheduler():
-    global scheduler
-    if os.getenv("ENABLE_SCHEDULER", "false").lower() != "true":
-        return
+def start_warm_up():
+    startup.start_background_warm_up()
+
+
+@app.on_event("startup")
+async def start_async_warm_up():
+    asyncio.get_running_loop().create_task(startup.warm_up_async())
+
+
+@app.on_event("shutdown")
+def shutdown_db_pool():
+    close_pool()
+
 
-    scheduler = BackgroundScheduler(timezone=ZoneInfo("America/Chicago"))
-    scheduler.add_job(run_due_scheduled_payments, CronTrigger(hour=5, minute=0), args=["am"])
-    scheduler.add_job(run_due_scheduled_payments, CronTrigger(hour=17, minute=0), args=["pm"])
-    scheduler.start()
+@app.on_event("shutdown")
+async def shutdown_async_db_pool():
+    await close_async_pool()
 
 
 @app.on_event("shutdown")
-def stop_scheduler():
-    if scheduler:
-        scheduler.shutdown()
+async def shutdown_ingest_progress_listener():
+    from app.services.ingest_progress import broker
+
+    await broker.close()
+
+
+@app.exception_handler(PoolTimeout)
+def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": "Database busy, please retry"})
+
+
+def db_timeout_handler(request: Request, exc: Exception):
+    # lock_timeout: another transaction holds the row, retrying shortly is reasonable
+    if isinstance(exc, DB_LOCK_TIMEOUT_ERRORS):
+        return JSONResponse(status_code=503, content={"detail": "Record is busy, please retry"})
+    # statement_timeout: the query exceeded the route's time budget
+    return JSONResponse(status_code=504, content={"detail": "Query exceeded its time budget"})
+
+
+for _exc_class in DB_TIMEOUT_ERRORS:
+    app.add_exception_handler(_exc_class, db_timeout_handler)
 
 @app.get("/")
 def read_root():
@@ -56,3 +98,5 @@ app.include_router(ingest.router, prefix="/api/v1", tags=["Ingest"], dependencie
 app.include_router(operations.router, prefix="/api/v1", tags=["Operations"], dependencies=[Depends(require_auth)])
 app.include_router(webhooks.router, prefix="/api", tags=["Webhooks"])
 app.include_router(campaigns.router, prefix="/api/v1", tags=["Campaigns"], dependencies=[Depends(require_auth)])
+
+startup.finish_imports()
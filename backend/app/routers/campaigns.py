@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from psycopg2.extras import RealDictCursor
-from ..core.database import get_db, get_db_connection
+from ..core.database import get_db, get_read_db, pooled_connection
+from ..core.sql_metrics import route_label
+from ..services import job_queue
 from ..services.campaign_service import CampaignService
 
 router = APIRouter(prefix="/campaigns", tags=["Campaigns"])
@@ -59,7 +61,7 @@ def register_template(template: TemplateCreate, db=Depends(get_db)):
         cursor.close()
 
 @router.post("/preview", response_model=CampaignPreview)
-def preview_audience(filters: CampaignFilter, db=Depends(get_db)):
+def preview_audience(filters: CampaignFilter, db=Depends(get_read_db)):
     cursor = db.cursor(cursor_factory=RealDictCursor)
     service = CampaignService(cursor)
     try:
@@ -71,11 +73,10 @@ def preview_audience(filters: CampaignFilter, db=Depends(get_db)):
 @router.post("/launch")
 def launch_campaign(
     campaign: CampaignCreate, 
-    background_tasks: BackgroundTasks,
     db=Depends(get_db)
 ):
     """
-    Creates a campaign and triggers background sending.
+    Creates a campaign and queues its sending for the job worker.
     """
     cursor = db.cursor(cursor_factory=RealDictCursor)
     service = CampaignService(cursor)
@@ -87,11 +88,10 @@ def launch_campaign(
             template_id=campaign.template_id,
             filters=campaign.filters.dict(exclude_none=True)
         )
+        # Queued in the same transaction, so a campaign never exists without its send job
+        job_queue.enqueue(cursor, "campaign", {"campaign_id": result['id']})
         db.commit()
         
-        # Trigger Background Sending
-        background_tasks.add_task(run_campaign_task_bg, result['id'])
-        
         return {
             "status": "queued",
             "campaign_id": result['id'],
@@ -115,21 +115,22 @@ def list_campaigns(db=Depends(get_db)):
 
 # --- Background Task Helper ---
 
+# Sends happen inside one transaction, so a redelivery would email recipients twice
+@job_queue.task("campaign", queue="campaigns", max_attempts=1)
+@route_label("job:campaign")
 def run_campaign_task_bg(campaign_id: int):
     """
-    Standalone background task to run the campaign.
-    Creates its own DB connection.
+    Job worker task that runs the campaign.
+    Borrows its own connection from the pool.
     """
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        service = CampaignService(cursor)
-        
-        service.launch_campaign(campaign_id)
-        
-        conn.commit()
-    except Exception as e:
-        print(f"Background Campaign Error: {e}")
-        conn.rollback() # Important!
-    finally:
-        conn.close()
+    with pooled_connection() as conn:
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            service = CampaignService(cursor)
+
+            service.launch_campaign(campaign_id)
+
+            conn.commit()
+        except Exception as e:
+            print(f"Background Campaign Error: {e}")
+            conn.rollback() # Important!
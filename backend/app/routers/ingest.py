@@ -1,93 +1,476 @@
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+import asyncio
+import csv
+import io
+import json
 import os
-import shutil
-import uuid
-from app.services.ingest import run_ingest_job
-from app.core.database import get_db_connection
+import re
+import zipfile
+from typing import AsyncIterator, Iterator, Optional
+from anyio import to_thread
+from app.services import job_queue
+from app.services.ingest import resolve_engine
+from app.services.ingest_sources import inspect_placement
+from app.services.ingest_progress import TERMINAL_STATUSES, broker as progress_broker, notify_status
+from app.services.object_store import get_object_store, iter_upload, new_object_key, save_stream
+from app.core.database import fetch_one, get_async_pool, get_db, pooled_connection
 
 router = APIRouter()
 
+INGEST_EVENTS_KEEPALIVE = float(os.getenv("INGEST_EVENTS_KEEPALIVE", "15"))
+INGEST_REJECT_PAGE_SIZE = 5000
+_PROGRESS_FIELDS = ("rows_processed", "rows_failed", "bytes_processed", "rows_per_second", "eta_seconds")
+
+
+def _validate_options(engine: Optional[str], workers: Optional[int]) -> str:
+    try:
+        engine = resolve_engine(engine)
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return engine
+
+
+def _queue_ingest_job(stored, store, filename: str, portfolio_id: int, engine: str, workers: Optional[int],
+                      dry_run: bool = False, delta: bool = False) -> dict:
+    try:
+        compression, file_format, members = inspect_placement(store, stored.key)
+    except (ValueError, zipfile.BadZipFile):
+        store.delete(stored.key)
+        raise
+    # One job per CSV in a zip, each reading its member from the shared object
+    sources = [(f"{filename}/{member}", member, size) for member, size in members] or [(filename, None, stored.size)]
+
+    # Create the ingest job records and their queue entries together
+    jobs = []
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                for job_filename, member, size in sources:
+                    cur.execute(
+                        """
+                        INSERT INTO ingest_jobs (portfolio_id, filename, file_path, status, engine,
+                                                 object_key, content_sha256, size_bytes, compression, archive_member,
+                                                 file_format, workers, dry_run, delta)
+                        VALUES (%s, %s, %s, 'queued', %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        RETURNING id
+                        """,
+                        (portfolio_id, job_filename, store.uri(stored.key), engine, stored.key, stored.sha256, size,
+                         compression, member, file_format, workers, dry_run, delta)
+                    )
+                    job_id = str(cur.fetchone()[0])
+                    job_queue.enqueue(cur, "ingest", {
+                        "job_id": job_id, "object_key": stored.key, "portfolio_id": portfolio_id,
+                        "engine": engine, "workers": workers, "compression": compression, "member": member,
+                        "file_format": file_format, "dry_run": dry_run, "delta": delta,
+                    })
+                    jobs.append({"job_id": job_id, "filename": job_filename, "size_bytes": size})
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+    except Exception:
+        # No job references the object, so nothing would ever import or delete it
+        store.delete(stored.key)
+        raise
+
+    return {
+        "status": "Queued", "filename": filename, "job_id": jobs[0]["job_id"],
+        "size_bytes": stored.size, "sha256": stored.sha256, "compression": compression,
+        "file_format": file_format or "csv", "dry_run": dry_run, "delta": delta, "jobs": jobs,
+    }
+
+
 @router.post("/upload")
 async def upload_portfolio(
     file: UploadFile = File(...),
     portfolio_id: int = Form(1),
-    background_tasks: BackgroundTasks = None
+    engine: Optional[str] = Form(None),
+    workers: Optional[int] = Form(None),
+    dry_run: bool = Form(False),
+    delta: bool = Form(False)
 ):
     """
-    Accepts a CSV file upload and processes it in the background.
+    Accepts a CSV file upload and queues it for the job worker (app.worker).
+    The file may be gzip (.csv.gz), zstd (.zst) or a zip of CSVs, one job per
+    CSV; it is stored compressed and decompressed while it is imported.
+    Parquet and Arrow IPC files are read column-wise (needs pyarrow).
     Returns a job id for status tracking.
+    engine: 'batch', 'copy' or 'parallel' (defaults to INGEST_ENGINE).
+    workers: parsing processes for the parallel engine (defaults to INGEST_WORKERS).
+    dry_run: profile the file without importing it; the job's profile reports
+    existing vs. new debtors, reference collisions, unreadable dates and balance
+    totals. POST /ingest/jobs/{id}/commit then imports the same stored file.
+    delta: the file re-sends a placement; accounts already in the portfolio are
+    updated where their content changed instead of being skipped, and the job
+    reports new / changed / unchanged / recalled counts.
+    The file is copied to the object store in chunks and hashed on the way through.
     """
-    try:
-        upload_dir = os.path.join(os.getcwd(), "backend", "uploads")
-        os.makedirs(upload_dir, exist_ok=True)
+    engine = _validate_options(engine, workers)
 
-        # Persist upload to disk for background processing
+    try:
+        store = get_object_store()
         safe_name = file.filename or "upload.csv"
-        base, ext = os.path.splitext(safe_name)
-        job_file_name = f"{base}_{uuid.uuid4().hex}{ext or '.csv'}"
-        job_file_path = os.path.join(upload_dir, job_file_name)
+        await file.seek(0)
+        stored = await save_stream(store, new_object_key(safe_name), iter_upload(file))
+        # Sniffing the object (a zip's central directory) and the job inserts block; keep them off the event loop
+        return await to_thread.run_sync(
+            _queue_ingest_job, stored, store, safe_name, portfolio_id, engine, workers, dry_run, delta
+        )
+    except Exception as e:
+        return {"status": "Error", "filename": file.filename, "error": str(e)}
 
-        with open(job_file_path, "wb") as out_file:
-            file.file.seek(0)
-            shutil.copyfileobj(file.file, out_file)
 
-        # Create ingest job record
-        conn = get_db_connection()
-        cur = conn.cursor()
-        try:
-            cur.execute(
-                """
-                INSERT INTO ingest_jobs (portfolio_id, filename, file_path, status)
-                VALUES (%s, %s, %s, 'queued')
-                RETURNING id
-                """,
-                (portfolio_id, safe_name, job_file_path)
-            )
-            job_id = cur.fetchone()[0]
-            conn.commit()
-        finally:
-            cur.close()
-            conn.close()
-
-        if background_tasks is None:
-            raise HTTPException(status_code=500, detail="Background task system not available")
-
-        background_tasks.add_task(run_ingest_job, str(job_id), job_file_path, portfolio_id)
-        return {"status": "Queued", "filename": safe_name, "job_id": str(job_id)}
+@router.put("/upload/stream")
+async def upload_portfolio_stream(
+    request: Request,
+    filename: str,
+    portfolio_id: int = 1,
+    engine: Optional[str] = None,
+    workers: Optional[int] = None,
+    dry_run: bool = False,
+    delta: bool = False
+):
+    """
+    Same as /upload, but the request body is the raw CSV. The body goes straight
+    from the socket to the object store, skipping the multipart temp file, which
+    matters for multi-GB placements on memory-backed instance disks.
+    """
+    engine = _validate_options(engine, workers)
+
+    try:
+        store = get_object_store()
+        stored = await save_stream(store, new_object_key(filename), request.stream())
+        return await to_thread.run_sync(
+            _queue_ingest_job, stored, store, filename, portfolio_id, engine, workers, dry_run, delta
+        )
     except Exception as e:
-        return {"status": "Error", "filename": file.filename, "error": str(e)}
+        return {"status": "Error", "filename": filename, "error": str(e)}
+
+
+_JOB_COLUMNS = """
+    id, status, portfolio_id, filename, rows_processed, rows_failed,
+    error_message, created_at, started_at, finished_at,
+    engine, rows_per_second, workers, content_sha256, size_bytes,
+    bytes_processed, eta_seconds, progress_updated_at, checkpoint_offset, checkpoint_row,
+    compression, archive_member, file_format, dry_run, profile, committed_job_id,
+    delta, debts_new, debts_changed, debts_unchanged, debts_recalled
+"""
+
+
+def _job_payload(row) -> dict:
+    return {
+        "id": str(row[0]),
+        "status": row[1],
+        "portfolio_id": row[2],
+        "filename": row[3],
+        "rows_processed": row[4],
+        "rows_failed": row[5],
+        "error_message": row[6],
+        "created_at": row[7],
+        "started_at": row[8],
+        "finished_at": row[9],
+        "engine": row[10],
+        "rows_per_second": float(row[11]) if row[11] is not None else None,
+        "workers": row[12],
+        "sha256": row[13],
+        "size_bytes": row[14],
+        "bytes_processed": row[15],
+        "eta_seconds": row[16],
+        "progress_updated_at": row[17],
+        "checkpoint_offset": row[18],
+        "checkpoint_row": row[19],
+        "compression": row[20],
+        "archive_member": row[21],
+        "file_format": row[22] or "csv",
+        "dry_run": bool(row[23]),
+        # asyncpg hands jsonb back as text
+        "profile": json.loads(row[24]) if isinstance(row[24], str) else row[24],
+        "committed_job_id": str(row[25]) if row[25] is not None else None,
+        "delta": bool(row[26]),
+        "debts_new": row[27],
+        "debts_changed": row[28],
+        "debts_unchanged": row[29],
+        "debts_recalled": row[30],
+    }
 
 
 @router.get("/ingest/jobs/{job_id}")
-def get_ingest_job(job_id: str):
-    conn = get_db_connection()
+def get_ingest_job(job_id: str, conn=Depends(get_db)):
     cur = conn.cursor()
     try:
+        cur.execute(f"SELECT {_JOB_COLUMNS} FROM ingest_jobs WHERE id = %s", (job_id,))
+        row = cur.fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Ingest job not found")
+        return _job_payload(row)
+    finally:
+        cur.close()
+
+
+@router.post("/ingest/jobs/{job_id}/resume")
+def resume_ingest_job(job_id: str, conn=Depends(get_db)):
+    """
+    Re-queue a failed job from its last committed checkpoint, reading the same
+    stored object. Rows before the checkpoint are not re-read.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT status, object_key, portfolio_id, engine, workers, checkpoint_row, compression, archive_member,
+                   file_format, dry_run, delta
+            FROM ingest_jobs WHERE id = %s
+            """,
+            (job_id,)
+        )
+        row = cur.fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Ingest job not found")
+        (status, object_key, portfolio_id, engine, workers, checkpoint_row, compression, member, file_format,
+         dry_run, delta) = row
+        if status != "failed":
+            raise HTTPException(status_code=409, detail=f"Only failed jobs can be resumed (job is {status})")
+        try:
+            if object_key is None:
+                raise FileNotFoundError(job_id)
+            get_object_store().size(object_key)
+        except FileNotFoundError:
+            raise HTTPException(status_code=410, detail="The uploaded file is no longer available; upload it again")
+
+        # Conditional on status so two concurrent resumes cannot both start the job
         cur.execute(
             """
-            SELECT id, status, portfolio_id, filename, rows_processed, rows_failed,
-                   error_message, created_at, started_at, finished_at
-            FROM ingest_jobs
-            WHERE id = %s
+            UPDATE ingest_jobs
+            SET status = 'queued', error_message = NULL, finished_at = NULL
+            WHERE id = %s AND status = 'failed'
             """,
             (job_id,)
         )
+        if cur.rowcount != 1:
+            conn.rollback()
+            raise HTTPException(status_code=409, detail="Job was resumed by another request")
+        job_queue.enqueue(cur, "ingest", {
+            "job_id": job_id, "object_key": object_key, "portfolio_id": portfolio_id,
+            "engine": engine, "workers": workers, "resume": True, "compression": compression, "member": member,
+            "file_format": file_format, "dry_run": dry_run, "delta": delta,
+        })
+        notify_status(cur, job_id, "queued")
+        conn.commit()
+    finally:
+        cur.close()
+
+    return {"status": "Queued", "job_id": job_id, "resume_from_row": checkpoint_row or 0}
+
+
+@router.post("/ingest/jobs/{job_id}/commit")
+def commit_dry_run(job_id: str, conn=Depends(get_db)):
+    """
+    Import a placement that was profiled with dry_run, from the same stored
+    object. Queues a new ingest job; the dry-run job records its id.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT status, dry_run, object_key, committed_job_id FROM ingest_jobs WHERE id = %s",
+            (job_id,)
+        )
         row = cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Ingest job not found")
+        status, dry_run, object_key, committed_job_id = row
+        if not dry_run:
+            raise HTTPException(status_code=409, detail="Only dry-run jobs can be committed")
+        if status != "completed":
+            raise HTTPException(status_code=409, detail=f"The dry run has not completed (job is {status})")
+        if committed_job_id is not None:
+            raise HTTPException(status_code=409, detail=f"Already committed as job {committed_job_id}")
+        try:
+            if object_key is None:
+                raise FileNotFoundError(job_id)
+            get_object_store().size(object_key)
+        except FileNotFoundError:
+            raise HTTPException(status_code=410, detail="The uploaded file is no longer available; upload it again")
 
-        return {
-            "id": str(row[0]),
-            "status": row[1],
-            "portfolio_id": row[2],
-            "filename": row[3],
-            "rows_processed": row[4],
-            "rows_failed": row[5],
-            "error_message": row[6],
-            "created_at": row[7],
-            "started_at": row[8],
-            "finished_at": row[9],
-        }
+        cur.execute(
+            """
+            INSERT INTO ingest_jobs (portfolio_id, filename, file_path, status, engine, object_key, content_sha256,
+                                     size_bytes, compression, archive_member, file_format, workers, delta)
+            SELECT portfolio_id, filename, file_path, 'queued', engine, object_key, content_sha256,
+                   size_bytes, compression, archive_member, file_format, workers, delta
+            FROM ingest_jobs WHERE id = %s
+            RETURNING id, portfolio_id, engine, workers, compression, archive_member, file_format, delta
+            """,
+            (job_id,)
+        )
+        new_id, portfolio_id, engine, workers, compression, member, file_format, delta = cur.fetchone()
+        new_id = str(new_id)
+        # Conditional, so two concurrent commits cannot both queue an import
+        cur.execute(
+            "UPDATE ingest_jobs SET committed_job_id = %s WHERE id = %s AND committed_job_id IS NULL",
+            (new_id, job_id)
+        )
+        if cur.rowcount != 1:
+            conn.rollback()
+            raise HTTPException(status_code=409, detail="Job was committed by another request")
+        job_queue.enqueue(cur, "ingest", {
+            "job_id": new_id, "object_key": object_key, "portfolio_id": portfolio_id,
+            "engine": engine, "workers": workers, "compression": compression, "member": member,
+            "file_format": file_format, "delta": delta,
+        })
+        conn.commit()
+    finally:
+        cur.close()
+
+    return {"status": "Queued", "job_id": new_id, "dry_run_job_id": job_id}
+
+
+@router.get("/ingest/jobs/{job_id}/errors")
+def list_ingest_job_errors(job_id: str, limit: int = 100, after_id: int = 0, conn=Depends(get_db)):
+    """Rejected rows, oldest first; page with after_id = the last id returned."""
+    limit = max(1, min(limit, 1000))
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT id, row_number, line_number, stage, reason, raw_row
+            FROM ingest_job_errors
+            WHERE job_id = %s AND id > %s
+            ORDER BY id
+            LIMIT %s
+            """,
+            (job_id, after_id, limit)
+        )
+        return [
+            {"id": row[0], "row_number": row[1], "line_number": row[2], "stage": row[3],
+             "reason": row[4], "raw_row": row[5]}
+            for row in cur.fetchall()
+        ]
     finally:
         cur.close()
-        conn.close()
+
+
+def _reject_file_lines(job_id: str, headers: Optional[list]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take() -> str:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(list(headers or []) + ["_row_number", "_line_number", "_stage", "_reason"])
+    yield take()
+    last_id = 0
+    while True:
+        # Keyset pages on a short-lived connection: the download may outlive any request dependency
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    """
+                    SELECT id, row_number, line_number, stage, reason, raw_row
+                    FROM ingest_job_errors
+                    WHERE job_id = %s AND id > %s
+                    ORDER BY id
+                    LIMIT %s
+                    """,
+                    (job_id, last_id, INGEST_REJECT_PAGE_SIZE)
+                )
+                rows = cur.fetchall()
+            finally:
+                cur.close()
+        if not rows:
+            return
+        for error_id, row_number, line_number, stage, reason, raw_row in rows:
+            writer.writerow(list(raw_row or []) + [row_number, line_number, stage, reason])
+        last_id = rows[-1][0]
+        yield take()
+
+
+@router.get("/ingest/jobs/{job_id}/rejects.csv")
+def download_ingest_rejects(job_id: str, conn=Depends(get_db)):
+    """
+    Rejected rows as CSV in the file's own column layout, so they can be fixed and
+    re-uploaded; the _row_number/_line_number/_stage/_reason columns are appended.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT filename, source_headers FROM ingest_jobs WHERE id = %s", (job_id,))
+        row = cur.fetchone()
+    finally:
+        cur.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    base = re.sub(r"[^\w.-]+", "_", os.path.splitext(os.path.basename(row[0] or "upload"))[0])
+    return StreamingResponse(
+        _reject_file_lines(job_id, row[1]),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{base}_rejects.csv"'},
+    )
+
+
+async def _fetch_job(job_id: str) -> Optional[dict]:
+    pool = await get_async_pool()
+    async with pool.acquire() as conn:
+        row = await fetch_one(conn, f"SELECT {_JOB_COLUMNS} FROM ingest_jobs WHERE id = $1::uuid", job_id)
+    return _job_payload(tuple(row.values())) if row is not None else None
+
+
+def _sse(data: dict) -> str:
+    return f"data: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _job_events(job_id: str, job: dict, queue: asyncio.Queue) -> AsyncIterator[str]:
+    try:
+        yield _sse(job)
+        while job["status"] not in TERMINAL_STATUSES:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=INGEST_EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                event = None
+            if event is not None and "rows_processed" in event and event.get("status") not in TERMINAL_STATUSES:
+                # Progress notifications carry everything that changes while running
+                update = {key: event[key] for key in _PROGRESS_FIELDS}
+            else:
+                # Status change, or a quiet period (also covers a dropped listener)
+                fresh = await _fetch_job(job_id)
+                update = fresh or {}
+            changed = {key: value for key, value in update.items() if job.get(key) != value}
+            if changed:
+                job.update(changed)
+                yield _sse(job)
+            elif event is None:
+                yield ": keepalive\n\n"
+    finally:
+        progress_broker.unsubscribe(job_id, queue)
+
+
+@router.get("/ingest/jobs/{job_id}/events")
+async def stream_ingest_job(job_id: str):
+    """
+    Server-sent events for one ingest job: the full job on connect, then again
+    whenever progress or status changes. The stream ends once the job completes
+    or fails.
+    """
+    queue = await progress_broker.subscribe(job_id)
+    try:
+        job = await _fetch_job(job_id)
+    except Exception:
+        progress_broker.unsubscribe(job_id, queue)
+        raise
+    if job is None:
+        progress_broker.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return StreamingResponse(
+        _job_events(job_id, job, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
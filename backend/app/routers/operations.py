@@ -6,14 +6,22 @@ import calendar
 from datetime import datetime, time, timezone, date, timedelta
 from zoneinfo import ZoneInfo
 from decimal import Decimal
-from app.core.database import get_db
+from app.core.database import (
+    DB_TIMEOUT_ERRORS,
+    fetch_all,
+    get_budgeted_async_db,
+    get_budgeted_db,
+    get_db,
+)
 from app.core.auth import require_auth
 from psycopg2.extras import RealDictCursor
 from app.core.compliance import check_calling_hours, ComplianceError
 from app.core.finance import calculate_split, generate_payment_schedule
-from app.services.usa_epay import USAePayService
+from app.services.usa_epay import USAePayOutcomeUnknown, get_usa_epay
+from app.services.scheduled_runner import mark_unverified
 from app.services.comms import CommsManager
 from app.services.transactions import TransactionManager
+from app.services.debt_view import fetch_debt_views
 from app.models.schemas import (
     InteractionCreate, EmailTemplateSend, DebtorEmailUpdate, ValidationNoticeSend, PaymentCreate, PaymentResponse, 
     DebtResponse, PaymentPlanCreate, PaymentPlanResponse, 
@@ -22,8 +30,6 @@ from app.models.schemas import (
 import uuid
 import traceback
 
-# Initialize USA ePay Service
-usa_epay = USAePayService()
 CT_TZ = ZoneInfo("America/Chicago")
 
 
@@ -46,6 +52,32 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _outcome_unknown_error(exc: USAePayOutcomeUnknown, advice: str) -> HTTPException:
+    """502 when USA ePay answered a charge with a 5xx, 504 when it did not answer at all."""
+    return HTTPException(status_code=502 if exc.status_code else 504, detail=f"No answer from USA ePay ({exc}); {advice}")
+
+
+def _auto_run_installment(cursor, manager: TransactionManager, debt_id: int, amount, card_token: str,
+                          scheduled_payment_id: int):
+    """
+    Charge an installment that falls due on the day its plan is created. A
+    failure leaves the plan standing; a charge with no answer parks the
+    installment as 'unverified' so no run charges the card again.
+    """
+    try:
+        manager.execute_payment(
+            debt_id=debt_id,
+            amount=amount,
+            card_token=card_token,
+            scheduled_payment_id=scheduled_payment_id
+        )
+    except USAePayOutcomeUnknown as e:
+        logger.error("Auto-run payment outcome unknown", extra={"scheduled_payment_id": scheduled_payment_id})
+        mark_unverified(cursor, {"id": scheduled_payment_id}, None, e, datetime.now(timezone.utc))
+    except Exception:
+        logger.exception("Auto-run payment failed", extra={"scheduled_payment_id": scheduled_payment_id})
+
+
 def _log_interaction(cursor, debt_id: int, action_type: str, notes: Optional[str], agent_id: Optional[str] = None):
     cursor.execute(
         """
@@ -58,14 +90,13 @@ def _log_interaction(cursor, debt_id: int, action_type: str, notes: Optional[str
 @router.get("/ping")
 def ping(db=Depends(get_db)):
     """Diagnostic ping."""
-    from app.core.database import get_db_connection
+    from app.core import startup
+    from app.core.database import get_pool, replica_monitor
     import os
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        cur = db.cursor()
         cur.execute("SELECT 1")
         cur.close()
-        conn.close()
         db_status = "Connected"
     except Exception as e:
         db_status = f"Failed: {str(e)}"
@@ -77,7 +108,10 @@ def ping(db=Depends(get_db)):
         "status": "Online",
         "database": db_status,
         "db_host": masked_url,
-        "env": os.getenv("DB_SSLMODE", "Not Set")
+        "env": os.getenv("DB_SSLMODE", "Not Set"),
+        "pool": get_pool().stats(),
+        "replica": replica_monitor.stats(),
+        "startup": startup.stats()
     }
 
 @router.get("/verify-epay")
@@ -86,7 +120,7 @@ async def verify_epay():
     Diagnostic endpoint to verify USA ePay connectivity.
     """
     try:
-        service = USAePayService()
+        service = get_usa_epay()
         success, message = service.verify_connection()
         return {
             "success": success, 
@@ -113,330 +147,67 @@ def list_portfolios(db=Depends(get_db)):
         cursor.close()
 
 @router.get("/work-queue", response_model=List[DebtResponse])
-def get_work_queue(db=Depends(get_db)):
+async def get_work_queue(db=Depends(get_budgeted_async_db("agent"))):
     """
     Fetches the next available debts for the agent.
     Logic: Query 'debts' where status='New' LIMIT 1
     """
-    cursor = db.cursor(cursor_factory=RealDictCursor)
     try:
-        query = """
-            SELECT 
-                d.id as debt_id,
-                d.original_account_number,
-                d.client_reference_number,
-                d.original_creditor,
-                COALESCE(NULLIF(d.current_creditor, ''), c.name) as current_creditor,
-                d.date_opened,
-                d.charge_off_date,
-                d.principal_balance,
-                d.fees_costs,
-                d.amount_due,
-                d.last_payment_date,
-                d.last_payment_amount,
-                d.status,
-                dr.id as debtor_id,
-                dr.first_name,
-                dr.last_name,
-                dr.dob,
-                dr.address_1,
-                dr.address_2,
-                dr.city,
-                dr.state,
-                dr.zip_code,
-                dr.phone,
-                dr.mobile_consent,
-                dr.email,
-                dr.ssn_hash,
-                dr.do_not_contact
-            FROM debts d
-            JOIN debtors dr ON d.debtor_id = dr.id
-            LEFT JOIN portfolios p ON d.portfolio_id = p.id
-            LEFT JOIN clients c ON p.client_id = c.id
-            WHERE d.status = 'New'
-            ORDER BY d.id ASC
-            LIMIT 1
-        """
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        # Manually construct the response to match DebtResponse schema
-        result = []
-        for row in rows:
-            result.append({
-                "id": row['debt_id'],
-                "original_account_number": row['original_account_number'],
-                "client_reference_number": row['client_reference_number'],
-                "original_creditor": row['original_creditor'],
-                "current_creditor": row.get('current_creditor'),
-                "date_opened": str(row['date_opened']) if row['date_opened'] else None,
-                "charge_off_date": str(row['charge_off_date']) if row['charge_off_date'] else None,
-                "principal_balance": float(row['principal_balance']) if row['principal_balance'] else 0.0,
-                "fees_costs": float(row['fees_costs']) if row['fees_costs'] else 0.0,
-                "amount_due": float(row['amount_due']) if row['amount_due'] else 0.0,
-                "last_payment_date": str(row['last_payment_date']) if row['last_payment_date'] else None,
-                "last_payment_amount": float(row['last_payment_amount']) if row['last_payment_amount'] else 0.0,
-                "status": row['status'],
-                "debtor": {
-                    "id": str(row['debtor_id']),
-                    "first_name": row['first_name'],
-                    "last_name": row['last_name'],
-                    "dob": str(row['dob']) if row['dob'] else None,
-                    "address_1": row['address_1'],
-                    "address_2": row['address_2'],
-                    "city": row['city'],
-                    "state": row['state'],
-                    "zip_code": row['zip_code'],
-                    "phone": row['phone'],
-                    "mobile_consent": row['mobile_consent'],
-                    "email": row['email'],
-                    "ssn_hash": row['ssn_hash'],
-                    "do_not_contact": row['do_not_contact']
-                }
-            })
-        
-        return result
+        return await fetch_debt_views(db, "work_queue")
+    except DB_TIMEOUT_ERRORS:
+        raise
     except Exception as e:
         print(f"Error fetching work queue: {e}")
         import traceback
         traceback.print_exc()
         return []
-    finally:
-        cursor.close()
 
 @router.get("/debts/{debt_id}", response_model=DebtResponse)
-def get_debt_details(debt_id: int, db=Depends(get_db)):
+async def get_debt_details(debt_id: int, db=Depends(get_budgeted_async_db("agent"))):
     """
     Fetch a single debt by ID.
     Used for restoring state or direct access.
     """
-    cursor = db.cursor(cursor_factory=RealDictCursor)
     try:
-        query = """
-            SELECT 
-                d.id as debt_id,
-                d.original_account_number,
-                d.client_reference_number,
-                d.original_creditor,
-                COALESCE(NULLIF(d.current_creditor, ''), c.name) as current_creditor,
-                d.date_opened,
-                d.charge_off_date,
-                d.principal_balance,
-                d.fees_costs,
-                d.amount_due,
-                d.last_payment_date,
-                d.last_payment_amount,
-                d.status,
-                dr.id as debtor_id,
-                dr.first_name,
-                dr.last_name,
-                dr.dob,
-                dr.address_1,
-                dr.address_2,
-                dr.city,
-                dr.state,
-                dr.zip_code,
-                dr.phone,
-                dr.mobile_consent,
-                dr.email,
-                dr.ssn_hash,
-                dr.do_not_contact
-            FROM debts d
-            JOIN debtors dr ON d.debtor_id = dr.id
-            LEFT JOIN portfolios p ON d.portfolio_id = p.id
-            LEFT JOIN clients c ON p.client_id = c.id
-            WHERE d.id = %s
-        """
-        cursor.execute(query, (debt_id,))
-        row = cursor.fetchone()
-        
-        if not row:
+        rows = await fetch_debt_views(db, "by_id", debt_id)
+        if not rows:
             raise HTTPException(status_code=404, detail="Debt not found")
-            
-        return {
-            "id": row['debt_id'],
-            "original_account_number": row['original_account_number'],
-            "client_reference_number": row['client_reference_number'],
-            "original_creditor": row['original_creditor'],
-            "current_creditor": row.get('current_creditor'),
-            "date_opened": str(row['date_opened']) if row['date_opened'] else None,
-            "charge_off_date": str(row['charge_off_date']) if row['charge_off_date'] else None,
-            "principal_balance": float(row['principal_balance']) if row['principal_balance'] else 0.0,
-            "fees_costs": float(row['fees_costs']) if row['fees_costs'] else 0.0,
-            "amount_due": float(row['amount_due']) if row['amount_due'] else 0.0,
-            "last_payment_date": str(row['last_payment_date']) if row['last_payment_date'] else None,
-            "last_payment_amount": float(row['last_payment_amount']) if row['last_payment_amount'] else 0.0,
-            "status": row['status'],
-            "debtor": {
-                "id": str(row['debtor_id']),
-                "first_name": row['first_name'],
-                "last_name": row['last_name'],
-                "dob": str(row['dob']) if row['dob'] else None,
-                "address_1": row['address_1'],
-                "address_2": row['address_2'],
-                "city": row['city'],
-                "state": row['state'],
-                "zip_code": row['zip_code'],
-                "phone": row['phone'],
-                "mobile_consent": row['mobile_consent'],
-                "email": row['email'],
-                "ssn_hash": row['ssn_hash'],
-                "do_not_contact": row['do_not_contact']
-            }
-        }
-    except HTTPException as he:
-        raise he
+        return rows[0]
+    except (HTTPException, *DB_TIMEOUT_ERRORS):
+        raise
     except Exception as e:
         print(f"Error fetching debt details: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Internal Server Error")
-    finally:
-        cursor.close()
 
 
 @router.get("/search", response_model=List[DebtResponse])
-def search_debts(search_type: str, query: str, db=Depends(get_db)):
+async def search_debts(search_type: str, query: str, db=Depends(get_budgeted_async_db("agent", read_only=True))):
     """
     Search for debts by name or client reference.
     search_type: 'name' or 'client_ref'
     query: search term
     """
-    cursor = db.cursor(cursor_factory=RealDictCursor)
     try:
         if search_type == 'name':
             # Search by debtor name (case-insensitive, partial match)
-            sql_query = """
-                SELECT 
-                    d.id as debt_id,
-                    d.original_account_number,
-                    d.client_reference_number,
-                    d.original_creditor,
-                    COALESCE(NULLIF(d.current_creditor, ''), c.name) as current_creditor,
-                    d.date_opened,
-                    d.charge_off_date,
-                    d.principal_balance,
-                    d.fees_costs,
-                    d.amount_due,
-                    d.last_payment_date,
-                    d.last_payment_amount,
-                    d.status,
-                    dr.id as debtor_id,
-                    dr.first_name,
-                    dr.last_name,
-                    dr.dob,
-                    dr.address_1,
-                    dr.address_2,
-                    dr.city,
-                    dr.state,
-                    dr.zip_code,
-                    dr.phone,
-                    dr.mobile_consent,
-                    dr.email,
-                    dr.ssn_hash,
-                    dr.do_not_contact
-                FROM debts d
-                JOIN debtors dr ON d.debtor_id = dr.id
-                LEFT JOIN portfolios p ON d.portfolio_id = p.id
-                LEFT JOIN clients c ON p.client_id = c.id
-                WHERE LOWER(dr.first_name || ' ' || dr.last_name) LIKE LOWER(%s)
-                ORDER BY d.id ASC
-                LIMIT 10
-            """
-            cursor.execute(sql_query, (f'%{query}%',))
+            return await fetch_debt_views(db, "search_name", f'%{query}%')
         elif search_type == 'client_ref':
             # Search by client reference (exact match)
-            sql_query = """
-                SELECT 
-                    d.id as debt_id,
-                    d.original_account_number,
-                    d.client_reference_number,
-                    d.original_creditor,
-                    COALESCE(NULLIF(d.current_creditor, ''), c.name) as current_creditor,
-                    d.date_opened,
-                    d.charge_off_date,
-                    d.principal_balance,
-                    d.fees_costs,
-                    d.amount_due,
-                    d.last_payment_date,
-                    d.last_payment_amount,
-                    d.status,
-                    dr.id as debtor_id,
-                    dr.first_name,
-                    dr.last_name,
-                    dr.dob,
-                    dr.address_1,
-                    dr.address_2,
-                    dr.city,
-                    dr.state,
-                    dr.zip_code,
-                    dr.phone,
-                    dr.mobile_consent,
-                    dr.email,
-                    dr.ssn_hash,
-                    dr.do_not_contact
-                FROM debts d
-                JOIN debtors dr ON d.debtor_id = dr.id
-                LEFT JOIN portfolios p ON d.portfolio_id = p.id
-                LEFT JOIN clients c ON p.client_id = c.id
-                WHERE d.client_reference_number = %s
-                ORDER BY d.id ASC
-                LIMIT 10
-            """
-            cursor.execute(sql_query, (query,))
+            return await fetch_debt_views(db, "search_client_ref", query)
         else:
             raise HTTPException(status_code=400, detail="Invalid search_type. Use 'name' or 'client_ref'")
-        
-        rows = cursor.fetchall()
-        
-        # Build response
-        result = []
-        for row in rows:
-            result.append({
-                "id": row['debt_id'],
-                "original_account_number": row['original_account_number'],
-                "client_reference_number": row['client_reference_number'],
-                "original_creditor": row['original_creditor'],
-                "current_creditor": row.get('current_creditor'),
-                "date_opened": str(row['date_opened']) if row['date_opened'] else None,
-                "charge_off_date": str(row['charge_off_date']) if row['charge_off_date'] else None,
-                "principal_balance": float(row['principal_balance']) if row['principal_balance'] else 0.0,
-                "fees_costs": float(row['fees_costs']) if row['fees_costs'] else 0.0,
-                "amount_due": float(row['amount_due']) if row['amount_due'] else 0.0,
-                "last_payment_date": str(row['last_payment_date']) if row['last_payment_date'] else None,
-                "last_payment_amount": float(row['last_payment_amount']) if row['last_payment_amount'] else 0.0,
-                "status": row['status'],
-                "debtor": {
-                    "id": str(row['debtor_id']),
-                    "first_name": row['first_name'],
-                    "last_name": row['last_name'],
-                    "dob": str(row['dob']) if row['dob'] else None,
-                    "address_1": row['address_1'],
-                    "address_2": row['address_2'],
-                    "city": row['city'],
-                    "state": row['state'],
-                    "zip_code": row['zip_code'],
-                    "phone": row['phone'],
-                    "mobile_consent": row['mobile_consent'],
-                    "email": row['email'],
-                    "ssn_hash": row['ssn_hash'],
-                    "do_not_contact": row['do_not_contact']
-                }
-            })
-        
-        return result
-    except HTTPException as he:
-        raise he
+    except (HTTPException, *DB_TIMEOUT_ERRORS):
+        raise
     except Exception as e:
         print(f"Error searching debts: {e}")
         import traceback
         traceback.print_exc()
         return []
-    finally:
-        cursor.close()
 
 @router.post("/interactions")
-def log_interaction(interaction: InteractionCreate, db=Depends(get_db), user=Depends(require_auth)):
+def log_interaction(interaction: InteractionCreate, db=Depends(get_budgeted_db("agent")), user=Depends(require_auth)):
     """
     Logs a call/email. Checks compliance before logging.
     """
@@ -477,6 +248,9 @@ def log_interaction(interaction: InteractionCreate, db=Depends(get_db), user=Dep
         
     except HTTPException as he:
         raise he
+    except DB_TIMEOUT_ERRORS:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         print(f"Error logging interaction: {e}")
@@ -485,14 +259,13 @@ def log_interaction(interaction: InteractionCreate, db=Depends(get_db), user=Dep
         cursor.close()
 
 @router.get("/debts/{debt_id}/interactions")
-def get_debt_interactions(debt_id: int, db=Depends(get_db)):
+async def get_debt_interactions(debt_id: int, db=Depends(get_budgeted_async_db("agent"))):
     """
     Fetch all interaction logs for a specific debt.
     Orders by most recent first.
     """
-    cursor = db.cursor(cursor_factory=RealDictCursor)
     try:
-        cursor.execute("""
+        return await fetch_all(db, """
             SELECT 
                 id,
                 action_type,
@@ -500,15 +273,14 @@ def get_debt_interactions(debt_id: int, db=Depends(get_db)):
                 agent_id,
                 created_at
             FROM interaction_logs
-            WHERE debt_id = %s
+            WHERE debt_id = $1
             ORDER BY created_at DESC
-        """, (debt_id,))
-        return cursor.fetchall()
+        """, debt_id)
+    except DB_TIMEOUT_ERRORS:
+        raise
     except Exception as e:
         print(f"Error fetching interactions: {e}")
         return []
-    finally:
-        cursor.close()
 
 @router.post("/email/send")
 def send_template_email(payload: EmailTemplateSend, db=Depends(get_db), user=Depends(require_auth)):
@@ -784,7 +556,7 @@ def send_validation_notice(payload: ValidationNoticeSend, db=Depends(get_db), us
         cursor.close()
 
 @router.post("/payments", response_model=PaymentResponse)
-def process_payment(payment: PaymentCreate, db=Depends(get_db), user=Depends(require_auth)):
+def process_payment(payment: PaymentCreate, db=Depends(get_budgeted_db("agent")), user=Depends(require_auth)):
     """
     Processes a payment and splits the ledger.
     """
@@ -868,6 +640,9 @@ def process_payment(payment: PaymentCreate, db=Depends(get_db), user=Depends(req
             "payment_method": payment_method
         }
         
+    except DB_TIMEOUT_ERRORS:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         print(f"Error processing payment: {e}")
@@ -876,16 +651,11 @@ def process_payment(payment: PaymentCreate, db=Depends(get_db), user=Depends(req
         cursor.close()
 
 @router.get("/payments/{debt_id}", response_model=List[PaymentResponse])
-def get_debt_payments(debt_id: int, db=Depends(get_db)):
+async def get_debt_payments(debt_id: int, db=Depends(get_budgeted_async_db("agent"))):
     """
     Fetches all payments recorded for a specific debt.
     """
-    cursor = db.cursor(cursor_factory=RealDictCursor)
-    try:
-        cursor.execute("SELECT * FROM payments WHERE debt_id = %s ORDER BY timestamp DESC", (debt_id,))
-        return cursor.fetchall()
-    finally:
-        cursor.close()
+    return await fetch_all(db, "SELECT * FROM payments WHERE debt_id = $1 ORDER BY timestamp DESC", debt_id)
 
 @router.get("/payment-plans/preview", response_model=List[dict])
 def get_payment_plan_preview(
@@ -959,7 +729,7 @@ def create_payment_plan(plan: PaymentPlanCreate, db=Depends(get_db), user=Depend
         if dp_item and dp_item['amount'] > 0:
             # Run Down Payment via payment_key and save card
             try:
-                epay_resp = usa_epay.run_payment_key_sale(
+                epay_resp = get_usa_epay().run_payment_key_sale(
                     payment_key=plan.payment_key,
                     amount=dp_item['amount'],
                     invoice=f"Debt-{plan.debt_id}-DP",
@@ -1026,7 +796,7 @@ def create_payment_plan(plan: PaymentPlanCreate, db=Depends(get_db), user=Depend
         else:
             # No down payment; run a $1 verification sale to obtain a reusable token, then void it
             try:
-                verify_resp = usa_epay.run_payment_key_sale(
+                verify_resp = get_usa_epay().run_payment_key_sale(
                     payment_key=plan.payment_key,
                     amount=Decimal("1.00"),
                     invoice=f"Debt-{plan.debt_id}-VERIFY",
@@ -1039,7 +809,7 @@ def create_payment_plan(plan: PaymentPlanCreate, db=Depends(get_db), user=Depend
                 if not card_token:
                     raise Exception("Verification sale approved but no saved card token returned.")
                 if refnum:
-                    usa_epay.void_transaction(refnum)
+                    get_usa_epay().void_transaction(refnum)
                 else:
                     raise Exception("Verification sale approved but refnum missing for void.")
             except Exception as auth_err:
@@ -1106,15 +876,7 @@ def create_payment_plan(plan: PaymentPlanCreate, db=Depends(get_db), user=Depend
             
             # AUTO-RUN recurring installments IF due today (and not already paid as DP)
             if status == 'pending' and due_date == today_date:
-                try:
-                    manager.execute_payment(
-                        debt_id=plan.debt_id,
-                        amount=item['amount'],
-                        card_token=card_token,
-                        scheduled_payment_id=sched_item['id']
-                    )
-                except Exception as eval_err:
-                    print(f"Auto-run payment failed for due_date {due_date}: {eval_err}")
+                _auto_run_installment(cursor, manager, plan.debt_id, item['amount'], card_token, sched_item['id'])
             
         # 3. Update Debt Status
         cursor.execute("""
@@ -1197,6 +959,7 @@ def debug_epay_account():
         raise HTTPException(status_code=404, detail="Not found")
 
     try:
+        usa_epay = get_usa_epay()
         account = usa_epay.fetch_account()
         api_key = os.getenv("USA_EPAY_API_KEY", "")
         return {
@@ -1246,6 +1009,19 @@ def debug_run_next_installment(plan_id: int, db=Depends(get_db)):
         }
     except HTTPException as he:
         raise he
+    except USAePayOutcomeUnknown as exc:
+        # The card may have been charged: park the installment so the next run does not charge it again
+        logger.error("Debug installment outcome unknown", extra={"scheduled_payment_id": scheduled['id']})
+        try:
+            mark_unverified(cursor, scheduled, None, exc, datetime.now(timezone.utc))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Marking a scheduled payment unverified failed",
+                             extra={"scheduled_payment_id": scheduled['id']})
+            raise HTTPException(status_code=500, detail=f"No answer from USA ePay ({exc}) and the payment could "
+                                                        "not be marked unverified; check USA ePay before it runs again")
+        raise _outcome_unknown_error(exc, "the payment is marked unverified, check USA ePay before running it again")
     except Exception as exc:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(exc))
@@ -1253,9 +1029,12 @@ def debug_run_next_installment(plan_id: int, db=Depends(get_db)):
         cursor.close()
 
 @router.post("/payments/scheduled/{payment_id}/execute")
-def execute_scheduled_payment(payment_id: int, db=Depends(get_db), user=Depends(require_auth)):
+def execute_scheduled_payment(payment_id: int, confirm_unverified: bool = False, db=Depends(get_db),
+                              user=Depends(require_auth)):
     """
     Manually executes a scheduled payment early.
+    An 'unverified' payment may already have been charged; it runs only with
+    confirm_unverified=true, once checked against USA ePay.
     """
     cursor = db.cursor(cursor_factory=RealDictCursor)
     from app.core.audit import write_audit_log
@@ -1266,6 +1045,7 @@ def execute_scheduled_payment(payment_id: int, db=Depends(get_db), user=Depends(
             FROM scheduled_payments sp
             JOIN payment_plans pp ON sp.plan_id = pp.id
             WHERE sp.id = %s
+            FOR UPDATE OF sp
         """, (payment_id,))
         payment = cursor.fetchone()
         
@@ -1275,6 +1055,15 @@ def execute_scheduled_payment(payment_id: int, db=Depends(get_db), user=Depends(
         if payment['status'] == 'paid':
             raise HTTPException(status_code=400, detail="Payment has already been processed")
 
+        # A payment run has claimed it and may be charging the card right now, lease lapsed or not
+        if payment['status'] == 'processing':
+            raise HTTPException(status_code=409, detail="Payment is being processed by a scheduled run")
+        if payment['status'] == 'unverified' and not confirm_unverified:
+            raise HTTPException(
+                status_code=409,
+                detail="Payment may already have been charged; check USA ePay, then run it with confirm_unverified=true"
+            )
+
         # 2. Execute via TransactionManager
         manager = TransactionManager(cursor)
         attempt_count = (payment.get('attempt_count') or 0) + 1
@@ -1297,6 +1086,7 @@ def execute_scheduled_payment(payment_id: int, db=Depends(get_db), user=Depends(
                 "amount": float(payment.get("amount") or 0),
                 "payment_id": result.get("payment_id"),
                 "status": result.get("status"),
+                "confirmed_unverified": payment['status'] == 'unverified',
             },
         )
 
@@ -1304,6 +1094,29 @@ def execute_scheduled_payment(payment_id: int, db=Depends(get_db), user=Depends(
         if result.get("status") == "declined":
             raise HTTPException(status_code=400, detail=result.get("result") or "Payment Declined")
         return result
+    except USAePayOutcomeUnknown as e:
+        # The card may have been charged: park the installment instead of leaving it due for the next run
+        logger.error("Manual scheduled payment outcome unknown", extra={"scheduled_payment_id": payment_id})
+        try:
+            mark_unverified(cursor, payment, None, e, datetime.now(timezone.utc))
+            write_audit_log(
+                cursor,
+                actor_id=user.get("sub"),
+                action="scheduled_payment.outcome_unknown",
+                entity_type="scheduled_payment",
+                entity_id=str(payment_id),
+                metadata={"debt_id": payment.get("debt_id"), "error": str(e)},
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Marking a scheduled payment unverified failed", extra={"scheduled_payment_id": payment_id})
+            raise HTTPException(
+                status_code=500,
+                detail=f"No answer from USA ePay ({e}) and the payment could not be marked unverified; "
+                       "check USA ePay before it runs again"
+            )
+        raise _outcome_unknown_error(e, "the payment is marked unverified, check USA ePay before running it again")
     except Exception as e:
         db.rollback()
         # If it was a decline handled by TransactionManager, it might already be committed as 'declined'
@@ -1320,7 +1133,7 @@ def get_admin_payments(
     days: int = 0,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db=Depends(get_db)
+    db=Depends(get_budgeted_db("report", read_only=True))
 ):
     """
     Admin view for payment management.
@@ -1367,6 +1180,40 @@ def get_admin_payments(
     finally:
         cursor.close()
 
+@router.get("/admin/payment-runs")
+def get_payment_runs(limit: int = 50, db=Depends(get_budgeted_db("report", read_only=True))):
+    """Recent scheduled payment runs: throughput, gateway latency and outcomes."""
+    cursor = db.cursor(cursor_factory=RealDictCursor)
+    try:
+        cursor.execute(
+            "SELECT * FROM payment_runs ORDER BY started_at DESC LIMIT %s",
+            (max(1, min(limit, 500)),)
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+@router.get("/admin/gateway-stats")
+def get_gateway_stats():
+    """USA ePay request counts, retries and latency per endpoint since startup."""
+    from app.services.usa_epay import get_transport
+    return get_transport().stats()
+
+@router.get("/admin/sql-stats")
+def get_sql_stats(route: Optional[str] = None, limit: int = 20):
+    """Per-route statement timings and the recent slow-query log."""
+    from app.core.sql_metrics import registry
+    return registry.snapshot(route=route, limit=max(1, min(limit, 200)))
+
+
+@router.delete("/admin/sql-stats")
+def reset_sql_stats():
+    """Clear collected SQL timings (e.g. before a load test)."""
+    from app.core.sql_metrics import registry
+    registry.reset()
+    return {"status": "reset"}
+
+
 @router.post("/payments/one-off")
 def run_one_off_payment(debt_id: int, amount: Decimal, db=Depends(get_db), user=Depends(require_auth)):
     """
@@ -1412,6 +1259,25 @@ def run_one_off_payment(debt_id: int, amount: Decimal, db=Depends(get_db), user=
         if result.get("status") == "declined":
             raise HTTPException(status_code=400, detail=result.get("result") or "Payment Declined")
         return result
+    except USAePayOutcomeUnknown as e:
+        # No ledger row was written; the card may still have been charged, so a retry could charge it twice
+        logger.error("One-off payment outcome unknown", extra={"debt_id": debt_id})
+        try:
+            write_audit_log(
+                cursor,
+                actor_id=user.get("sub"),
+                action="payment.one_off.outcome_unknown",
+                entity_type="debt",
+                entity_id=str(debt_id),
+                metadata={"debt_id": debt_id, "amount": float(amount), "error": str(e)},
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Recording an unknown one-off payment outcome failed", extra={"debt_id": debt_id})
+        raise _outcome_unknown_error(
+            e, "the charge may have gone through. Check USA ePay for it before retrying; it is not in the ledger"
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
@@ -1420,7 +1286,7 @@ def run_one_off_payment(debt_id: int, amount: Decimal, db=Depends(get_db), user=
 
 
 @router.get("/reports/daily-money")
-def get_daily_money_report(date: Optional[str] = None, db=Depends(get_db)):
+def get_daily_money_report(date: Optional[str] = None, db=Depends(get_budgeted_db("report", read_only=True))):
     cursor = db.cursor(cursor_factory=RealDictCursor)
     try:
         if date:
@@ -1481,7 +1347,7 @@ def get_daily_money_report(date: Optional[str] = None, db=Depends(get_db)):
 
 
 @router.get("/reports/liquidation")
-def get_liquidation_report(portfolio_id: Optional[int] = None, db=Depends(get_db)):
+def get_liquidation_report(portfolio_id: Optional[int] = None, db=Depends(get_budgeted_db("report", read_only=True))):
     cursor = db.cursor(cursor_factory=RealDictCursor)
     try:
         params = []
@@ -180,7 +180,7 @@ class CampaignService:
     def launch_campaign(self, campaign_id: int):
         """
         Execute a campaign: iterate recipients and send emails.
-        In production, this should be a background task (Celery/APScheduler).
+        Runs on the job worker (see run_campaign_task_bg).
         """
         try:
             # 1. Update status to sending
@@ -1,8 +1,6 @@
 import os
 import logging
 from typing import Optional, Dict, Any
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +19,9 @@ class CommsManager:
         self.cursor = db_cursor
         
         if self.sendgrid_api_key and self.sendgrid_api_key != "your_sendgrid_api_key_here":
+            # Imported lazily: the SendGrid client is only needed once mail is sent
+            from sendgrid import SendGridAPIClient
+
             self.sg = SendGridAPIClient(self.sendgrid_api_key)
         else:
             self.sg = None
@@ -57,6 +58,8 @@ class CommsManager:
                 "message_id": None
             }
         
+        from sendgrid.helpers.mail import Mail, Email, To, Content
+
         try:
             # Use dynamic template if provided
             if template_id and dynamic_data:
@@ -0,0 +1,121 @@
+"""
+Shared debt view: the debts/debtors/portfolios/clients join used by the agent
+screens (work queue, debt details, search) and the row -> DebtResponse mapper.
+
+Queries use asyncpg ($n) placeholders and run as per-connection prepared
+statements, so Postgres parses and plans each one once per pooled connection.
+"""
+from typing import Any, Dict, List, Mapping, Optional
+
+from app.core.database import fetch_all_prepared
+
+DEBT_VIEW_COLUMNS = """
+    d.id as debt_id,
+    d.original_account_number,
+    d.client_reference_number,
+    d.original_creditor,
+    COALESCE(NULLIF(d.current_creditor, ''), c.name) as current_creditor,
+    d.date_opened,
+    d.charge_off_date,
+    d.principal_balance,
+    d.fees_costs,
+    d.amount_due,
+    d.last_payment_date,
+    d.last_payment_amount,
+    d.status,
+    dr.id as debtor_id,
+    dr.first_name,
+    dr.last_name,
+    dr.dob,
+    dr.address_1,
+    dr.address_2,
+    dr.city,
+    dr.state,
+    dr.zip_code,
+    dr.phone,
+    dr.mobile_consent,
+    dr.email,
+    dr.ssn_hash,
+    dr.do_not_contact
+"""
+
+DEBT_VIEW_FROM = """
+    FROM debts d
+    JOIN debtors dr ON d.debtor_id = dr.id
+    LEFT JOIN portfolios p ON d.portfolio_id = p.id
+    LEFT JOIN clients c ON p.client_id = c.id
+"""
+
+
+def build_debt_view_query(where: str, order_by: str = "d.id ASC", limit: Optional[int] = None) -> str:
+    """
+    Build a debt view SELECT. `where` is trusted SQL using $n placeholders;
+    values must always be passed as parameters.
+    """
+    query = f"SELECT {DEBT_VIEW_COLUMNS} {DEBT_VIEW_FROM} WHERE {where} ORDER BY {order_by}"
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+    return query
+
+
+DEBT_VIEW_QUERIES = {
+    "work_queue": build_debt_view_query("d.status = 'New'", limit=1),
+    "by_id": build_debt_view_query("d.id = $1"),
+    "search_name": build_debt_view_query(
+        "LOWER(dr.first_name || ' ' || dr.last_name) LIKE LOWER($1)", limit=10
+    ),
+    "search_client_ref": build_debt_view_query("d.client_reference_number = $1", limit=10),
+}
+
+
+def _str_or_none(value):
+    return str(value) if value else None
+
+
+def _float_or_zero(value) -> float:
+    return float(value) if value else 0.0
+
+
+def map_debt_row(row: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Map a debt view row to the DebtResponse shape.
+    """
+    return {
+        "id": row['debt_id'],
+        "original_account_number": row['original_account_number'],
+        "client_reference_number": row['client_reference_number'],
+        "original_creditor": row['original_creditor'],
+        "current_creditor": row.get('current_creditor'),
+        "date_opened": _str_or_none(row['date_opened']),
+        "charge_off_date": _str_or_none(row['charge_off_date']),
+        "principal_balance": _float_or_zero(row['principal_balance']),
+        "fees_costs": _float_or_zero(row['fees_costs']),
+        "amount_due": _float_or_zero(row['amount_due']),
+        "last_payment_date": _str_or_none(row['last_payment_date']),
+        "last_payment_amount": _float_or_zero(row['last_payment_amount']),
+        "status": row['status'],
+        "debtor": {
+            "id": str(row['debtor_id']),
+            "first_name": row['first_name'],
+            "last_name": row['last_name'],
+            "dob": _str_or_none(row['dob']),
+            "address_1": row['address_1'],
+            "address_2": row['address_2'],
+            "city": row['city'],
+            "state": row['state'],
+            "zip_code": row['zip_code'],
+            "phone": row['phone'],
+            "mobile_consent": row['mobile_consent'],
+            "email": row['email'],
+            "ssn_hash": row['ssn_hash'],
+            "do_not_contact": row['do_not_contact']
+        }
+    }
+
+
+async def fetch_debt_views(conn, name: str, *args: Any) -> List[Dict[str, Any]]:
+    """
+    Run one of DEBT_VIEW_QUERIES as a prepared statement and map the rows.
+    """
+    rows = await fetch_all_prepared(conn, DEBT_VIEW_QUERIES[name], *args)
+    return [map_debt_row(row) for row in rows]
@@ -1,17 +1,183 @@
 import csv
 import hashlib
+import io
+import itertools
+import logging
 import os
 from datetime import timezone
 import re
+import time
 from datetime import datetime, timezone
-from decimal import Decimal
-from typing import List, Dict, Any
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import psycopg2
+from psycopg2.extras import Json, execute_values
+
+from app.core.sql_metrics import route_label
+from app.services import job_queue
+from app.services.ingest_delta import (
+    DELTA_CONFLICT_SQL, INSERT_CONFLICT_SQL, DeltaTracker, content_hash_sql, counted_upsert
+)
+from app.services.ingest_errors import TRANSFORM_ERRORS, RejectCollector, load_isolating
+from app.services.ingest_progress import IngestProgressReporter, notify_status
+
+logger = logging.getLogger(__name__)
+
+INGEST_ENGINES = ("batch", "copy", "parallel")
+
+# Row shapes produced by RowTransformer.transform()
+DEBTOR_COLUMNS = (
+    "ssn_hash", "first_name", "last_name", "dob", "address_1", "address_2",
+    "city", "state", "zip_code", "phone", "mobile_consent", "email",
+)
+DEBT_COLUMNS = (
+    "client_reference_number", "original_account_number", "original_creditor", "current_creditor",
+    "date_opened", "charge_off_date", "principal_balance", "fees_costs", "face_value", "amount_due",
+    "last_payment_date", "last_payment_amount",
+)
+
+
+def resolve_engine(engine: Optional[str] = None) -> str:
+    engine = (engine or os.getenv("INGEST_ENGINE", "batch")).lower()
+    if engine not in INGEST_ENGINES:
+        raise ValueError(f"Unknown ingest engine {engine!r}; expected one of {', '.join(INGEST_ENGINES)}")
+    return engine
+
+
+# Placement files repeat the same dates and amounts thousands of times
+INGEST_PARSE_CACHE_SIZE = int(os.getenv("INGEST_PARSE_CACHE_SIZE", "65536"))
+
+_PHONE_STRIP = re.compile(r'[()\-\s]')
+
+
+@lru_cache(maxsize=INGEST_PARSE_CACHE_SIZE)
+def parse_date(date_str: Optional[str]):
+    """
+    Attempts MM/DD/YYYY and YYYY-MM-DD. Returns None if invalid or empty.
+    """
+    if not date_str:
+        return None
+    for fmt in ('%m/%d/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None # Log error in real app
+
+
+@lru_cache(maxsize=INGEST_PARSE_CACHE_SIZE)
+def parse_money(value: Optional[str]) -> Decimal:
+    if not value:
+        return Decimal("0.00")
+    try:
+        return Decimal(value.replace('$', '').replace(',', ''))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {value!r}") from None
+
+
+def record_checkpoint(cur, job_id: Optional[str], checkpoint: Optional[Tuple[int, int]]):
+    """
+    Record (byte offset, row number) of the input committed so far. Runs inside the
+    batch transaction, so the checkpoint commits atomically with the rows it covers.
+    """
+    if job_id is None or checkpoint is None:
+        return
+    cur.execute(
+        "UPDATE ingest_jobs SET checkpoint_offset = %s, checkpoint_row = %s, checkpoint_at = now() WHERE id = %s",
+        (checkpoint[0], checkpoint[1], job_id),
+    )
+
+
+def _checkpoint(lines, rows_processed: int) -> Optional[Tuple[int, int]]:
+    offset = getattr(lines, "offset", None)
+    return (offset, rows_processed) if offset is not None else None
+
+
+class OffsetLineReader:
+    """
+    Decoded lines of a binary stream for csv.reader, tracking the byte offset just
+    past the last line handed out. csv.reader pulls exactly the lines of one record
+    (quoted newlines included), so after each record `offset` is where the next
+    record starts.
+    """
+
+    def __init__(self, raw, encoding: str = "utf-8"):
+        self.raw = raw
+        self.encoding = encoding
+        self.offset = 0
+
+    def seek(self, offset: int):
+        self.raw.seek(offset)
+        self.offset = offset
+
+    def __iter__(self):
+        encoding = self.encoding
+        for line in self.raw:
+            self.offset += len(line)
+            yield line.decode(encoding)
+
+
+# Known ssn_hash -> debtor id per job (batch engine); 0 disables
+INGEST_DEBTOR_CACHE_SIZE = int(os.getenv("INGEST_DEBTOR_CACHE_SIZE", "500000"))
+
+# Debtors keep their first placement's details: a conflict inserts nothing.
+# Ids come from the insert for new debtors and from the statement's snapshot for
+# existing ones; the casts type VALUES columns that may be all NULL.
+_DEBTOR_UPSERT_SQL = f"""
+WITH input ({", ".join(DEBTOR_COLUMNS)}) AS (
+    VALUES %s
+),
+inserted AS (
+    INSERT INTO debtors ({", ".join(DEBTOR_COLUMNS)})
+    SELECT {", ".join(DEBTOR_COLUMNS)} FROM input
+    ON CONFLICT (ssn_hash) DO NOTHING
+    RETURNING id, ssn_hash
+)
+SELECT id, ssn_hash FROM inserted
+UNION ALL
+SELECT d.id, d.ssn_hash FROM debtors d JOIN input i ON i.ssn_hash = d.ssn_hash
+"""
+_DEBTOR_TEMPLATE = "(%s,%s,%s,%s::date,%s,%s,%s,%s,%s,%s,%s::boolean,%s)"
+
+# Debts go in through INSERT ... SELECT so content_hash is computed from the typed values
+_DEBT_SOURCE = f"""
+INSERT INTO debts (debtor_id, portfolio_id, {", ".join(DEBT_COLUMNS)}, content_hash, status)
+SELECT v.debtor_id, v.portfolio_id, {", ".join("v." + column for column in DEBT_COLUMNS)}, {content_hash_sql("v")}, 'New'
+FROM (VALUES %s) AS v (debtor_id, portfolio_id, {", ".join(DEBT_COLUMNS)})
+"""
+_DEBT_TEMPLATE = (
+    "(%s::uuid,%s::integer,%s,%s,%s,%s,%s::date,%s::date,"
+    "%s::numeric,%s::numeric,%s::numeric,%s::numeric,%s::date,%s::numeric)"
+)
 
-from psycopg2.extras import execute_values
 
 class CSVImporter:
-    def __init__(self, file_obj):
+    def __init__(self, file_obj, job_id: Optional[str] = None, file_format: Optional[str] = None):
+        """
+        file_obj: a binary stream (byte offsets are tracked, so the import can be
+        checkpointed and resumed) or a text stream opened with newline=''.
+        job_id: ingest_jobs row to checkpoint after each committed batch.
+        file_format: 'parquet' or 'arrow' to read a columnar placement (needs
+        pyarrow; see app.services.ingest_columnar); None for CSV.
+        """
         self.file_obj = file_obj
+        self.job_id = job_id
+        self.file_format = file_format
+        # While process() runs: the job's connection (idle between batches) and the
+        # byte offset of the input committed so far, when the engine knows it
+        self.conn = None
+        self.position: Optional[int] = None
+        self.rejects: Optional[RejectCollector] = None
+        # Debtor ids already resolved by this job, so repeat debtors skip the database;
+        # ids from the current batch wait in _debtor_ids_pending until it commits
+        self.debtor_ids: Optional[Dict[str, Any]] = {} if INGEST_DEBTOR_CACHE_SIZE > 0 else None
+        self._debtor_ids_pending: Dict[str, Any] = {}
+        self.debtor_cache_hits = 0
+        # While a delta import runs (process(delta=True)); see app.services.ingest_delta
+        self.delta: Optional[DeltaTracker] = None
 
     HEADER_MAPPING = {
         'PSSN_SIN': 'ssn',
@@ -61,19 +227,12 @@ class CSVImporter:
         """
         Attempts MM/DD/YYYY and YYYY-MM-DD. Returns None if invalid or empty.
         """
-        if not date_str:
-            return None
-        for fmt in ('%m/%d/%Y', '%Y-%m-%d'):
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except ValueError:
-                continue
-        return None # Log error in real app
+        return parse_date(date_str)
 
     def sanitize_phone(self, phone: str):
         if not phone:
             return None
-        return re.sub(r'[()\-\s]', '', phone)
+        return _PHONE_STRIP.sub('', phone)
 
     def hash_ssn(self, ssn: str, fallback_seed: str = ""):
         """
@@ -87,189 +246,397 @@ class CSVImporter:
         return hashlib.sha256(fallback_seed.encode()).hexdigest()
 
     def clean_decimal(self, value):
-        if not value:
-            return Decimal("0.00")
-        return Decimal(value.replace('$', '').replace(',', ''))
+        return parse_money(value)
+
+    def compile_transformer(self, headers: Sequence[str]) -> "RowTransformer":
+        return RowTransformer(self, headers)
 
-    def process(self, portfolio_id: int, batch_size: int = 1000, progress_cb=None):
+    def process(self, portfolio_id: int, batch_size: int = 1000, progress_cb=None, engine: Optional[str] = None,
+                workers: Optional[int] = None, resume_from: Optional[Tuple[int, int]] = None, delta: bool = False):
         """
-        Main entry point. Returns stats.
+        Main entry point. Returns the number of rows processed; throughput
+        details are left in self.stats.
+        engine: 'batch' (execute_values per batch), 'copy' (COPY into a
+        staging table) or 'parallel' (COPY fed by `workers` parsing
+        processes; needs a file opened from disk); defaults to INGEST_ENGINE.
+        resume_from: (byte offset, row number) checkpoint to continue from;
+        needs a binary file_obj. The returned count includes those rows.
+        delta: update accounts already in the portfolio whose content changed,
+        instead of skipping them (see app.services.ingest_delta).
         """
-        rows_processed = 0
-        reader = csv.DictReader(self.file_obj)
+        engine = resolve_engine(engine)
+        if resume_from and isinstance(self.file_obj, io.TextIOBase):
+            raise ValueError("Resuming an import needs a binary file object")
+        debug = os.getenv("ENABLE_INGEST_DEBUG", "false").lower() == "true"
+        started = time.perf_counter()
+        self.stats = {"engine": engine}
+        start_offset, start_row = resume_from or (0, 0)
+        rows_processed = start_row
+        self.position = start_offset if resume_from else None
+        self.rejects = RejectCollector(self.job_id)
+        self.delta = DeltaTracker(self.job_id) if delta else None
+        # reader.line_num restarts after a resume; assume one line per record before the checkpoint
+        line_base = start_row
+
+        conn = self.conn = self.get_db()
+        try:
+            if self.file_format is not None:
+                from app.services.ingest_columnar import process_columnar
 
-        if os.getenv("ENABLE_INGEST_DEBUG", "false").lower() == "true":
-            with open("ingest_debug.log", "w") as f:
-                f.write(f"Detected Headers: {reader.fieldnames}\n")
+                # Parallel parsing splits CSV text; columnar batches load on the COPY path
+                rows_processed = process_columnar(
+                    self, conn, self.file_obj, self.file_format, portfolio_id, batch_size,
+                    "batch" if engine == "batch" else "copy", progress_cb=progress_cb, start_row=start_row
+                )
+                return rows_processed
 
-        conn = self.get_db()
-        try:
-            batch: List[Dict[str, Any]] = []
-            for row in reader:
-                if rows_processed == 0 and os.getenv("ENABLE_INGEST_DEBUG", "false").lower() == "true":
-                    with open("ingest_debug.log", "a") as f:
-                        f.write(f"First Row Raw: {row}\n")
+            if engine == "parallel":
+                from app.services.ingest_parallel import process_parallel, resolve_workers
 
-                clean_row = {self.normalize_header(k): v for k, v in row.items()}
-                if rows_processed == 0 and os.getenv("ENABLE_INGEST_DEBUG", "false").lower() == "true":
+                path = getattr(self.file_obj, "name", None)
+                if not isinstance(path, str) or not os.path.exists(path):
+                    raise ValueError("The parallel ingest engine needs a file on disk")
+                rows_processed = process_parallel(
+                    self, conn, path, portfolio_id, resolve_workers(workers), progress_cb=progress_cb,
+                    resume_from=resume_from
+                )
+                return rows_processed
+
+            if isinstance(self.file_obj, io.TextIOBase):
+                lines = self.file_obj
+            else:
+                lines = OffsetLineReader(self.file_obj)
+            reader = csv.reader(lines)
+            headers = next(reader, None) or []
+            self.rejects.headers = headers
+            if start_offset:
+                lines.seek(start_offset)
+            transformer = self.compile_transformer(headers)
+            if debug:
+                with open("ingest_debug.log", "w") as f:
+                    f.write(f"Detected Headers: {headers}\n")
+                    f.write(f"Mapped Columns: {transformer.describe()}\n")
+
+            if engine == "copy":
+                rows_processed = self._process_copy(conn, reader, lines, transformer, portfolio_id, progress_cb,
+                                                    start_row=start_row)
+                return rows_processed
+
+            rejects = self.rejects
+            batch: List[Tuple[tuple, tuple]] = []
+            # (row number, line number, csv values) per batch row, for rejects found while loading
+            sources: List[tuple] = []
+            for values in reader:
+                if not values:
+                    continue  # blank line
+                if rows_processed == start_row and debug:
                     with open("ingest_debug.log", "a") as f:
-                        f.write(f"First Row Cleaned: {clean_row}\n")
+                        f.write(f"First Row Raw: {values}\n")
+                        f.write(f"First Row Transformed: {transformer.transform(list(values))}\n")
 
-                batch.append(clean_row)
                 rows_processed += 1
+                try:
+                    batch.append(transformer.transform(values))
+                except TRANSFORM_ERRORS as e:
+                    rejects.add(rows_processed, reader.line_num + line_base, values[:-1], str(e), "parse")
+                    continue
+                sources.append((rows_processed, reader.line_num + line_base, values))
 
                 if len(batch) >= batch_size:
-                    self.process_batch(conn, batch, portfolio_id)
+                    self.process_batch(conn, batch, portfolio_id, checkpoint=_checkpoint(lines, rows_processed),
+                                       sources=sources)
                     if progress_cb:
                         progress_cb(rows_processed)
                     batch = []
+                    sources = []
 
-            if batch:
-                self.process_batch(conn, batch, portfolio_id)
+            if batch or rejects.pending:
+                self.process_batch(conn, batch, portfolio_id, checkpoint=_checkpoint(lines, rows_processed),
+                                   sources=sources)
                 if progress_cb:
                     progress_cb(rows_processed)
         finally:
-            conn.close()
+            self.conn = None
+            self.release_db(conn)
+            elapsed = time.perf_counter() - started
+            run_rows = rows_processed - start_row
+            self.stats.update({
+                "rows": rows_processed,
+                "rows_failed": self.rejects.total,
+                "debtor_cache_hits": self.debtor_cache_hits,
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(run_rows / elapsed, 1) if elapsed > 0 else None,
+            })
 
         return rows_processed
 
-    def process_batch(self, conn, rows: List[Dict[str, Any]], portfolio_id: int):
+    def profile(self, portfolio_id: int, progress_cb=None) -> dict:
         """
-        Process a batch of rows using a single DB connection.
+        Dry run: read and transform the whole file and check its keys against
+        the database, writing nothing. Returns the profile described in
+        app.services.ingest_profile; self.stats is filled as for process().
+        """
+        from app.services.ingest_profile import profile_placement
+
+        with self.read_db() as conn:
+            return profile_placement(self, conn, portfolio_id, progress_cb=progress_cb)
+
+    def _process_copy(self, conn, reader, lines, transformer: "RowTransformer", portfolio_id: int, progress_cb=None,
+                      start_row: int = 0) -> int:
+        from app.services.ingest_copy import CopyStagingLoader, INGEST_COPY_CHUNK_ROWS
+
+        rows_processed = start_row
+        line_base = start_row
+        rejects = self.rejects
+        # row_num -> (line number, csv values) for the current chunk, for rejects found while loading
+        sources: Dict[int, tuple] = {}
+
+        def on_reject(staged: tuple, reason: str):
+            line_number, values = sources[staged[0]]
+            rejects.add(staged[0] + 1, line_number, values[:-1], reason, "load")
+
+        with CopyStagingLoader(conn, portfolio_id, job_id=self.job_id, rejects=rejects,
+                               on_reject=on_reject, delta=self.delta) as loader:
+            chunk = []
+            for values in reader:
+                if not values:
+                    continue
+                row_num = rows_processed
+                rows_processed += 1
+                try:
+                    debtor, debt = transformer.transform(values)
+                except TRANSFORM_ERRORS as e:
+                    rejects.add(rows_processed, reader.line_num + line_base, values[:-1], str(e), "parse")
+                    continue
+                chunk.append((row_num,) + debtor + debt)
+                sources[row_num] = (reader.line_num + line_base, values)
+                if len(chunk) >= INGEST_COPY_CHUNK_ROWS:
+                    self._load_chunk(loader, chunk, _checkpoint(lines, rows_processed))
+                    chunk = []
+                    sources.clear()
+                    if progress_cb:
+                        progress_cb(rows_processed)
+            if chunk or rejects.pending:
+                self._load_chunk(loader, chunk, _checkpoint(lines, rows_processed))
+                if progress_cb:
+                    progress_cb(rows_processed)
+            self.stats.update(loader.stats)
+        return rows_processed
+
+    def _load_chunk(self, loader, chunk: List[tuple], checkpoint: Optional[Tuple[int, int]]):
+        loader.load(chunk, checkpoint=checkpoint)
+        if checkpoint:
+            self.position = checkpoint[0]
+
+    def process_batch(self, conn, rows: List[Tuple[tuple, tuple]], portfolio_id: int,
+                      checkpoint: Optional[Tuple[int, int]] = None, sources: Optional[List[tuple]] = None,
+                      on_reject=None):
+        """
+        Process a batch of transformed (debtor, debt) rows using a single DB connection.
+        checkpoint: (byte offset, row number) after this batch, recorded in its transaction.
+        sources: (row number, line number, csv values) per row. When given, rows the
+        database refuses are bisected out and rejected instead of failing the batch.
+        on_reject(source, reason): records such a row when sources are not csv values.
         """
         cursor = conn.cursor()
         try:
-            debtor_rows = []
-            ssn_hashes = []
-
-            for row in rows:
-                phone = self.sanitize_phone(row.get('primary_phone'))
-                zip_5 = (row.get('zip_code') or '')[:5]
-                dob = self.parse_date(row.get('date_of_birth'))
-
-                fallback_seed = "|".join([
-                    (row.get('first_name') or '').strip().lower(),
-                    (row.get('last_name') or '').strip().lower(),
-                    str(dob or ''),
-                    zip_5
-                ])
-                ssn_hash = self.hash_ssn(row.get('ssn'), fallback_seed)
-
-                debtor_rows.append({
-                    "ssn_hash": ssn_hash,
-                    "first_name": row.get('first_name'),
-                    "last_name": row.get('last_name'),
-                    "dob": dob,
-                    "address_1": row.get('address_line_1'),
-                    "address_2": row.get('address_line_2'),
-                    "city": row.get('city'),
-                    "state": row.get('state'),
-                    "zip_code": zip_5,
-                    "phone": phone,
-                    "mobile_consent": (row.get('mobile_consent', 'False') or '').lower() == 'true',
-                    "email": row.get('email_address')
-                })
-                ssn_hashes.append(ssn_hash)
-
-            # 1) Load existing debtors
-            cursor.execute(
-                "SELECT id, ssn_hash FROM debtors WHERE ssn_hash = ANY(%s)",
-                (ssn_hashes,)
-            )
-            existing = cursor.fetchall()
-            debtor_map = {row[1]: row[0] for row in existing}
-
-            # 2) Insert missing debtors
-            missing_map = {}
-            for d in debtor_rows:
-                if d["ssn_hash"] not in debtor_map and d["ssn_hash"] not in missing_map:
-                    missing_map[d["ssn_hash"]] = d
-
-            if missing_map:
-                values = [
-                    (
-                        d["ssn_hash"], d["first_name"], d["last_name"], d["dob"],
-                        d["address_1"], d["address_2"], d["city"], d["state"],
-                        d["zip_code"], d["phone"], d["mobile_consent"], d["email"]
-                    )
-                    for d in missing_map.values()
-                ]
-                execute_values(
-                    cursor,
-                    """
-                    INSERT INTO debtors (
-                        ssn_hash, first_name, last_name, dob, address_1, address_2,
-                        city, state, zip_code, phone, mobile_consent, email
-                    ) VALUES %s
-                    ON CONFLICT (ssn_hash) DO NOTHING
-                    RETURNING id, ssn_hash
-                    """,
-                    values
-                )
-                inserted = cursor.fetchall()
-                for row in inserted:
-                    debtor_map[row[1]] = row[0]
-
-                # Ensure any concurrent inserts are picked up
-                cursor.execute(
-                    "SELECT id, ssn_hash FROM debtors WHERE ssn_hash = ANY(%s)",
-                    (list(missing_map.keys()),)
+            if rows and sources is not None:
+                if on_reject is None:
+                    def on_reject(source, reason):
+                        row_number, line_number, values = source
+                        self.rejects.add(row_number, line_number, values[:-1], reason, "load")
+
+                load_isolating(
+                    conn, cursor, list(zip(rows, sources)),
+                    lambda items: self._insert_batch(cursor, [row for row, _ in items], portfolio_id),
+                    lambda item, reason: on_reject(item[1], reason),
                 )
-                refreshed = cursor.fetchall()
-                for row in refreshed:
-                    debtor_map[row[1]] = row[0]
-
-            # 3) Insert debts for all rows
-            debt_values = []
-            for row, debtor in zip(rows, debtor_rows):
-                debt_values.append((
-                    str(debtor_map[debtor["ssn_hash"]]),
-                    portfolio_id,
-                    row.get('client_reference'),
-                    row.get('original_account'),
-                    row.get('original_creditor'),
-                    row.get('current_creditor') or row.get('original_creditor'),
-                    self.parse_date(row.get('date_opened')),
-                    self.parse_date(row.get('charge_off_date')),
-                    self.clean_decimal(row.get('principal_balance')),
-                    self.clean_decimal(row.get('fees_costs')),
-                    self.clean_decimal(row.get('total_placed')),
-                    self.clean_decimal(row.get('total_placed')),
-                    self.parse_date(row.get('last_payment_date')),
-                    self.clean_decimal(row.get('last_payment_amt')),
-                ))
-
-            execute_values(
-                cursor,
-                """
-                INSERT INTO debts (
-                    debtor_id, portfolio_id, client_reference_number, original_account_number,
-                    original_creditor, current_creditor, date_opened, charge_off_date, principal_balance,
-                    fees_costs, face_value, amount_due, last_payment_date, last_payment_amount, status
-                ) VALUES %s
-                ON CONFLICT (portfolio_id, client_reference_number)
-                WHERE client_reference_number IS NOT NULL
-                DO NOTHING
-                """,
-                debt_values,
-                template="(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,'New')"
-            )
-
+            elif rows:
+                self._insert_batch(cursor, rows, portfolio_id)
+
+            if self.rejects is not None:
+                self.rejects.flush(cursor)
+            if self.delta is not None:
+                self.delta.flush(cursor)
+            record_checkpoint(cursor, self.job_id, checkpoint)
             conn.commit()
+            self._remember_debtors()
+            if checkpoint:
+                self.position = checkpoint[0]
         except Exception as e:
+            self._debtor_ids_pending.clear()
             conn.rollback()
             print(f"Error processing batch: {e}")
             raise e
         finally:
             cursor.close()
 
+    def _remember_debtors(self):
+        pending = self._debtor_ids_pending
+        cache = self.debtor_ids
+        if cache is not None and pending:
+            room = INGEST_DEBTOR_CACHE_SIZE - len(cache)
+            if room >= len(pending):
+                cache.update(pending)
+            elif room > 0:
+                cache.update(itertools.islice(pending.items(), room))
+        pending.clear()
+
+    def _insert_batch(self, cursor, rows: List[Tuple[tuple, tuple]], portfolio_id: int):
+        debtor_ids = self.debtor_ids
+        debtor_map = {}
+        missing_map = {}
+        for debtor, _ in rows:
+            ssn_hash = debtor[0]
+            if ssn_hash in debtor_map or ssn_hash in missing_map:
+                continue
+            known = debtor_ids.get(ssn_hash) if debtor_ids is not None else None
+            if known is not None:
+                debtor_map[ssn_hash] = known
+            else:
+                # First row per ssn_hash wins, as before
+                missing_map[ssn_hash] = debtor
+        self.debtor_cache_hits += len(debtor_map)
+
+        # 1) Debtors not seen earlier in the job: insert the new ones and read back
+        # every id in one statement
+        learned = {}
+        if missing_map:
+            found = execute_values(cursor, _DEBTOR_UPSERT_SQL, list(missing_map.values()),
+                                   template=_DEBTOR_TEMPLATE, page_size=len(missing_map), fetch=True)
+            learned = {row[1]: row[0] for row in found}
+            if len(learned) < len(missing_map):
+                # Inserted by a concurrent transaction that committed after this statement's snapshot
+                cursor.execute(
+                    "SELECT id, ssn_hash FROM debtors WHERE ssn_hash = ANY(%s)",
+                    ([ssn_hash for ssn_hash in missing_map if ssn_hash not in learned],)
+                )
+                learned.update((row[1], row[0]) for row in cursor.fetchall())
+            debtor_map.update(learned)
+
+        # 2) Debts for all rows
+        debt_values = [
+            (str(debtor_map[debtor[0]]), portfolio_id) + debt
+            for debtor, debt in rows
+        ]
+        if self.delta is None:
+            execute_values(cursor, _DEBT_SOURCE + INSERT_CONFLICT_SQL, debt_values,
+                           template=_DEBT_TEMPLATE, page_size=len(debt_values))
+        else:
+            # DO UPDATE may touch a row once per statement: a repeated reference keeps its last row
+            latest = {}
+            unreferenced = []
+            for values in debt_values:
+                if values[2] is None:
+                    unreferenced.append(values)
+                else:
+                    latest[values[2]] = values
+            debt_values = list(latest.values()) + unreferenced
+            (inserted, updated), = execute_values(
+                cursor, counted_upsert(_DEBT_SOURCE + DELTA_CONFLICT_SQL), debt_values,
+                template=_DEBT_TEMPLATE, page_size=len(debt_values), fetch=True
+            )
+            self.delta.add(len(debt_values), inserted, updated, latest)
+
+        # Cached once the batch commits; a rolled-back savepoint may have taken new ids with it
+        self._debtor_ids_pending.update(learned)
+
     def get_db(self):
-        from app.core.database import get_db_connection
-        return get_db_connection()
+        from app.core.database import get_pool
+        return get_pool().getconn()
+
+    def release_db(self, conn):
+        from app.core.database import get_pool
+        get_pool().putconn(conn)
+
+    def read_db(self):
+        from app.core.database import pooled_connection
+        return pooled_connection(read_only=True, budget="report")
+
+
+class RowTransformer:
+    """
+    Row conversion compiled once per file from its header row: fixed column
+    positions over csv.reader tuples instead of a normalized dict per row.
+    When several headers normalize to the same field the last one wins, as
+    it did with the per-row dict.
+    """
+
+    # Normalized source fields, in the order transform() unpacks them
+    FIELDS = (
+        'ssn', 'first_name', 'last_name', 'date_of_birth', 'address_line_1', 'address_line_2',
+        'city', 'state', 'zip_code', 'primary_phone', 'mobile_consent', 'email_address',
+        'client_reference', 'original_account', 'original_creditor', 'current_creditor',
+        'date_opened', 'charge_off_date', 'principal_balance', 'fees_costs', 'total_placed',
+        'last_payment_date', 'last_payment_amt',
+    )
+
+    def __init__(self, importer: CSVImporter, headers: Sequence[str]):
+        self.importer = importer
+        self.width = len(headers)
+        positions = {}
+        for index, header in enumerate(headers):
+            positions[importer.normalize_header(header)] = index
+        self.positions = positions
+        # -1 addresses the None appended to every row: absent columns read as None
+        self._fields = itemgetter(*(positions.get(field, -1) for field in self.FIELDS))
+
+    def describe(self) -> Dict[str, Optional[int]]:
+        return {field: self.positions.get(field) for field in self.FIELDS}
+
+    def transform(self, values: list) -> Tuple[tuple, tuple]:
+        """
+        csv.reader row -> (debtor in DEBTOR_COLUMNS order, debt in DEBT_COLUMNS order).
+        Mutates `values` (pads short rows).
+        """
+        missing = self.width - len(values)
+        if missing > 0:
+            values.extend([None] * missing)
+        values.append(None)
+
+        (ssn, first_name, last_name, dob_raw, address_1, address_2, city, state, zip_code, phone,
+         mobile_consent, email, client_reference, original_account, original_creditor, current_creditor,
+         date_opened, charge_off_date, principal, fees, total_placed, last_payment_date,
+         last_payment_amt) = self._fields(values)
+
+        importer = self.importer
+        dob = parse_date(dob_raw)
+        zip_5 = (zip_code or '')[:5]
+        if ssn:
+            ssn_hash = importer.hash_ssn(ssn)
+        else:
+            fallback_seed = "|".join([
+                (first_name or '').strip().lower(),
+                (last_name or '').strip().lower(),
+                str(dob or ''),
+                zip_5
+            ])
+            ssn_hash = importer.hash_ssn(ssn, fallback_seed)
+
+        debtor = (
+            ssn_hash, first_name, last_name, dob, address_1, address_2, city, state, zip_5,
+            importer.sanitize_phone(phone), (mobile_consent or '').lower() == 'true', email,
+        )
+        placed = parse_money(total_placed)
+        debt = (
+            client_reference,
+            original_account,
+            original_creditor,
+            current_creditor or original_creditor,
+            parse_date(date_opened),
+            parse_date(charge_off_date),
+            parse_money(principal),
+            parse_money(fees),
+            placed,
+            placed,
+            parse_date(last_payment_date),
+            parse_money(last_payment_amt),
+        )
+        return debtor, debt
 
 
 def _update_job_status(job_id: str, **fields):
-    from app.core.database import get_db_connection
+    from app.core.database import pooled_connection
     if not fields:
         return
     set_parts = []
@@ -279,44 +646,153 @@ def _update_job_status(job_id: str, **fields):
         values.append(value)
     values.append(job_id)
     sql = f"UPDATE ingest_jobs SET {', '.join(set_parts)} WHERE id = %s"
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        cur.execute(sql, tuple(values))
-        conn.commit()
-    finally:
-        cur.close()
-        conn.close()
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, tuple(values))
+            if "status" in fields:
+                notify_status(cur, job_id, fields["status"])
+            conn.commit()
+        finally:
+            cur.close()
+
 
+def _load_checkpoint(job_id: str) -> Optional[Tuple[int, int]]:
+    from app.core.database import pooled_connection
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT checkpoint_offset, checkpoint_row FROM ingest_jobs WHERE id = %s", (job_id,))
+            row = cur.fetchone()
+        finally:
+            cur.close()
+    if not row or row[0] is None:
+        return None
+    return int(row[0]), int(row[1] or 0)
+
+
+def _count_recalled(delta: DeltaTracker, portfolio_id: int) -> int:
+    from app.core.database import pooled_connection
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            return delta.count_recalled(cur, portfolio_id)
+        finally:
+            cur.close()
 
-def run_ingest_job(job_id: str, file_path: str, portfolio_id: int, batch_size: int = 1000):
+
+def _object_shared(object_key: str, job_id: str) -> bool:
+    """Whether another job (a sibling zip member) still needs the stored object."""
+    from app.core.database import pooled_connection
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                "SELECT 1 FROM ingest_jobs WHERE object_key = %s AND id <> %s AND status <> 'completed' LIMIT 1",
+                (object_key, job_id)
+            )
+            return cur.fetchone() is not None
+        finally:
+            cur.close()
+
+
+# Retries are safe: each attempt resumes from the last committed checkpoint
+@job_queue.task("ingest", queue="ingest", max_attempts=3)
+@route_label("job:ingest")
+def run_ingest_job(job_id: str, object_key: str, portfolio_id: int, batch_size: int = 1000, engine: Optional[str] = None,
+                   workers: Optional[int] = None, resume: bool = False, compression: Optional[str] = None,
+                   member: Optional[str] = None, file_format: Optional[str] = None, dry_run: bool = False,
+                   delta: bool = False):
     """
-    Background job runner for CSV ingestion.
+    Background job runner for CSV ingestion. The placement is streamed from the
+    object store (see app.services.object_store) rather than read from local disk.
+    Each committed batch records a checkpoint; with resume=True the job continues
+    from the last one. The object is kept until the import completes.
+    compression / member: a gzip, zstd or zip placement, decompressed on the fly
+    (see app.services.ingest_sources); member is the CSV inside a zip.
+    file_format: 'parquet' or 'arrow' for a columnar placement.
+    dry_run: profile the file instead of importing it (CSVImporter.profile); the
+    result goes to ingest_jobs.profile and the object is kept for
+    POST /ingest/jobs/{id}/commit.
+    delta: a re-placement; changed accounts are updated and the job records new /
+    changed / unchanged / recalled counts (see app.services.ingest_delta).
+    Runs on the job worker (app.worker) through the "ingest" queue.
     """
+    from app.services.ingest_sources import open_placement
+    from app.services.object_store import get_object_store
+
+    job = job_queue.current_job()
+    if job is not None and job.attempts > 1:
+        # Redelivered after a worker died mid-import: pick up from the checkpoint
+        resume = True
+
     env_batch = os.getenv("INGEST_BATCH_SIZE")
     if env_batch and env_batch.isdigit():
         batch_size = int(env_batch)
+    engine = resolve_engine(engine)
+    store = get_object_store()
+    if engine == "parallel" and (compression or file_format or store.local_path(object_key) is None):
+        # Worker processes seek into byte ranges of a local CSV file; a bucket object,
+        # compressed stream or columnar file is read once by the COPY engine instead
+        logger.warning("Parallel ingest needs a local CSV file; using the copy engine", extra={"job_id": job_id})
+        engine = "copy"
+    # A profile keeps no checkpoints; a retried dry run reads the file again
+    resume_from = _load_checkpoint(job_id) if resume and not dry_run else None
+    start_offset, start_row = resume_from or (0, 0)
     started_at = datetime.now(timezone.utc)
-    _update_job_status(job_id, status="running", started_at=started_at, error_message=None, rows_processed=0, rows_failed=0)
-
+    # Rejects before the checkpoint were committed with their batches; keep their count
+    reset = {} if resume_from else {"rows_failed": 0}
+    if delta and not resume_from:
+        reset.update(debts_new=0, debts_changed=0, debts_unchanged=0, debts_recalled=None)
+    _update_job_status(
+        job_id, status="running", started_at=started_at, error_message=None,
+        rows_processed=start_row, engine=engine, rows_per_second=None,
+        bytes_processed=start_offset, eta_seconds=None, **reset
+    )
+
+    completed = False
     try:
-        with open(file_path, "r", encoding="utf-8", newline="") as f:
-            importer = CSVImporter(f)
-
-            def progress_cb(count):
-                _update_job_status(job_id, rows_processed=count)
-
-            rows = importer.process(portfolio_id=portfolio_id, batch_size=batch_size, progress_cb=progress_cb)
+        with open_placement(store, object_key, compression, member, file_format) as (raw, total_bytes, position_fn):
+            importer = CSVImporter(raw, job_id=job_id, file_format=file_format)
+            # A compressed stream reports stored bytes; the checkpoint offset is decompressed bytes
+            progress = IngestProgressReporter(
+                job_id, total_bytes=total_bytes, position_fn=position_fn, start_rows=start_row,
+                start_bytes=0 if position_fn else start_offset
+            ).bind(importer)
+            if dry_run:
+                profile = importer.profile(portfolio_id, progress_cb=progress)
+                rows = profile["rows"]
+            else:
+                rows = importer.process(
+                    portfolio_id=portfolio_id, batch_size=batch_size, progress_cb=progress, engine=engine,
+                    workers=workers, resume_from=resume_from, delta=delta
+                )
 
         finished_at = datetime.now(timezone.utc)
-        _update_job_status(job_id, status="completed", finished_at=finished_at, rows_processed=rows)
+        result = {"profile": Json(profile), "rows_failed": profile["rows_failed"]} if dry_run else {}
+        if importer.delta is not None and not resume_from and member is None:
+            # References read before a checkpoint are not known after a resume, so only a
+            # job that read the whole file counts recalls. A zip member is one part of the
+            # placement; its siblings' accounts are not recalls, so members leave it NULL
+            result["debts_recalled"] = _count_recalled(importer.delta, portfolio_id)
+        _update_job_status(
+            job_id, status="completed", finished_at=finished_at, rows_processed=rows,
+            bytes_processed=total_bytes, eta_seconds=0,
+            rows_per_second=importer.stats.get("rows_per_second"), workers=importer.stats.get("workers"), **result
+        )
+        completed = True
     except Exception as e:
         finished_at = datetime.now(timezone.utc)
         _update_job_status(job_id, status="failed", finished_at=finished_at, error_message=str(e))
+        if job is not None and isinstance(e, psycopg2.OperationalError):
+            # Lost connection or server restart: let the queue retry from the checkpoint
+            raise
     finally:
-        if os.getenv("INGEST_CLEANUP_FILES", "true").lower() == "true":
+        # A failed job keeps its object so POST /ingest/jobs/{id}/resume can pick it up;
+        # so does a zip until every member's job has completed
+        if completed and not dry_run and os.getenv("INGEST_CLEANUP_FILES", "true").lower() == "true":
             try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+                if not _object_shared(object_key, job_id):
+                    store.delete(object_key)
             except Exception:
                 pass
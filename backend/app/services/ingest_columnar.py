@@ -0,0 +1,326 @@
+"""
+Columnar placements: Parquet and Arrow IPC (file or stream format).
+
+Record batches are converted a column at a time with pyarrow.compute instead
+of a Python call per cell: headers are normalized once per file, dates are
+parsed with strptime kernels, phones, zips, consent flags and plain amounts
+with string kernels (parse_money sees only the odd amounts out). The (debtor, debt) rows then go
+through the same loading stage as CSV (process_batch or the COPY staging
+loader), with the same reject handling and per-batch checkpoints.
+
+Checkpoint offsets count data rows rather than bytes; a resume skips whole row
+groups / record batches up to the checkpoint.
+
+pyarrow is a regular requirement, but this module (and so pyarrow) is imported
+only when a columnar placement is read, keeping it off the CSV import path.
+"""
+import hashlib
+import os
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from app.services.ingest import parse_money
+from app.services.ingest_errors import TRANSFORM_ERRORS
+from app.services.ingest_sources import ARROW, PARQUET
+
+_ZERO = parse_money(None)
+_NULL_DATE = pa.scalar(None, pa.timestamp("s"))
+_NULL_TEXT = pa.scalar(None, pa.string())
+
+_PLAIN_AMOUNT = r"^-?(\d+\.?\d*|\.\d+)$"
+
+# Arrow's strptime rolls invalid days over (02/30 -> 03/01); parse_date rejects
+# them, so each format also checks the day of month it matched
+_DATE_FORMATS = (
+    ("%m/%d/%Y", r"^\d{1,2}/(?P<day>\d{1,2})/\d{4}$"),
+    ("%Y-%m-%d", r"^\d{4}-\d{1,2}-(?P<day>\d{1,2})$"),
+)
+
+
+def _text(arr: Optional[pa.Array]) -> Optional[pa.Array]:
+    if arr is None or pa.types.is_string(arr.type):
+        return arr
+    return pc.cast(arr, pa.string())
+
+
+def _pylist(arr: Optional[pa.Array], n: int) -> list:
+    return arr.to_pylist() if arr is not None else [None] * n
+
+
+def _dates(arr: Optional[pa.Array]) -> Optional[pa.Array]:
+    """date32 column: native dates/timestamps as-is, text as parse_date would read it."""
+    if arr is None:
+        return None
+    if pa.types.is_date(arr.type) or pa.types.is_timestamp(arr.type):
+        return pc.cast(arr, pa.date32(), safe=False)
+    text = _text(arr)
+    parsed = None
+    for fmt, pattern in _DATE_FORMATS:
+        candidate = pc.strptime(text, format=fmt, unit="s", error_is_null=True)
+        day = pc.cast(pc.struct_field(pc.extract_regex(text, pattern), [0]), pa.int64())
+        candidate = pc.if_else(pc.equal(pc.day(candidate), day), candidate, _NULL_DATE)
+        parsed = candidate if parsed is None else pc.coalesce(parsed, candidate)
+    return pc.cast(parsed, pa.date32())
+
+
+def _money(arr: Optional[pa.Array], n: int) -> Tuple[List[Optional[Decimal]], Dict[int, str]]:
+    """Amounts plus {row index: reason} for values parse_money refuses."""
+    if arr is None:
+        return [_ZERO] * n, {}
+    kind = arr.type
+    if pa.types.is_decimal(kind) or pa.types.is_integer(kind):
+        return [_ZERO if v is None else Decimal(v) for v in arr.to_pylist()], {}
+    if pa.types.is_floating(kind):
+        return [_ZERO if v is None else Decimal(repr(v)) for v in arr.to_pylist()], {}
+    text = _text(arr)
+    cleaned = pc.replace_substring(pc.replace_substring(text, "$", ""), ",", "")
+    # Plain numbers convert straight to Decimal; anything else goes through parse_money for its verdict
+    plain = pc.fill_null(pc.match_substring_regex(cleaned, _PLAIN_AMOUNT), True).to_pylist()
+    amounts = [Decimal(value) if value else _ZERO for value in pc.if_else(plain, cleaned, "").to_pylist()]
+    errors = {}
+    for index in (i for i, ok in enumerate(plain) if not ok):
+        try:
+            amounts[index] = parse_money(text[index].as_py())
+        except TRANSFORM_ERRORS as e:
+            amounts[index] = None
+            errors[index] = str(e)
+    return amounts, errors
+
+
+class ColumnarTransformer:
+    """
+    RowTransformer for record batches: the same field mapping (last header
+    wins) and the same output rows, computed per column.
+    """
+
+    def __init__(self, importer, names: Sequence[str]):
+        from app.services.ingest import RowTransformer
+
+        self.importer = importer
+        positions = {}
+        for index, name in enumerate(names):
+            positions[importer.normalize_header(name)] = index
+        self.positions = {field: positions[field] for field in RowTransformer.FIELDS if field in positions}
+
+    def describe(self) -> Dict[str, Optional[int]]:
+        from app.services.ingest import RowTransformer
+
+        return {field: self.positions.get(field) for field in RowTransformer.FIELDS}
+
+    def _column(self, batch: pa.RecordBatch, field: str) -> Optional[pa.Array]:
+        index = self.positions.get(field)
+        return batch.column(index) if index is not None else None
+
+    def text_values(self, batch: pa.RecordBatch, field: str) -> list:
+        """A mapped field's values as text, None where the column is absent."""
+        return _pylist(_text(self._column(batch, field)), batch.num_rows)
+
+    def transform(self, batch: pa.RecordBatch) -> Tuple[List[Optional[Tuple[tuple, tuple]]], Dict[int, str]]:
+        """
+        Record batch -> ([(debtor, debt) or None per row], {row index: parse error}).
+        Rows with a parse error are None, as RowTransformer.transform would have raised.
+        """
+        n = batch.num_rows
+        column = lambda field: self._column(batch, field)  # noqa: E731
+        text = lambda field: _text(column(field))  # noqa: E731
+
+        dob = _dates(column("date_of_birth"))
+        zip_code = text("zip_code")
+        zip_code = pc.fill_null(zip_code, "") if zip_code is not None else pa.array([""] * n, pa.string())
+        zip_5 = pc.utf8_slice_codeunits(zip_code, 0, 5)
+
+        phone = text("primary_phone")
+        if phone is not None:
+            stripped = pc.replace_substring_regex(phone, r"[()\-\s]", "")
+            phone = pc.if_else(pc.equal(phone, ""), _NULL_TEXT, stripped)
+
+        consent = column("mobile_consent")
+        if consent is None:
+            consent_flags = [False] * n
+        elif pa.types.is_boolean(consent.type):
+            consent_flags = pc.fill_null(consent, False).to_pylist()
+        else:
+            consent_flags = pc.fill_null(pc.equal(pc.utf8_lower(_text(consent)), "true"), False).to_pylist()
+
+        # Debtors without an SSN are keyed on name, date of birth and zip, as in RowTransformer
+        def seed_part(arr):
+            if arr is None:
+                return pa.array([""] * n, pa.string())
+            return pc.utf8_lower(pc.utf8_trim_whitespace(pc.fill_null(arr, "")))
+
+        dob_text = pc.fill_null(pc.cast(dob, pa.string()), "") if dob is not None else pa.array([""] * n, pa.string())
+        seeds = pc.binary_join_element_wise(
+            seed_part(text("first_name")), seed_part(text("last_name")), dob_text, zip_5, "|"
+        ).to_pylist()
+        ssn_hashes = [
+            hashlib.sha256((ssn if ssn else seed).encode()).hexdigest()
+            for ssn, seed in zip(_pylist(text("ssn"), n), seeds)
+        ]
+
+        original_creditor = text("original_creditor")
+        current_creditor = text("current_creditor")
+        if current_creditor is not None and original_creditor is not None:
+            present = pc.fill_null(pc.greater(pc.utf8_length(current_creditor), 0), False)
+            current_creditor = pc.if_else(present, current_creditor, original_creditor)
+        elif current_creditor is None:
+            current_creditor = original_creditor
+
+        # Same order as RowTransformer, so a row reports the same (first) bad amount
+        placed, placed_errors = _money(column("total_placed"), n)
+        principal, principal_errors = _money(column("principal_balance"), n)
+        fees, fees_errors = _money(column("fees_costs"), n)
+        last_amount, last_amount_errors = _money(column("last_payment_amt"), n)
+        errors: Dict[int, str] = {}
+        for found in (last_amount_errors, fees_errors, principal_errors, placed_errors):
+            errors.update(found)
+
+        debtors = zip(
+            ssn_hashes, _pylist(text("first_name"), n), _pylist(text("last_name"), n), _pylist(dob, n),
+            _pylist(text("address_line_1"), n), _pylist(text("address_line_2"), n), _pylist(text("city"), n),
+            _pylist(text("state"), n), zip_5.to_pylist(), _pylist(phone, n), consent_flags,
+            _pylist(text("email_address"), n),
+        )
+        debts = zip(
+            _pylist(text("client_reference"), n), _pylist(text("original_account"), n),
+            _pylist(original_creditor, n), _pylist(current_creditor, n),
+            _pylist(_dates(column("date_opened")), n), _pylist(_dates(column("charge_off_date")), n),
+            principal, fees, placed, placed, _pylist(_dates(column("last_payment_date")), n), last_amount,
+        )
+        rows: List[Optional[Tuple[tuple, tuple]]] = list(zip(debtors, debts))
+        for index in errors:
+            rows[index] = None
+        return rows, errors
+
+
+def raw_values(batch: pa.RecordBatch, index: int) -> list:
+    """One row of a batch as strings, for ingest_job_errors."""
+    return [None if value is None else str(value) for value in (col[index].as_py() for col in batch.columns)]
+
+
+class BatchReader:
+    """
+    Record batches of at most batch_rows rows from a Parquet or Arrow IPC
+    source, skipping the first skip_rows rows.
+    """
+
+    def __init__(self, source, file_format: str, batch_rows: int, skip_rows: int = 0):
+        self.source = source
+        self.file_format = file_format
+        self.batch_rows = batch_rows
+        self.skip_rows = skip_rows
+        if file_format == PARQUET:
+            self._parquet = pq.ParquetFile(source)
+            self.names = self._parquet.schema_arrow.names
+        elif file_format == ARROW:
+            head = source.read(6)
+            source.seek(0)
+            if head == b"ARROW1":
+                self._ipc = pa.ipc.open_file(source)
+            else:
+                self._ipc = pa.ipc.open_stream(source)
+            self.names = self._ipc.schema.names
+        else:
+            raise ValueError(f"Unsupported columnar format '{file_format}'")
+
+    def __iter__(self) -> Iterator[pa.RecordBatch]:
+        skip = self.skip_rows
+        if self.file_format == PARQUET:
+            # Row groups wholly before the checkpoint are not read at all
+            metadata = self._parquet.metadata
+            groups = []
+            for group in range(metadata.num_row_groups):
+                rows = metadata.row_group(group).num_rows
+                if not groups and rows <= skip:
+                    skip -= rows
+                    continue
+                groups.append(group)
+            batches = self._parquet.iter_batches(batch_size=self.batch_rows, row_groups=groups) if groups else ()
+        elif isinstance(self._ipc, pa.ipc.RecordBatchFileReader):
+            batches = (self._ipc.get_batch(index) for index in range(self._ipc.num_record_batches))
+        else:
+            batches = self._ipc
+
+        for batch in batches:
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            if skip:
+                batch, skip = batch.slice(skip), 0
+            for start in range(0, batch.num_rows, self.batch_rows):
+                yield batch.slice(start, self.batch_rows)
+
+
+def process_columnar(importer, conn, source, file_format: str, portfolio_id: int, batch_size: int,
+                     engine: str, progress_cb=None, start_row: int = 0) -> int:
+    """
+    Load a columnar placement. engine 'batch' loads batch_size rows per
+    transaction with process_batch; 'copy' (and 'parallel', which needs a CSV)
+    stages INGEST_COPY_CHUNK_ROWS rows per COPY.
+    """
+    from app.services.ingest_copy import CopyStagingLoader, INGEST_COPY_CHUNK_ROWS
+
+    rejects = importer.rejects
+    rows_processed = start_row
+    batch_rows = batch_size if engine == "batch" else INGEST_COPY_CHUNK_ROWS
+    reader = BatchReader(source, file_format, batch_rows, skip_rows=start_row)
+    rejects.headers = list(reader.names)
+    transformer = ColumnarTransformer(importer, reader.names)
+    if os.getenv("ENABLE_INGEST_DEBUG", "false").lower() == "true":
+        with open("ingest_debug.log", "w") as f:
+            f.write(f"Detected Columns: {reader.names}\n")
+            f.write(f"Mapped Columns: {transformer.describe()}\n")
+
+    def parsed(batch: pa.RecordBatch, first_row: int) -> Iterator[Tuple[int, int, tuple]]:
+        """(row number, batch index, (debtor, debt)) for the rows that parsed; the rest are rejected."""
+        rows, errors = transformer.transform(batch)
+        for index, row in enumerate(rows):
+            if row is None:
+                rejects.add(first_row + index + 1, None, raw_values(batch, index), errors[index], "parse")
+            else:
+                yield first_row + index + 1, index, row
+
+    if engine == "batch":
+        for batch in reader:
+            first_row = rows_processed
+            rows_processed += batch.num_rows
+            good = list(parsed(batch, first_row))
+
+            def on_reject(source_row, reason, batch=batch):
+                row_number, index = source_row
+                rejects.add(row_number, None, raw_values(batch, index), reason, "load")
+
+            importer.process_batch(
+                conn, [row for _, _, row in good], portfolio_id, checkpoint=(rows_processed, rows_processed),
+                sources=[(row_number, index) for row_number, index, _ in good], on_reject=on_reject
+            )
+            if progress_cb:
+                progress_cb(rows_processed)
+        return rows_processed
+
+    current: Dict[int, Tuple[pa.RecordBatch, int]] = {}
+
+    def on_reject(staged: tuple, reason: str):
+        batch, index = current[staged[0]]
+        rejects.add(staged[0] + 1, None, raw_values(batch, index), reason, "load")
+
+    with CopyStagingLoader(conn, portfolio_id, job_id=importer.job_id, rejects=rejects,
+                           on_reject=on_reject, delta=importer.delta) as loader:
+        for batch in reader:
+            first_row = rows_processed
+            rows_processed += batch.num_rows
+            chunk = []
+            current.clear()
+            for row_number, index, (debtor, debt) in parsed(batch, first_row):
+                # Staged row_num is 0-based, as in the CSV COPY path
+                chunk.append((row_number - 1,) + debtor + debt)
+                current[row_number - 1] = (batch, index)
+            importer._load_chunk(loader, chunk, (rows_processed, rows_processed))
+            if progress_cb:
+                progress_cb(rows_processed)
+        importer.stats.update(loader.stats)
+    return rows_processed
@@ -0,0 +1,235 @@
+"""
+COPY-based ingest engine (INGEST_ENGINE=copy).
+
+Normalized rows are streamed with COPY ... FROM STDIN into a per-import
+UNLOGGED staging table, then debtors and debts are written with set-based
+INSERT ... SELECT statements, one transaction per chunk. Dedupe matches the
+batch engine: debtors on ssn_hash (first row in file order wins, existing
+debtors untouched) and debts on debts_unique_portfolio_client_ref. With a
+DeltaTracker, changed debts are updated instead (see ingest_delta).
+"""
+import logging
+import os
+import uuid
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from psycopg2 import extensions
+
+from app.services.ingest import DEBT_COLUMNS, DEBTOR_COLUMNS, record_checkpoint
+from app.services.ingest_delta import DELTA_CONFLICT_SQL, INSERT_CONFLICT_SQL, content_hash_sql, counted_upsert
+from app.services.ingest_errors import load_isolating
+
+logger = logging.getLogger(__name__)
+
+INGEST_COPY_CHUNK_ROWS = int(os.getenv("INGEST_COPY_CHUNK_ROWS", "50000"))
+COPY_READ_SIZE = 65536
+
+_DATE_COLUMNS = {"dob", "date_opened", "charge_off_date", "last_payment_date"}
+_NUMERIC_COLUMNS = {"principal_balance", "fees_costs", "face_value", "amount_due", "last_payment_amount"}
+
+# (row_num, *DEBTOR_COLUMNS, *DEBT_COLUMNS), matching CSVImporter._process_copy
+STAGE_COLUMNS = ("row_num",) + DEBTOR_COLUMNS + DEBT_COLUMNS
+
+_REFERENCE = STAGE_COLUMNS.index("client_reference_number")
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _stage_type(column: str) -> str:
+    if column == "row_num":
+        return "bigint"
+    if column == "mobile_consent":
+        return "boolean"
+    if column in _DATE_COLUMNS:
+        return "date"
+    if column in _NUMERIC_COLUMNS:
+        return "numeric(12, 2)"
+    return "text"
+
+
+def copy_field(value) -> str:
+    """Encode one value for COPY text format."""
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def copy_lines(rows: Iterable[tuple]) -> Iterator[str]:
+    for row in rows:
+        yield "\t".join(copy_field(value) for value in row) + "\n"
+
+
+class CopyStream:
+    """
+    Read-only file object over an iterator of COPY lines, so copy_expert()
+    pulls rows as it sends them instead of from a pre-built buffer.
+    """
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._pending = ""
+
+    def read(self, size: int = -1) -> str:
+        parts = [self._pending]
+        length = len(self._pending)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            parts.append(line)
+            length += len(line)
+        data = "".join(parts)
+        if 0 <= size < len(data):
+            self._pending = data[size:]
+            return data[:size]
+        self._pending = ""
+        return data
+
+    readline = read
+
+
+class CopyStagingLoader:
+    """
+    Owns one staging table for the lifetime of an import:
+
+        with CopyStagingLoader(conn, portfolio_id) as loader:
+            loader.load(rows)   # repeat per chunk; each call commits
+    """
+
+    def __init__(self, conn, portfolio_id: int, job_id: Optional[str] = None, rejects=None,
+                 on_reject: Optional[Callable[[tuple, str], None]] = None, delta=None):
+        self.conn = conn
+        self.portfolio_id = portfolio_id
+        self.job_id = job_id
+        # RejectCollector flushed with each chunk, and the callback for staged rows the database refuses
+        self.rejects = rejects
+        self.on_reject = on_reject
+        # DeltaTracker for a delta import, flushed with each chunk like rejects
+        self.delta = delta
+        # Generated name and fixed column lists: safe to interpolate
+        self.table = f"ingest_stage_{uuid.uuid4().hex[:16]}"
+        self.stats = {"chunks": 0, "debtors_inserted": 0, "debts_inserted": 0}
+
+    def __enter__(self):
+        columns = ", ".join(f"{column} {_stage_type(column)}" for column in STAGE_COLUMNS)
+        cur = self.conn.cursor()
+        try:
+            # Unlogged: staging rows are rebuilt from the file on retry, so skip the WAL
+            cur.execute(f"CREATE UNLOGGED TABLE {self.table} ({columns})")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            self.conn.rollback()
+        cur = self.conn.cursor()
+        try:
+            cur.execute(f"DROP TABLE IF EXISTS {self.table}")
+            self.conn.commit()
+        except Exception as drop_err:
+            self.conn.rollback()
+            logger.warning("Could not drop ingest staging table", extra={"error": str(drop_err)})
+        finally:
+            cur.close()
+        return False
+
+    def load(self, rows: List[tuple], checkpoint: Optional[Tuple[int, int]] = None):
+        """
+        Stage one chunk and merge it into debtors/debts in a single transaction,
+        together with the job checkpoint (byte offset, row number) after the chunk.
+        With on_reject set, rows the database refuses are bisected out
+        (see ingest_errors) and the rest of the chunk still loads.
+        """
+        cur = self.conn.cursor()
+        counts = [0, 0]
+
+        def merge(part: List[tuple]):
+            debtors, debts = self._merge(cur, part, analyze=part is rows)
+            counts[0] += debtors
+            counts[1] += debts
+
+        try:
+            if rows and self.on_reject is not None:
+                load_isolating(self.conn, cur, rows, merge, self.on_reject)
+            elif rows:
+                merge(rows)
+
+            if self.rejects is not None:
+                self.rejects.flush(cur)
+            if self.delta is not None:
+                self.delta.flush(cur)
+            record_checkpoint(cur, self.job_id, checkpoint)
+            self.conn.commit()
+            self.stats["chunks"] += 1
+            self.stats["debtors_inserted"] += counts[0]
+            self.stats["debts_inserted"] += counts[1]
+        except Exception:
+            self.conn.rollback()
+            logger.exception("Loading a COPY chunk failed", extra={"job_id": self.job_id, "rows": len(rows)})
+            raise
+        finally:
+            cur.close()
+
+    def _merge(self, cur, rows: List[tuple], analyze: bool = True) -> Tuple[int, int]:
+        """Stage `rows` and insert them; returns (debtors inserted, debts inserted)."""
+        stage_cols = ", ".join(STAGE_COLUMNS)
+        debtor_cols = ", ".join(DEBTOR_COLUMNS)
+        debt_cols = ", ".join(DEBT_COLUMNS)
+        staged_debt_cols = ", ".join(f"s.{column}" for column in DEBT_COLUMNS)
+
+        cur.execute(f"TRUNCATE {self.table}")
+        cur.copy_expert(
+            f"COPY {self.table} ({stage_cols}) FROM STDIN",
+            CopyStream(copy_lines(rows)),
+            size=COPY_READ_SIZE,
+        )
+        if analyze:
+            # Bisected slices are small; only the full chunk is worth fresh statistics
+            cur.execute(f"ANALYZE {self.table}")
+
+        # 1) New debtors: first staged row per ssn_hash wins; existing debtors are left as-is
+        cur.execute(
+            f"""
+            INSERT INTO debtors ({debtor_cols})
+            SELECT DISTINCT ON (ssn_hash) {debtor_cols}
+            FROM {self.table}
+            ORDER BY ssn_hash, row_num
+            ON CONFLICT (ssn_hash) DO NOTHING
+            """
+        )
+        debtors = max(cur.rowcount, 0)
+
+        # 2) Debts for every staged row, resolved to debtor ids by ssn_hash
+        insert = f"""
+            INSERT INTO debts (debtor_id, portfolio_id, {debt_cols}, content_hash, status)
+            SELECT {{distinct}} d.id, %s, {staged_debt_cols}, {content_hash_sql("s")}, 'New'
+            FROM {self.table} s
+            JOIN debtors d ON d.ssn_hash = s.ssn_hash
+            ORDER BY {{order}}
+        """
+        if self.delta is None:
+            cur.execute(insert.format(distinct="", order="s.row_num") + INSERT_CONFLICT_SQL, (self.portfolio_id,))
+            return debtors, max(cur.rowcount, 0)
+
+        # DO UPDATE may touch a row once per statement: a repeated reference keeps its last
+        # staged row; rows without a reference are each their own account
+        key = "s.client_reference_number, CASE WHEN s.client_reference_number IS NULL THEN s.row_num END"
+        cur.execute(
+            counted_upsert(insert.format(distinct=f"DISTINCT ON ({key})", order=f"{key}, s.row_num DESC")
+                           + DELTA_CONFLICT_SQL),
+            (self.portfolio_id,),
+        )
+        inserted, updated = cur.fetchone()
+        references = [row[_REFERENCE] for row in rows]
+        accounts = len(set(references)) - (None in references) + references.count(None)
+        self.delta.add(accounts, inserted, updated, references)
+        return debtors, inserted
@@ -0,0 +1,127 @@
+"""
+Delta ingest: a client re-sends a placement with updated accounts.
+
+Every debt carries content_hash, computed in SQL by debt_content_hash() over
+the client-supplied fields of DELTA_COLUMNS. A normal import inserts new
+accounts and leaves existing ones alone (ON CONFLICT DO NOTHING). A delta
+import also updates an existing account, but only when its hash differs
+(ON CONFLICT DO UPDATE ... WHERE content_hash IS DISTINCT FROM). Unchanged
+rows are skipped by the conflict check without being rewritten.
+
+An update keeps what the agency owns: debtor, status, payments, and the
+last-payment fields, which the payment paths write. amount_due moves by the
+change in face value, so payments already collected still count.
+
+Counts of new, changed and unchanged accounts are added to the ingest_jobs
+row in each batch's transaction, like rejects. Recalled accounts are those in
+the portfolio that the file does not contain, counted once the import ends;
+a zip placement imports each member as its own job, so its jobs leave the
+recall count NULL rather than report each other's accounts as recalled.
+
+Debts inserted outside the importers get their content_hash from the
+debts_fill_content_hash trigger, so they compare like imported ones. A debt
+whose placed fields are edited by hand keeps its old hash and counts as
+changed on the next re-placement, which puts the client's values back.
+"""
+from typing import Iterable, Optional
+
+# Client-supplied debt fields that decide whether an account changed
+DELTA_COLUMNS = (
+    "original_account_number", "original_creditor", "current_creditor", "date_opened",
+    "charge_off_date", "principal_balance", "fees_costs", "face_value",
+)
+
+_UPDATES = ",\n    ".join(
+    [f"{column} = EXCLUDED.{column}" for column in DELTA_COLUMNS if column != "face_value"]
+    + [
+        "amount_due = debts.amount_due + (EXCLUDED.face_value - COALESCE(debts.face_value, EXCLUDED.face_value))",
+        "face_value = EXCLUDED.face_value",
+        "content_hash = EXCLUDED.content_hash",
+    ]
+)
+
+# Appended to INSERT INTO debts (...) SELECT ...; a placement import does not
+# touch accounts that are already there
+INSERT_CONFLICT_SQL = """
+ON CONFLICT (portfolio_id, client_reference_number)
+WHERE client_reference_number IS NOT NULL
+DO NOTHING
+"""
+
+DELTA_CONFLICT_SQL = f"""
+ON CONFLICT (portfolio_id, client_reference_number)
+WHERE client_reference_number IS NOT NULL
+DO UPDATE SET
+    {_UPDATES}
+WHERE debts.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+RETURNING (xmax = 0) AS inserted
+"""
+
+
+def content_hash_sql(alias: str = "") -> str:
+    """debt_content_hash(...) over DELTA_COLUMNS, qualified with `alias.` when given."""
+    prefix = f"{alias}." if alias else ""
+    return f"debt_content_hash({', '.join(prefix + column for column in DELTA_COLUMNS)})"
+
+
+def counted_upsert(insert_sql: str) -> str:
+    """Wrap a delta INSERT so it returns one (inserted, updated) row."""
+    return f"""
+    WITH upserted AS ({insert_sql})
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+    """
+
+
+class DeltaTracker:
+    """
+    New / changed / unchanged counts for one delta import, and the client
+    references it has read, for the recall count.
+    """
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0}
+        self.pending = {"new": 0, "changed": 0, "unchanged": 0}
+        self.references = set()
+
+    def add(self, rows: int, inserted: int, updated: int, references: Iterable[Optional[str]]):
+        """One upsert of `rows` accounts, of which `inserted` were new and `updated` changed."""
+        pending = self.pending
+        pending["new"] += inserted
+        pending["changed"] += updated
+        pending["unchanged"] += rows - inserted - updated
+        self.references.update(ref for ref in references if ref is not None)
+
+    def flush(self, cur):
+        """Add pending counts to the job on `cur`; the caller commits."""
+        pending = self.pending
+        if not any(pending.values()):
+            return
+        if self.job_id is not None:
+            cur.execute(
+                """
+                UPDATE ingest_jobs
+                SET debts_new = COALESCE(debts_new, 0) + %s,
+                    debts_changed = COALESCE(debts_changed, 0) + %s,
+                    debts_unchanged = COALESCE(debts_unchanged, 0) + %s
+                WHERE id = %s
+                """,
+                (pending["new"], pending["changed"], pending["unchanged"], self.job_id),
+            )
+        for key, value in pending.items():
+            self.counts[key] += value
+            pending[key] = 0
+
+    def count_recalled(self, cur, portfolio_id: int) -> int:
+        """Accounts of the portfolio whose reference the file did not contain."""
+        cur.execute(
+            """
+            SELECT count(*) FROM debts d
+            WHERE d.portfolio_id = %s AND d.client_reference_number IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM unnest(%s::text[]) AS placed(ref) WHERE placed.ref = d.client_reference_number
+              )
+            """,
+            (portfolio_id, list(self.references)),
+        )
+        return cur.fetchone()[0]
@@ -0,0 +1,109 @@
+"""
+Bad-row isolation for ingest.
+
+Rows that fail to parse are rejected on the spot. A batch that the database
+refuses with a row-level error (bad value, NULL in a NOT NULL column, ...) is
+retried by bisection under savepoints: good rows still load in bulk and only
+the offending rows are rejected. Rejects are written to ingest_job_errors in
+the same transaction as the batch (and its checkpoint), so a resumed job
+records each reject exactly once.
+"""
+import os
+from typing import Callable, List, Optional, Sequence
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+INGEST_MAX_REJECTS = int(os.getenv("INGEST_MAX_REJECTS", "10000"))
+
+# Errors that belong to a row rather than to the connection or the statement
+ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+TRANSFORM_ERRORS = (ArithmeticError, ValueError)
+
+_SAVEPOINT = "ingest_rows"
+
+
+class TooManyRejects(Exception):
+    pass
+
+
+def db_error_reason(exc: Exception) -> str:
+    text = (getattr(exc, "pgerror", None) or str(exc)).strip()
+    return text.splitlines()[0] if text else exc.__class__.__name__
+
+
+class RejectCollector:
+    """
+    Rejected rows waiting for the next batch commit. add() raises TooManyRejects
+    past max_rejects so a file in the wrong layout fails fast instead of
+    bisecting every batch.
+    """
+
+    def __init__(self, job_id: Optional[str] = None, max_rejects: int = INGEST_MAX_REJECTS):
+        self.job_id = job_id
+        self.max_rejects = max_rejects
+        self.headers: Optional[List[str]] = None
+        self.pending: List[tuple] = []
+        self.total = 0
+
+    def add(self, row_number: Optional[int], line_number: Optional[int], raw: Sequence, reason: str, stage: str):
+        self.total += 1
+        if self.max_rejects and self.total > self.max_rejects:
+            raise TooManyRejects(
+                f"More than {self.max_rejects} rows rejected; stopping the import (see ingest_job_errors)"
+            )
+        raw_row = [None if value is None else str(value) for value in raw]
+        self.pending.append((row_number, line_number, stage, reason, raw_row))
+
+    def flush(self, cur):
+        """Write pending rejects on `cur`; the caller commits."""
+        if not self.pending:
+            return
+        if self.job_id is not None:
+            execute_values(
+                cur,
+                """
+                INSERT INTO ingest_job_errors (job_id, row_number, line_number, stage, reason, raw_row)
+                VALUES %s
+                """,
+                [(self.job_id,) + reject for reject in self.pending],
+            )
+            cur.execute(
+                """
+                UPDATE ingest_jobs
+                SET rows_failed = COALESCE(rows_failed, 0) + %s, source_headers = COALESCE(source_headers, %s)
+                WHERE id = %s
+                """,
+                (len(self.pending), self.headers, self.job_id),
+            )
+        self.pending = []
+
+
+def load_isolating(conn, cur, items: list, insert: Callable[[list], None], on_reject: Callable[[object, str], None]):
+    """
+    insert(items) as one bulk statement set. If the database rejects it with a
+    row-level error, roll the transaction back and bisect under savepoints,
+    calling on_reject(item, reason) for each single item that still fails.
+    Must run at the start of the batch's transaction.
+    """
+    try:
+        insert(items)
+        return
+    except ROW_ERRORS:
+        conn.rollback()
+    _bisect(cur, items, insert, on_reject)
+
+
+def _bisect(cur, items: list, insert, on_reject):
+    cur.execute(f"SAVEPOINT {_SAVEPOINT}")
+    try:
+        insert(items)
+    except ROW_ERRORS as e:
+        cur.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+        if len(items) == 1:
+            on_reject(items[0], db_error_reason(e))
+        else:
+            middle = len(items) // 2
+            _bisect(cur, items[:middle], insert, on_reject)
+            _bisect(cur, items[middle:], insert, on_reject)
+    cur.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
@@ -0,0 +1,160 @@
+"""
+Parallel ingest engine (INGEST_ENGINE=parallel).
+
+The file is split into line-aligned byte ranges that worker processes parse
+and normalize (header mapping, dates, SSN hashing, decimals). The parent
+process is the only writer: it feeds worker output, in file order, through
+the COPY staging loader. A debtor seen in several ranges is therefore
+inserted once and then resolved by the ssn_hash unique key, just as in the
+single-process engines.
+
+Ranges are split on newlines, so quoted fields must not contain line breaks;
+use the batch or copy engine for such files.
+"""
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from app.services.ingest import CSVImporter
+from app.services.ingest_errors import RejectCollector, TRANSFORM_ERRORS
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0")) or (os.cpu_count() or 1)
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "8"))
+INGEST_PARALLEL_CHUNK_BYTES = int(os.getenv("INGEST_PARALLEL_CHUNK_BYTES", str(8 * 1024 * 1024)))
+
+# Leaves room for 2**32 rows per range while keeping row_num in file order
+_RANGE_SHIFT = 32
+_RANGE_MASK = (1 << _RANGE_SHIFT) - 1
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    workers = workers or INGEST_WORKERS
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    return min(workers, INGEST_MAX_WORKERS)
+
+
+def read_header(path: str, encoding: str = "utf-8") -> Tuple[List[str], int]:
+    """Header fields and the byte offset where data rows start."""
+    with open(path, "rb") as f:
+        line = f.readline()
+        offset = f.tell()
+    fields = next(csv.reader([line.decode(encoding)]), [])
+    return fields, offset
+
+
+def split_ranges(path: str, start: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """Split [start, EOF) into ranges of about chunk_bytes, each ending on a line boundary."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        position = start
+        while position < size:
+            target = position + chunk_bytes
+            if target >= size:
+                end = size
+            else:
+                f.seek(target)
+                f.readline()
+                end = min(f.tell(), size)
+            ranges.append((position, end))
+            position = end
+    return ranges
+
+
+def transform_range(path: str, index: int, start: int, end: int, headers: List[str],
+                    encoding: str = "utf-8") -> Tuple[List[tuple], List[tuple], int, int]:
+    """
+    Worker: parse one byte range into staging rows (row_num, *DEBTOR_COLUMNS, *DEBT_COLUMNS).
+    `headers` is the raw header row; each worker compiles its own RowTransformer.
+    Returns (rows, rejects, records, lines): rejects are (record index, line in range,
+    values, reason) for rows that failed to parse; the low bits of row_num are the
+    record index within the range.
+    """
+    transformer = CSVImporter(None).compile_transformer(headers)
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start).decode(encoding)
+
+    base = index << _RANGE_SHIFT
+    rows = []
+    rejects = []
+    records = 0
+    reader = csv.reader(io.StringIO(data, newline=""))
+    for values in reader:
+        if not values:
+            continue  # blank line
+        try:
+            debtor, debt = transformer.transform(values)
+        except TRANSFORM_ERRORS as e:
+            rejects.append((records, reader.line_num, values[:-1], str(e)))
+        else:
+            rows.append((base + records,) + debtor + debt)
+        records += 1
+    return rows, rejects, records, reader.line_num
+
+
+def process_parallel(importer: CSVImporter, conn, path: str, portfolio_id: int, workers: int,
+                     progress_cb=None, chunk_bytes: Optional[int] = None,
+                     resume_from: Optional[Tuple[int, int]] = None) -> int:
+    """
+    Ranges are merged in file order, so the end of each loaded range is a valid
+    checkpoint; resume_from=(offset, row) restarts the split at that offset.
+    """
+    from app.services.ingest_copy import CopyStagingLoader
+
+    headers, data_start = read_header(path)
+    start_offset, start_row = resume_from or (0, 0)
+    rejects = importer.rejects
+    if rejects is None:
+        rejects = importer.rejects = RejectCollector(importer.job_id)
+    rejects.headers = headers
+    ranges = split_ranges(path, max(data_start, start_offset), chunk_bytes or INGEST_PARALLEL_CHUNK_BYTES)
+    importer.stats["workers"] = workers
+    importer.stats["ranges"] = len(ranges)
+
+    rows_processed = start_row
+    # Header line, plus one line per record before a resume checkpoint
+    lines_before = 1 + start_row
+    range_first_row = start_row
+
+    def on_reject(staged: tuple, reason: str):
+        # Workers do not send raw values or lines for parsed rows; record the normalized values
+        row_number = range_first_row + (staged[0] & _RANGE_MASK) + 1
+        rejects.add(row_number, None, staged[1:], reason, "load")
+
+    # spawn: the worker process runs threads (pool, heartbeat, other jobs) that are unsafe to fork
+    context = multiprocessing.get_context("spawn")
+    with CopyStagingLoader(conn, portfolio_id, job_id=importer.job_id, rejects=rejects,
+                           on_reject=on_reject, delta=importer.delta) as loader, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = []
+        next_range = 0
+        try:
+            # Bounded look-ahead so parsed chunks do not pile up while the parent writes
+            while next_range < len(ranges) or pending:
+                while next_range < len(ranges) and len(pending) < workers * 2:
+                    start, end = ranges[next_range]
+                    pending.append((executor.submit(transform_range, path, next_range, start, end, headers), end))
+                    next_range += 1
+                future, range_end = pending.pop(0)
+                rows, parse_rejects, records, lines = future.result()
+                range_first_row = rows_processed
+                for record, line, values, reason in parse_rejects:
+                    rejects.add(range_first_row + record + 1, lines_before + line, values, reason, "parse")
+                rows_processed += records
+                lines_before += lines
+                if rows or rejects.pending:
+                    loader.load(rows, checkpoint=(range_end, rows_processed))
+                importer.position = range_end
+                if progress_cb:
+                    progress_cb(rows_processed)
+        except BaseException:
+            for future, _ in pending:
+                future.cancel()
+            raise
+        importer.stats.update(loader.stats)
+    return rows_processed
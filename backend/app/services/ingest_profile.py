@@ -0,0 +1,245 @@
+"""
+Dry-run profile of a placement: what an import would do, without writing it.
+
+The file is read and transformed exactly as an import reads it (same field
+mapping, same parse errors), and its keys are checked against the database
+in bulk, one ANY() lookup per INGEST_PROFILE_LOOKUP_ROWS keys not seen
+earlier in the file:
+
+- debtors: distinct ssn_hash values that already exist vs. new ones, and
+  how many rows map to each;
+- debts: client references that collide with the portfolio, or repeat one
+  earlier in the file; the import skips both (ON CONFLICT DO NOTHING);
+- dates that are present but parse_date cannot read (loaded as NULL);
+- balance totals over the rows that parse.
+
+Lookups run on the read replica when it is healthy, so a profile may trail
+the primary by up to DB_REPLICA_MAX_LAG_SECONDS.
+"""
+import csv
+import io
+import os
+import time
+from decimal import Decimal
+from typing import Dict, List
+
+from app.services.ingest_errors import TRANSFORM_ERRORS
+
+INGEST_PROFILE_LOOKUP_ROWS = int(os.getenv("INGEST_PROFILE_LOOKUP_ROWS", "5000"))
+# Parse errors listed in the profile; the rest are only counted
+INGEST_PROFILE_SAMPLE_ERRORS = 20
+
+# (source field, profile key) of the dates an import parses
+DATE_FIELDS = (
+    ("date_of_birth", "dob"),
+    ("date_opened", "date_opened"),
+    ("charge_off_date", "charge_off_date"),
+    ("last_payment_date", "last_payment_date"),
+)
+# Positions of those dates in RowTransformer output: (0 = debtor / 1 = debt, index)
+_DATE_SLOTS = ((0, 3), (1, 4), (1, 5), (1, 10))
+
+# Profile key -> position in the debt tuple
+_TOTALS = (
+    ("principal_balance", 6),
+    ("fees_costs", 7),
+    ("face_value", 8),
+    ("last_payment_amount", 11),
+)
+
+
+class PlacementProfiler:
+    """Counts for one placement; feed it transformed rows with add()."""
+
+    def __init__(self, conn, portfolio_id: int, lookup_rows: int = INGEST_PROFILE_LOOKUP_ROWS):
+        self.conn = conn
+        self.portfolio_id = portfolio_id
+        self.lookup_rows = lookup_rows
+        self.rows = 0
+        self.rows_failed = 0
+        self.errors: List[dict] = []
+        # ssn_hash -> exists in the database; pending: hash -> rows, until the next lookup
+        self.debtors: Dict[str, bool] = {}
+        self.pending_debtors: Dict[str, int] = {}
+        self.rows_existing_debtor = 0
+        self.rows_new_debtor = 0
+        self.references = set()
+        self.pending_references: List[str] = []
+        self.existing_references = 0
+        self.duplicate_references = 0
+        self.missing_references = 0
+        self.invalid_dates = {key: 0 for _, key in DATE_FIELDS}
+        self.totals = {key: Decimal("0.00") for key, _ in _TOTALS}
+        self.lookups = 0
+
+    def reject(self, row_number: int, reason: str):
+        self.rows += 1
+        self.rows_failed += 1
+        if len(self.errors) < INGEST_PROFILE_SAMPLE_ERRORS:
+            self.errors.append({"row_number": row_number, "reason": reason})
+
+    def add(self, debtor: tuple, debt: tuple, raw_dates: tuple):
+        """One parsed row; raw_dates holds the source values of DATE_FIELDS."""
+        self.rows += 1
+        ssn_hash = debtor[0]
+        exists = self.debtors.get(ssn_hash)
+        if exists is None:
+            pending = self.pending_debtors
+            pending[ssn_hash] = pending.get(ssn_hash, 0) + 1
+        elif exists:
+            self.rows_existing_debtor += 1
+        else:
+            self.rows_new_debtor += 1
+
+        reference = debt[0]
+        if reference is None:
+            # The unique index skips NULL references, so these always insert
+            self.missing_references += 1
+        elif reference in self.references:
+            self.duplicate_references += 1
+        else:
+            self.references.add(reference)
+            self.pending_references.append(reference)
+
+        row = (debtor, debt)
+        for (_, key), (part, index), raw in zip(DATE_FIELDS, _DATE_SLOTS, raw_dates):
+            if raw and row[part][index] is None:
+                self.invalid_dates[key] += 1
+        totals = self.totals
+        for key, index in _TOTALS:
+            totals[key] += debt[index]
+
+        if len(self.pending_debtors) >= self.lookup_rows or len(self.pending_references) >= self.lookup_rows:
+            self.flush()
+
+    def flush(self):
+        """Look up the keys first seen since the last flush."""
+        cur = self.conn.cursor()
+        try:
+            if self.pending_debtors:
+                cur.execute(
+                    "SELECT ssn_hash FROM debtors WHERE ssn_hash = ANY(%s)",
+                    (list(self.pending_debtors),)
+                )
+                found = {row[0] for row in cur.fetchall()}
+                self.lookups += 1
+                for ssn_hash, rows in self.pending_debtors.items():
+                    exists = ssn_hash in found
+                    self.debtors[ssn_hash] = exists
+                    if exists:
+                        self.rows_existing_debtor += rows
+                    else:
+                        self.rows_new_debtor += rows
+                self.pending_debtors = {}
+            if self.pending_references:
+                cur.execute(
+                    """
+                    SELECT count(*) FROM debts
+                    WHERE portfolio_id = %s AND client_reference_number = ANY(%s)
+                    """,
+                    (self.portfolio_id, self.pending_references)
+                )
+                self.existing_references += cur.fetchone()[0]
+                self.lookups += 1
+                self.pending_references = []
+        finally:
+            cur.close()
+        # Only reads; end the snapshot so a long profile does not hold back vacuum on the replica
+        self.conn.rollback()
+
+    def result(self) -> dict:
+        self.flush()
+        existing_debtors = sum(1 for exists in self.debtors.values() if exists)
+        parsed = self.rows - self.rows_failed
+        skipped = self.existing_references + self.duplicate_references
+        return {
+            "rows": self.rows,
+            "rows_failed": self.rows_failed,
+            "errors": self.errors,
+            "debtors": {
+                "distinct": len(self.debtors),
+                "existing": existing_debtors,
+                "new": len(self.debtors) - existing_debtors,
+                "rows_existing": self.rows_existing_debtor,
+                "rows_new": self.rows_new_debtor,
+            },
+            "debts": {
+                "would_insert": parsed - skipped,
+                "existing_reference": self.existing_references,
+                "duplicate_reference": self.duplicate_references,
+                "missing_reference": self.missing_references,
+            },
+            "invalid_dates": dict(self.invalid_dates),
+            "totals": {key: str(value) for key, value in self.totals.items()},
+            "lookups": self.lookups,
+        }
+
+
+def _profile_csv(importer, profiler: PlacementProfiler, progress_cb=None):
+    from app.services.ingest import OffsetLineReader
+
+    if isinstance(importer.file_obj, io.TextIOBase):
+        lines = importer.file_obj
+    else:
+        lines = OffsetLineReader(importer.file_obj)
+    reader = csv.reader(lines)
+    headers = next(reader, None) or []
+    transformer = importer.compile_transformer(headers)
+    # transform() pads each row and appends a None, which -1 addresses for absent columns
+    date_positions = [transformer.positions.get(field, -1) for field, _ in DATE_FIELDS]
+    for values in reader:
+        if not values:
+            continue
+        try:
+            debtor, debt = transformer.transform(values)
+        except TRANSFORM_ERRORS as e:
+            profiler.reject(profiler.rows + 1, str(e))
+            continue
+        profiler.add(debtor, debt, tuple(values[position] for position in date_positions))
+        if progress_cb and profiler.rows % profiler.lookup_rows == 0:
+            importer.position = getattr(lines, "offset", None)
+            progress_cb(profiler.rows)
+
+
+def _profile_columnar(importer, profiler: PlacementProfiler, progress_cb=None):
+    from app.services.ingest_columnar import BatchReader, ColumnarTransformer
+
+    reader = BatchReader(importer.file_obj, importer.file_format, profiler.lookup_rows)
+    transformer = ColumnarTransformer(importer, reader.names)
+    for batch in reader:
+        first_row = profiler.rows
+        rows, errors = transformer.transform(batch)
+        raw_dates = zip(*(transformer.text_values(batch, field) for field, _ in DATE_FIELDS))
+        for index, (row, dates) in enumerate(zip(rows, raw_dates)):
+            if row is None:
+                profiler.reject(first_row + index + 1, errors[index])
+            else:
+                profiler.add(row[0], row[1], dates)
+        if progress_cb:
+            progress_cb(profiler.rows)
+
+
+def profile_placement(importer, conn, portfolio_id: int, progress_cb=None) -> dict:
+    """
+    Profile importer.file_obj (CSV, or importer.file_format) for portfolio_id.
+    conn is only read from. Fills importer.stats as process() does.
+    """
+    started = time.perf_counter()
+    profiler = PlacementProfiler(conn, portfolio_id)
+    if importer.file_format is not None:
+        _profile_columnar(importer, profiler, progress_cb)
+    else:
+        _profile_csv(importer, profiler, progress_cb)
+    profile = profiler.result()
+    elapsed = time.perf_counter() - started
+    importer.stats = {
+        "engine": "profile",
+        "rows": profiler.rows,
+        "rows_failed": profiler.rows_failed,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(profiler.rows / elapsed, 1) if elapsed > 0 else None,
+    }
+    profile["seconds"] = importer.stats["seconds"]
+    if progress_cb:
+        progress_cb(profiler.rows)
+    return profile
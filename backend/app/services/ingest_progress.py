@@ -0,0 +1,226 @@
+"""
+Live ingest progress.
+
+IngestProgressReporter is the progress_cb handed to CSVImporter.process. It
+merges calls into at most one ingest_jobs UPDATE per INGEST_PROGRESS_INTERVAL
+seconds, written on the job's own connection between batches (a pooled side
+connection only when that one is busy), and tracks rows/sec and an ETA from
+bytes consumed.
+
+Each write also sends pg_notify('ingest_progress', ...). ProgressBroker holds
+one LISTEN connection per process and fans notifications out to the
+server-sent-events streams in app.routers.ingest, so the UI does not poll.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Set
+
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+INGEST_PROGRESS_INTERVAL = float(os.getenv("INGEST_PROGRESS_INTERVAL", "2"))
+INGEST_PROGRESS_CHANNEL = "ingest_progress"
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+_PROGRESS_SQL = f"""
+    WITH updated AS (
+        UPDATE ingest_jobs
+        SET rows_processed = %s, bytes_processed = %s, rows_per_second = %s,
+            eta_seconds = %s, progress_updated_at = %s
+        WHERE id = %s
+        RETURNING id, status, rows_failed
+    )
+    SELECT pg_notify('{INGEST_PROGRESS_CHANNEL}', json_build_object(
+        'id', id, 'status', status, 'rows_failed', rows_failed,
+        'rows_processed', %s::bigint, 'bytes_processed', %s::bigint,
+        'rows_per_second', %s::numeric, 'eta_seconds', %s::integer
+    )::text)
+    FROM updated
+"""
+
+
+class IngestProgressReporter:
+    """
+    Callable progress_cb: reporter(rows). Attach the importer with bind() so
+    writes reuse its connection and read its committed byte position.
+    """
+
+    def __init__(self, job_id: str, total_bytes: Optional[int] = None,
+                 position_fn: Optional[Callable[[], Optional[int]]] = None,
+                 interval: float = INGEST_PROGRESS_INTERVAL, clock: Callable[[], float] = time.monotonic,
+                 start_rows: int = 0, start_bytes: int = 0):
+        self.job_id = job_id
+        self.total_bytes = total_bytes
+        # Where a resumed job picked up; rate and ETA only count this run's work
+        self.start_rows = start_rows
+        self.start_bytes = start_bytes
+        self.position_fn = position_fn
+        self.interval = interval
+        self.clock = clock
+        self.importer = None
+        self.started = clock()
+        self.rows = start_rows
+        self.flushed_rows = None
+        self.last_flush = None
+        self.writes = 0
+
+    def bind(self, importer):
+        self.importer = importer
+        return self
+
+    def __call__(self, rows: int):
+        self.rows = rows
+        now = self.clock()
+        if self.last_flush is None or now - self.last_flush >= self.interval:
+            self.flush(now)
+
+    def position(self) -> Optional[int]:
+        # position_fn, when given, measures progress instead of the importer's
+        # offset (a compressed source counts stored bytes, not decompressed ones)
+        if self.position_fn is not None:
+            try:
+                return self.position_fn()
+            except (OSError, ValueError):
+                pass
+        return getattr(self.importer, "position", None)
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        now = self.clock() if now is None else now
+        elapsed = now - self.started
+        run_rows = self.rows - self.start_rows
+        rate = round(run_rows / elapsed, 1) if elapsed > 0 and run_rows else None
+        position = self.position()
+        eta = None
+        if position and self.total_bytes and elapsed > 0 and position > self.start_bytes:
+            remaining = max(self.total_bytes - position, 0)
+            eta = int(round(remaining * elapsed / (position - self.start_bytes)))
+        return {
+            "rows_processed": self.rows,
+            "bytes_processed": position,
+            "rows_per_second": rate,
+            "eta_seconds": eta,
+        }
+
+    def flush(self, now: Optional[float] = None):
+        """Write the current snapshot now, unless nothing changed since the last write."""
+        now = self.clock() if now is None else now
+        if self.flushed_rows == self.rows and self.last_flush is not None:
+            return
+        snap = self.snapshot(now)
+        values = (snap["rows_processed"], snap["bytes_processed"], snap["rows_per_second"], snap["eta_seconds"])
+        params = values + (datetime.now(timezone.utc), self.job_id) + values
+        try:
+            self._write(params)
+        except Exception as e:
+            # Progress is advisory; never fail the import over it
+            logger.warning("Ingest progress update failed", extra={"job_id": self.job_id, "error": str(e)})
+        self.last_flush = now
+        self.flushed_rows = self.rows
+        self.writes += 1
+
+    def _write(self, params: tuple):
+        conn = getattr(self.importer, "conn", None)
+        if conn is not None and conn.get_transaction_status() == extensions.TRANSACTION_STATUS_IDLE:
+            self._execute(conn, params)
+            return
+        from app.core.database import pooled_connection
+
+        with pooled_connection() as side:
+            self._execute(side, params)
+
+    @staticmethod
+    def _execute(conn, params: tuple):
+        cur = conn.cursor()
+        try:
+            cur.execute(_PROGRESS_SQL, params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def notify_status(cur, job_id: str, status: str):
+    """Queue a status-change notification on `cur`'s transaction (sent at commit)."""
+    cur.execute(
+        "SELECT pg_notify(%s, json_build_object('id', %s::text, 'status', %s::text)::text)",
+        (INGEST_PROGRESS_CHANNEL, job_id, status),
+    )
+
+
+class ProgressBroker:
+    """
+    Fans ingest_progress notifications out to per-job asyncio queues. The LISTEN
+    connection is opened on first subscribe and reopened after it drops.
+    """
+
+    def __init__(self, channel: str = INGEST_PROGRESS_CHANNEL):
+        self.channel = channel
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._conn = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._subscribers.setdefault(str(job_id), set()).add(queue)
+        try:
+            await self._ensure_listener()
+        except Exception as e:
+            # Streams fall back to periodic re-reads until the listener comes back
+            logger.warning("Ingest progress listener unavailable", extra={"error": str(e)})
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(str(job_id))
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[str(job_id)]
+
+    def publish(self, payload: dict):
+        for queue in list(self._subscribers.get(str(payload.get("id")), ())):
+            if queue.full():
+                # A slow reader only needs the latest state
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        try:
+            self.publish(json.loads(payload))
+        except ValueError:
+            logger.warning("Malformed ingest progress notification", extra={"payload": payload})
+
+    def _on_close(self, connection):
+        self._conn = None
+
+    async def _ensure_listener(self):
+        if self._conn is not None:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._conn is not None:
+                return
+            import asyncpg
+            from app.core.database import _async_connect_kwargs
+
+            # Dedicated connection: LISTEN state must not be reset by a pool release
+            conn = await asyncpg.connect(**_async_connect_kwargs())
+            conn.add_termination_listener(self._on_close)
+            await conn.add_listener(self.channel, self._on_notify)
+            self._conn = conn
+
+    async def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await conn.close()
+
+
+broker = ProgressBroker()
@@ -0,0 +1,175 @@
+"""
+Placement formats: compressed CSV (.csv.gz, .zst, .zip) and columnar files
+(Parquet, Arrow IPC), told apart by their leading bytes.
+
+The stored object is kept exactly as uploaded and decompressed as a stream
+while the import reads it; nothing expanded is written to disk. A zip may
+hold several CSVs, each imported as its own ingest job over the same object.
+
+Byte offsets (checkpoints, importer.position) count decompressed bytes, so a
+resume seeks forward through the decompressor. Progress for gzip/zstd is
+reported in stored (compressed) bytes against the object size; for a zip
+member, in decompressed bytes against the member's size. Columnar files are
+read with pyarrow (see app.services.ingest_columnar) and also report stored bytes.
+"""
+import gzip
+import io
+import posixpath
+import zipfile
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+GZIP = "gzip"
+ZIP = "zip"
+ZSTD = "zstd"
+COMPRESSIONS = (GZIP, ZIP, ZSTD)
+
+_MAGIC = (
+    (b"\x1f\x8b", GZIP),
+    (b"PK\x03\x04", ZIP),
+    (b"\x28\xb5\x2f\xfd", ZSTD),
+)
+
+PARQUET = "parquet"
+ARROW = "arrow"
+COLUMNAR_FORMATS = (PARQUET, ARROW)
+
+# Arrow IPC: "ARROW1" opens the file format, 0xFFFFFFFF the stream format
+_FORMAT_MAGIC = (
+    (b"PAR1", PARQUET),
+    (b"ARROW1", ARROW),
+    (b"\xff\xff\xff\xff", ARROW),
+)
+
+# Decompressed read-ahead for zstd; gzip and zip members buffer internally
+_ZSTD_BUFFER_BYTES = 1024 * 1024
+
+
+def sniff_compression(head: bytes) -> Optional[str]:
+    """
+    Compression of a placement from its first bytes; None for plain CSV. The
+    content decides, not the extension, so a mislabelled file still imports.
+    """
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """Columnar format of an uncompressed placement from its first bytes; None for CSV."""
+    for magic, file_format in _FORMAT_MAGIC:
+        if head.startswith(magic):
+            return file_format
+    return None
+
+
+class PlacementInfo(NamedTuple):
+    compression: Optional[str]
+    file_format: Optional[str]
+    members: List[Tuple[str, int]]  # zip only: (member, uncompressed size)
+
+
+def csv_members(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """CSV files in a zip, in archive order, skipping folders and macOS resource forks."""
+    members = []
+    for info in archive.infolist():
+        name = info.filename
+        base = posixpath.basename(name)
+        if info.is_dir() or name.startswith("__MACOSX/") or base.startswith("."):
+            continue
+        if base.lower().endswith(".csv"):
+            members.append(info)
+    return members
+
+
+def inspect_placement(store, key: str) -> PlacementInfo:
+    """
+    How a stored placement should be read. Only a zip lists members; reading its
+    central directory seeks to the end of the object rather than reading it through.
+    """
+    with store.open_read(key) as raw:
+        head = raw.read(6)
+        compression = sniff_compression(head)
+        if compression is None:
+            file_format = sniff_format(head)
+            if file_format is not None:
+                try:
+                    import pyarrow  # noqa: F401
+                except ImportError:
+                    raise ValueError(f"Importing {file_format} placements needs the 'pyarrow' package")
+            return PlacementInfo(None, file_format, [])
+        if compression != ZIP:
+            return PlacementInfo(compression, None, [])
+        raw.seek(0)
+        with zipfile.ZipFile(raw) as archive:
+            members = [(info.filename, info.file_size) for info in csv_members(archive)]
+    if not members:
+        raise ValueError("The zip archive contains no .csv files")
+    return PlacementInfo(compression, None, members)
+
+
+class _ForwardSeekReader(io.BufferedReader):
+    """
+    BufferedReader over a stream that cannot seek (a zstd decompressor):
+    seeking forward reads and discards up to the target, which is all a
+    resume needs. Seeking backwards is refused.
+    """
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        position = self.tell()
+        if whence == io.SEEK_CUR:
+            offset += position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("Compressed placements seek from the start or current position only")
+        if offset < position:
+            raise io.UnsupportedOperation("Compressed placements seek forward only")
+        remaining = offset - position
+        while remaining:
+            chunk = self.read(min(remaining, _ZSTD_BUFFER_BYTES))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        return self.tell()
+
+
+def _zstd_reader(raw):
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("Importing .zst placements needs the 'zstandard' package")
+    reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+    return _ForwardSeekReader(reader, buffer_size=_ZSTD_BUFFER_BYTES)
+
+
+@contextmanager
+def open_placement(store, key: str, compression: Optional[str] = None, member: Optional[str] = None,
+                   file_format: Optional[str] = None) -> Iterator[Tuple[object, int, Optional[Callable[[], int]]]]:
+    """
+    Yields (binary stream, total bytes, position_fn). position_fn reads how far
+    into the stored object reading has got, for progress; it is None when the
+    stream's own byte offsets measure progress against the total.
+    """
+    if compression not in (None,) + COMPRESSIONS:
+        raise ValueError(f"Unsupported placement compression '{compression}'")
+    total = store.size(key)
+    with store.open_read(key) as raw:
+        if compression is None:
+            # Columnar checkpoints count rows, so progress comes from the stored object
+            yield raw, total, raw.tell if file_format in COLUMNAR_FORMATS else None
+        elif compression == GZIP:
+            with gzip.GzipFile(fileobj=raw, mode="rb") as stream:
+                yield stream, total, raw.tell
+        elif compression == ZSTD:
+            with _zstd_reader(raw) as stream:
+                yield stream, total, raw.tell
+        else:
+            if member is None:
+                raise ValueError("A zip placement is imported one member at a time")
+            with zipfile.ZipFile(raw) as archive:
+                info = archive.getinfo(member)
+                with archive.open(info) as stream:
+                    yield stream, info.file_size, None
@@ -0,0 +1,217 @@
+"""
+Durable background jobs.
+
+Work that must outlive the request (ingest, campaign sends, scheduled payment
+runs) is written to the job_queue table and executed by `python -m app.worker`,
+so it neither competes with request handling nor disappears when Cloud Run
+scales a web instance down.
+
+Workers claim rows with FOR UPDATE SKIP LOCKED and hold them for a visibility
+timeout, extended by a heartbeat while the handler runs. A job whose worker
+dies becomes claimable again once its lease lapses; failures are retried with
+exponential backoff up to the task's max_attempts.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_VISIBILITY_TIMEOUT = float(os.getenv("JOB_QUEUE_VISIBILITY_TIMEOUT", "300"))
+JOB_QUEUE_RETRY_BASE = float(os.getenv("JOB_QUEUE_RETRY_BASE", "30"))
+JOB_QUEUE_RETRY_MAX = float(os.getenv("JOB_QUEUE_RETRY_MAX", "3600"))
+
+
+class Task(NamedTuple):
+    name: str
+    func: Callable
+    queue: str
+    priority: int
+    max_attempts: int
+
+
+class Job(NamedTuple):
+    id: int
+    task: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+
+_tasks: Dict[str, Task] = {}
+_current = threading.local()
+
+
+def task(name: str, queue: str = "default", priority: int = 0, max_attempts: int = 3):
+    """
+    Register func as the handler for `name`. The worker calls func(**payload).
+    Use max_attempts=1 for work that is not safe to repeat after a crash.
+    """
+    def register(func):
+        _tasks[name] = Task(name, func, queue, priority, max_attempts)
+        return func
+
+    return register
+
+
+def get_task(name: str) -> Task:
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise ValueError(f"Unknown job task '{name}'")
+
+
+def current_job() -> Optional[Job]:
+    """The job being run on this thread, if any (e.g. to detect a redelivery)."""
+    return getattr(_current, "job", None)
+
+
+def enqueue(cur, task_name: str, payload: Optional[dict] = None, priority: Optional[int] = None,
+            run_at: Optional[datetime] = None, dedupe_key: Optional[str] = None) -> Optional[int]:
+    """
+    Queue a job on `cur`'s transaction; the caller commits, so the job becomes
+    visible together with the rows it refers to. Returns the job id, or None
+    when dedupe_key matches an existing job.
+    """
+    spec = get_task(task_name)
+    cur.execute(
+        """
+        INSERT INTO job_queue (queue, task, payload, priority, max_attempts, run_at, dedupe_key)
+        VALUES (%s, %s, %s, %s, %s, COALESCE(%s, now()), %s)
+        ON CONFLICT (dedupe_key) DO NOTHING
+        RETURNING id
+        """,
+        (spec.queue, spec.name, json.dumps(payload or {}), spec.priority if priority is None else priority,
+         spec.max_attempts, run_at, dedupe_key)
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    return row["id"] if isinstance(row, dict) else row[0]
+
+
+_CLAIM_SQL = """
+    WITH next AS (
+        SELECT id FROM job_queue
+        WHERE queue = %s
+          AND run_at <= now()
+          AND (status = 'queued' OR (status = 'running' AND locked_until < now()))
+        ORDER BY priority DESC, run_at, id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE job_queue j
+    SET status = 'running', attempts = j.attempts + 1, locked_by = %s,
+        locked_until = now() + make_interval(secs => %s), started_at = now()
+    FROM next
+    WHERE j.id = next.id
+    RETURNING j.id, j.task, j.payload, j.attempts, j.max_attempts
+"""
+
+
+def claim(conn, queue: str, worker_id: str, visibility_timeout: float = JOB_QUEUE_VISIBILITY_TIMEOUT) -> Optional[Job]:
+    cur = conn.cursor()
+    try:
+        cur.execute(_CLAIM_SQL, (queue, worker_id, visibility_timeout))
+        row = cur.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    if not row:
+        return None
+    payload = row[2] if isinstance(row[2], dict) else json.loads(row[2] or "{}")
+    return Job(row[0], row[1], payload, row[3], row[4])
+
+
+def heartbeat(conn, worker_id: str, visibility_timeout: float = JOB_QUEUE_VISIBILITY_TIMEOUT) -> int:
+    """Extend the lease on every job this worker is running."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE job_queue SET locked_until = now() + make_interval(secs => %s)
+            WHERE locked_by = %s AND status = 'running'
+            """,
+            (visibility_timeout, worker_id)
+        )
+        conn.commit()
+        return cur.rowcount
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def retry_delay(attempts: int) -> float:
+    return min(JOB_QUEUE_RETRY_BASE * (2 ** max(attempts - 1, 0)), JOB_QUEUE_RETRY_MAX)
+
+
+def _finish(conn, job: Job, worker_id: str, error: Optional[str]):
+    cur = conn.cursor()
+    try:
+        if error is None:
+            cur.execute(
+                """
+                UPDATE job_queue
+                SET status = 'completed', finished_at = now(), locked_until = NULL, last_error = NULL
+                WHERE id = %s AND locked_by = %s
+                """,
+                (job.id, worker_id)
+            )
+        elif job.attempts < job.max_attempts:
+            cur.execute(
+                """
+                UPDATE job_queue
+                SET status = 'queued', run_at = now() + make_interval(secs => %s),
+                    locked_until = NULL, locked_by = NULL, last_error = %s
+                WHERE id = %s AND locked_by = %s
+                """,
+                (retry_delay(job.attempts), error, job.id, worker_id)
+            )
+        else:
+            cur.execute(
+                """
+                UPDATE job_queue
+                SET status = 'failed', finished_at = now(), locked_until = NULL, last_error = %s
+                WHERE id = %s AND locked_by = %s
+                """,
+                (error, job.id, worker_id)
+            )
+        if cur.rowcount != 1:
+            # The lease lapsed and another worker reclaimed the job; its outcome wins
+            logger.warning("Job lease lost before completion", extra={"job_id": job.id, "task": job.task})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def run_job(job: Job, worker_id: str):
+    """Run one claimed job and record the outcome on a pooled connection."""
+    from app.core.database import pooled_connection
+
+    error = None
+    if job.attempts > job.max_attempts:
+        # Reclaimed after its worker died on the final attempt
+        error = "Lease expired on the final attempt"
+    else:
+        _current.job = job
+        try:
+            get_task(job.task).func(**job.payload)
+        except Exception as e:
+            logger.exception("Job failed", extra={"job_id": job.id, "task": job.task, "attempt": job.attempts})
+            error = f"{e.__class__.__name__}: {e}"
+        finally:
+            _current.job = None
+
+    with pooled_connection() as conn:
+        _finish(conn, job, worker_id, error)
@@ -0,0 +1,159 @@
+"""
+Object storage for uploaded placement files.
+
+INGEST_STORE=gcs writes to a Cloud Storage bucket (INGEST_BUCKET, by default
+the letters bucket); INGEST_STORE=local keeps objects under
+INGEST_LOCAL_STORE_DIR and stands in for the bucket in development.
+
+Uploads are streamed: chunks are read from the request asynchronously, hashed
+(sha256) on the way through and written to the store from a worker thread, so
+neither the event loop nor instance memory holds the whole file.
+"""
+import hashlib
+import logging
+import os
+import uuid
+from typing import AsyncIterator, BinaryIO, NamedTuple, Optional
+
+from anyio import CancelScope, to_thread
+
+logger = logging.getLogger(__name__)
+
+INGEST_STORE = os.getenv("INGEST_STORE", "local").lower()
+INGEST_BUCKET = os.getenv("INGEST_BUCKET", "collectsecure-letters-bucket")
+INGEST_OBJECT_PREFIX = os.getenv("INGEST_OBJECT_PREFIX", "placements/")
+INGEST_LOCAL_STORE_DIR = os.getenv("INGEST_LOCAL_STORE_DIR", os.path.join(os.getcwd(), "backend", "uploads"))
+INGEST_UPLOAD_CHUNK_BYTES = int(os.getenv("INGEST_UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    sha256: str
+
+
+class LocalObjectStore:
+    """Filesystem stand-in for the bucket; keys map to paths under `root`."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> Optional[str]:
+        path = os.path.realpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.realpath(self.root) + os.sep):
+            raise ValueError(f"Object key escapes the store: {key!r}")
+        return path
+
+    def uri(self, key: str) -> str:
+        return self.local_path(key)
+
+    def open_write(self, key: str) -> BinaryIO:
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, "wb")
+
+    def open_read(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), "rb")
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.local_path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+
+class GCSObjectStore:
+    """Cloud Storage bucket; reads and writes go through resumable, chunked blob streams."""
+
+    def __init__(self, bucket: str, chunk_size: int = INGEST_UPLOAD_CHUNK_BYTES):
+        # Imported lazily: the storage client is heavy and only needed once a file is stored
+        from google.cloud import storage
+
+        self.bucket_name = bucket
+        self.bucket = storage.Client().bucket(bucket)
+        # Blob streams require a multiple of 256 KB
+        self.chunk_size = max(1, chunk_size // (256 * 1024)) * 256 * 1024
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def uri(self, key: str) -> str:
+        return f"gs://{self.bucket_name}/{key}"
+
+    def open_write(self, key: str) -> BinaryIO:
+        return self.bucket.blob(key).open("wb", chunk_size=self.chunk_size, content_type="text/csv")
+
+    def open_read(self, key: str) -> BinaryIO:
+        return self.bucket.blob(key).open("rb", chunk_size=self.chunk_size)
+
+    def size(self, key: str) -> int:
+        blob = self.bucket.get_blob(key)
+        if blob is None:
+            raise FileNotFoundError(self.uri(key))
+        return blob.size
+
+    def delete(self, key: str):
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self.bucket.blob(key).delete()
+        except NotFound:
+            pass
+
+
+_store = None
+
+
+def get_object_store():
+    """The configured store, created on first use rather than at import."""
+    global _store
+    if _store is None:
+        if INGEST_STORE == "gcs":
+            _store = GCSObjectStore(INGEST_BUCKET)
+        elif INGEST_STORE == "local":
+            _store = LocalObjectStore(INGEST_LOCAL_STORE_DIR)
+        else:
+            raise ValueError(f"Unknown INGEST_STORE {INGEST_STORE!r}; expected 'local' or 'gcs'")
+    return _store
+
+
+def new_object_key(filename: Optional[str]) -> str:
+    base, ext = os.path.splitext(os.path.basename(filename or "upload.csv"))
+    return f"{INGEST_OBJECT_PREFIX}{base or 'upload'}_{uuid.uuid4().hex}{ext or '.csv'}"
+
+
+async def iter_upload(upload, chunk_bytes: int = INGEST_UPLOAD_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    """Chunks of an UploadFile (or anything with an async read(size))."""
+    while True:
+        chunk = await upload.read(chunk_bytes)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def save_stream(store, key: str, chunks: AsyncIterator[bytes]) -> StoredObject:
+    """
+    Write `chunks` to `key`, hashing as they pass. Blocking writes run in a worker
+    thread; on any failure the partial object is removed.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    writer = await to_thread.run_sync(store.open_write, key)
+    try:
+        async for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            await to_thread.run_sync(writer.write, chunk)
+        await to_thread.run_sync(writer.close)
+    except BaseException:
+        # Shielded so a cancelled (disconnected) upload still cleans up
+        with CancelScope(shield=True):
+            try:
+                await to_thread.run_sync(writer.close)
+            finally:
+                await to_thread.run_sync(store.delete, key)
+        raise
+    return StoredObject(key=key, size=size, sha256=digest.hexdigest())
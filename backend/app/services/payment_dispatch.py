@@ -0,0 +1,76 @@
+"""
+Concurrent gateway dispatch for payment runs.
+
+Gateway charges are slow blocking HTTP calls while the ledger writes around
+them are quick, so a run hands the calls to a bounded thread pool and keeps
+every database write on its own thread. dispatch_ordered() runs calls
+`concurrency` at a time, spaced by a RateLimiter, and yields each result back
+to the caller as it finishes. Calls that share a key (a debt) never overlap:
+the next one starts only after the caller has taken the previous result, so
+per-debt ledger writes land in order.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Hashable, Iterable, Iterator, Optional, Tuple
+
+
+class RateLimiter:
+    """
+    Spaces acquire() calls at least 1/rate seconds apart across threads.
+    rate <= 0 disables the cap.
+    """
+
+    def __init__(self, rate: float, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            self._sleep(slot - now)
+
+
+def dispatch_ordered(items: Iterable[Any], key: Callable[[Any], Hashable], call: Callable[[Any], Any],
+                     concurrency: int, limiter: Optional[RateLimiter] = None) -> Iterator[Tuple[Any, Any]]:
+    """
+    Run call(item) for every item on up to `concurrency` threads, yielding
+    (item, result) on the calling thread as calls finish. Items with the same
+    key(item) run one after another, in the order given. An exception from
+    call() is raised from the generator once the calls in flight finish;
+    items not yet started are dropped.
+    """
+    queues: "OrderedDict[Hashable, deque]" = OrderedDict()
+    for item in items:
+        queues.setdefault(key(item), deque()).append(item)
+    ready = deque(queues)
+
+    def run(item):
+        if limiter is not None:
+            limiter.acquire()
+        return call(item)
+
+    concurrency = max(1, concurrency)
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gateway") as pool:
+        while ready or in_flight:
+            while ready and len(in_flight) < concurrency:
+                item_key = ready.popleft()
+                item = queues[item_key].popleft()
+                in_flight[pool.submit(run, item)] = (item_key, item)
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item_key, item = in_flight.pop(future)
+                yield item, future.result()
+                # Only now, with the result handled, may the key's next item start
+                if queues[item_key]:
+                    ready.append(item_key)
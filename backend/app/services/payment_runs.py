@@ -0,0 +1,115 @@
+"""
+Per-run accounting for scheduled payment runs.
+
+PaymentRunStats collects one run's outcomes and gateway latencies; the run
+is written to payment_runs when it starts and updated when it stops, so a
+run that is still draining (or died) is visible too. next_claim_size() sizes
+the next slice from the latency observed so far.
+"""
+import math
+from datetime import datetime, timezone
+from typing import List, Optional
+
+# Why a run stopped
+STOP_DRAINED = "drained"
+STOP_TIME_BUDGET = "time_budget"
+STOP_BATCH_LIMIT = "batch_limit"
+STOP_FAILED = "failed"
+
+
+def percentile(ordered: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+
+def next_claim_size(latency: Optional[float], remaining: float, current: int, concurrency: int,
+                    rate_limit: float, slice_seconds: float, max_size: int) -> int:
+    """
+    Installments to claim so that a slice takes about slice_seconds (or what
+    is left of the time budget), given the median gateway latency of the
+    last slice. Without a measurement yet, keep `current`.
+    """
+    if latency is None:
+        return current
+    per_second = max(concurrency, 1) / max(latency, 0.001)
+    if rate_limit > 0:
+        per_second = min(per_second, rate_limit)
+    return max(1, min(max_size, int(per_second * min(slice_seconds, remaining))))
+
+
+class PaymentRunStats:
+    def __init__(self):
+        self.counts = {"paid": 0, "retried": 0, "declined": 0}
+        self.errors = 0
+        self.recovered = 0
+        self.claimed = 0
+        self.slices = 0
+        self.latencies: List[float] = []
+
+    def summary(self, seconds: float) -> dict:
+        ordered = sorted(self.latencies)
+        p50 = percentile(ordered, 0.5)
+        p99 = percentile(ordered, 0.99)
+        charged = sum(self.counts.values())
+        return {
+            "claimed": self.claimed,
+            "approved": self.counts["paid"],
+            "declined": self.counts["declined"],
+            "retried": self.counts["retried"],
+            "errors": self.errors,
+            "recovered": self.recovered,
+            "slices": self.slices,
+            "seconds": round(seconds, 3),
+            "charges_per_second": round(charged / seconds, 2) if seconds > 0 else None,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        }
+
+
+def start_run(conn, run_window: str, runner_id: str, started_at: datetime) -> int:
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            INSERT INTO payment_runs (run_window, runner_id, started_at)
+            VALUES (%s, %s, %s)
+            RETURNING id
+            """,
+            (run_window, runner_id, started_at)
+        )
+        row = cur.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return row["id"] if isinstance(row, dict) else row[0]
+
+
+def finish_run(conn, run_id: int, stop_reason: str, summary: dict):
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE payment_runs
+            SET finished_at = %s, stop_reason = %s,
+                claimed = %s, approved = %s, declined = %s, retried = %s, errors = %s, recovered = %s,
+                slices = %s, charges_per_second = %s, latency_p50_ms = %s, latency_p99_ms = %s
+            WHERE id = %s
+            """,
+            (
+                datetime.now(timezone.utc), stop_reason,
+                summary["claimed"], summary["approved"], summary["declined"], summary["retried"],
+                summary["errors"], summary["recovered"], summary["slices"], summary["charges_per_second"],
+                summary["latency_p50_ms"], summary["latency_p99_ms"], run_id,
+            )
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
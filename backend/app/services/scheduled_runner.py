@@ -1,16 +1,89 @@
+"""
+Scheduled installment runs.
+
+Installments move through a claim/lease state machine on scheduled_payments:
+
+    pending / retrying --claim--> processing --record--> paid / retrying / declined
+                                       |
+                                       +--lease expires--> unverified
+
+A runner claims a small slice of due rows in one short transaction (status
+'processing', locked_by, locked_until), commits, charges them through the
+gateway, and records each result in its own transaction. Nothing stays
+locked across gateway calls, so several runners can drain the queue side by
+side; /payments/scheduled/{id}/execute refuses 'processing' rows.
+
+The lease covers the slice's worst case (every charge waiting out both
+gateway timeouts) and a heartbeat renews it while the slice runs, as the job
+queue does for jobs. Each row's lease is checked again just before its
+charge is sent, and a row no longer held is skipped. A slice that fails
+before sending some charges hands those rows back to pending/retrying.
+
+A run drains: it keeps claiming slices until nothing is due or its batch
+limit or time budget is reached, and records its throughput and gateway
+latency in payment_runs (see app.services.payment_runs).
+
+A row whose lease expires was claimed by a runner that died before recording
+it; the gateway may or may not have charged the card. Recovery moves such
+rows to 'unverified' instead of charging them again. A charge that got no
+answer from the gateway (read timeout, dropped connection) goes to
+'unverified' straight away for the same reason. They are listed with
+the other payments and can be run by hand once checked against the gateway.
+"""
 from __future__ import annotations
 
+import logging
+import math
+import os
+import threading
+import socket
+import uuid
 from datetime import datetime, time, timedelta, timezone
+from time import monotonic, perf_counter
 from zoneinfo import ZoneInfo
 
 from psycopg2.extras import RealDictCursor
 
-from app.core.database import get_db_connection
+from app.core.database import get_pool
+from app.core.sql_metrics import route_label
+from app.services import job_queue
 from app.services.decline import classify_decline
+from app.services.payment_dispatch import RateLimiter, dispatch_ordered
+from app.services.payment_runs import (
+    STOP_BATCH_LIMIT, STOP_DRAINED, STOP_FAILED, STOP_TIME_BUDGET, PaymentRunStats, finish_run, next_claim_size,
+    percentile, start_run,
+)
 from app.services.transactions import TransactionManager
+from app.services.usa_epay import USA_EPAY_CONNECT_TIMEOUT, USA_EPAY_READ_TIMEOUT
 
+logger = logging.getLogger(__name__)
 
 CT_TZ = ZoneInfo("America/Chicago")
+# Run windows (CT hour) for scheduled payments; queued by the worker's scheduler
+PAYMENT_RUN_WINDOWS = {"am": 5, "pm": 17}
+# Runs queued per window; each claims its own slices, so they drain the queue together
+PAYMENT_RUN_RUNNERS = int(os.getenv("PAYMENT_RUN_RUNNERS", "1"))
+# A run drains due installments until none are left, this many have been
+# claimed (0 = no limit) or its time budget (seconds) runs out
+PAYMENT_RUN_BATCH_LIMIT = int(os.getenv("PAYMENT_RUN_BATCH_LIMIT", "0"))
+PAYMENT_RUN_TIME_BUDGET = float(os.getenv("PAYMENT_RUN_TIME_BUDGET", "3000"))
+# Installments in the first claimed slice; later slices are sized to take about
+# PAYMENT_RUN_SLICE_SECONDS at the observed gateway latency, up to PAYMENT_RUN_CLAIM_MAX
+PAYMENT_RUN_CLAIM_SIZE = int(os.getenv("PAYMENT_RUN_CLAIM_SIZE", "50"))
+PAYMENT_RUN_CLAIM_MAX = int(os.getenv("PAYMENT_RUN_CLAIM_MAX", "500"))
+PAYMENT_RUN_SLICE_SECONDS = float(os.getenv("PAYMENT_RUN_SLICE_SECONDS", "15"))
+# Seconds added to a slice's worst-case gateway time for its reads and ledger writes;
+# the slice's lease is that long and is renewed while the slice runs
+PAYMENT_LEASE_MARGIN_SECONDS = float(os.getenv("PAYMENT_LEASE_MARGIN_SECONDS", "60"))
+# Gateway calls in flight at once, and started per second (0 = no cap)
+PAYMENT_RUN_CONCURRENCY = int(os.getenv("PAYMENT_RUN_CONCURRENCY", "8"))
+PAYMENT_RUN_RATE_LIMIT = float(os.getenv("PAYMENT_RUN_RATE_LIMIT", "20"))
+
+LEASE_EXPIRED_ERROR = "Lease expired before the charge result was recorded; check the gateway before running it again"
+OUTCOME_UNKNOWN_ERROR = "No answer from the gateway ({}); check the gateway before running it again"
+LATE_RESULT_ERROR = "Charge finished after the lease lapsed: {outcome} (payment {payment_id}); check the gateway before running it again"
+# charge() result for a row whose lease was gone before its charge was sent
+_LEASE_LOST = {"status": "lease_lost"}
 
 
 def _due_at_ct(due_date, hour: int) -> datetime:
@@ -25,172 +98,505 @@ def _next_attempt_timestamp(due_date, attempt_count: int) -> datetime | None:
     return None
 
 
-def run_due_scheduled_payments(run_window: str, batch_limit: int = 200) -> dict:
-    now_utc = datetime.now(timezone.utc)
-    now_ct = now_utc.astimezone(CT_TZ)
+def enqueue_due_payment_runs(cur, now: datetime | None = None, runners: int | None = None) -> list:
+    """
+    Queue today's payment runs whose window has opened, `runners` per window
+    (PAYMENT_RUN_RUNNERS). The dedupe keys make this safe to call every minute
+    from any number of workers: each window is queued once per day.
+    """
+    now_ct = (now or datetime.now(timezone.utc)).astimezone(CT_TZ)
+    runners = max(1, runners or PAYMENT_RUN_RUNNERS)
+    queued = []
+    for window, hour in PAYMENT_RUN_WINDOWS.items():
+        if now_ct.hour < hour:
+            continue
+        key = f"scheduled_payments:{now_ct.date().isoformat()}:{window}"
+        added = False
+        for n in range(runners):
+            dedupe_key = key if n == 0 else f"{key}:{n}"
+            if job_queue.enqueue(cur, "scheduled_payments", {"run_window": window}, dedupe_key=dedupe_key) is not None:
+                added = True
+        if added:
+            queued.append(window)
+    return queued
 
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    processed = 0
-    declined = 0
-    retried = 0
+_CLAIM_SQL = """
+    WITH due AS (
+        SELECT sp.id, sp.status AS claimed_from
+        FROM scheduled_payments sp
+        JOIN payment_plans pp ON sp.plan_id = pp.id
+        WHERE pp.status = 'active'
+          AND sp.status IN ('pending', 'retrying')
+          AND sp.next_attempt_at IS NOT NULL
+          AND sp.next_attempt_at <= %(now)s
+          AND sp.created_at < (sp.due_date::timestamp AT TIME ZONE 'America/Chicago')
+        ORDER BY sp.next_attempt_at ASC
+        LIMIT %(limit)s
+        FOR UPDATE OF sp SKIP LOCKED
+    )
+    UPDATE scheduled_payments sp
+    SET status = 'processing',
+        locked_by = %(runner)s,
+        locked_until = now() + make_interval(secs => %(lease)s),
+        last_attempt_at = %(now)s,
+        attempt_count = COALESCE(sp.attempt_count, 0) + 1
+    FROM due, payment_plans pp
+    WHERE sp.id = due.id AND pp.id = sp.plan_id
+    RETURNING sp.id, sp.plan_id, sp.amount, sp.due_date, sp.attempt_count, sp.next_attempt_at,
+              due.claimed_from, pp.debt_id, pp.card_token
+"""
+
+
+def slice_lease_seconds(size: int, concurrency: int, rate_limit: float) -> float:
+    """
+    Lease for a slice of `size` charges: ceil(size / concurrency) rounds of
+    the gateway's connect + read timeouts, the rate limiter's spacing, and
+    PAYMENT_LEASE_MARGIN_SECONDS.
+    """
+    rounds = math.ceil(size / max(concurrency, 1))
+    seconds = rounds * (USA_EPAY_CONNECT_TIMEOUT + USA_EPAY_READ_TIMEOUT)
+    if rate_limit > 0:
+        seconds += size / rate_limit
+    return seconds + PAYMENT_LEASE_MARGIN_SECONDS
+
 
+def claim_due_payments(conn, runner_id: str, now: datetime, limit: int, lease_seconds: float) -> list:
+    """Lease up to `limit` due installments to runner_id and commit; oldest due first."""
+    cur = conn.cursor(cursor_factory=RealDictCursor)
     try:
-        cursor.execute(
+        cur.execute(_CLAIM_SQL, {"now": now, "limit": limit, "runner": runner_id, "lease": lease_seconds})
+        rows = cur.fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return sorted(rows, key=lambda row: (row["next_attempt_at"], row["id"]))
+
+
+def recover_expired_leases(conn) -> list:
+    """Move 'processing' rows whose lease lapsed to 'unverified'; returns their ids."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
             """
-            SELECT 
-                sp.id, sp.plan_id, sp.amount, sp.due_date, sp.status,
-                sp.attempt_count, sp.next_attempt_at, sp.created_at,
-                pp.debt_id, pp.card_token
-            FROM scheduled_payments sp
-            JOIN payment_plans pp ON sp.plan_id = pp.id
-            WHERE pp.status = 'active'
-              AND sp.status IN ('pending', 'retrying')
-              AND sp.next_attempt_at IS NOT NULL
-              AND sp.next_attempt_at <= %s
-              AND sp.created_at < (sp.due_date::timestamp AT TIME ZONE 'America/Chicago')
-            ORDER BY sp.next_attempt_at ASC
-            LIMIT %s
-            FOR UPDATE SKIP LOCKED
+            UPDATE scheduled_payments
+            SET status = 'unverified', locked_until = NULL, last_error = %s
+            WHERE status = 'processing' AND locked_until < now()
+            RETURNING id
             """,
-            (now_utc, batch_limit)
+            (LEASE_EXPIRED_ERROR,)
         )
-        rows = cursor.fetchall()
+        ids = [row[0] for row in cur.fetchall()]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    if ids:
+        logger.warning("Scheduled payments abandoned mid-charge", extra={"scheduled_payment_ids": ids})
+    return ids
 
-        for row in rows:
-            attempt_count = (row.get("attempt_count") or 0) + 1
 
-            cursor.execute(
+def renew_leases(conn, runner_id: str, lease_seconds: float) -> int:
+    """Extend the lease on every installment this runner still holds; a lapsed lease stays lapsed."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE scheduled_payments SET locked_until = now() + make_interval(secs => %s)
+            WHERE locked_by = %s AND status = 'processing' AND locked_until > now()
+            """,
+            (lease_seconds, runner_id)
+        )
+        conn.commit()
+        return cur.rowcount
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def lease_held(conn, payment_id: int, runner_id: str) -> bool:
+    """Whether runner_id still holds a live lease on the installment."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT 1 FROM scheduled_payments
+            WHERE id = %s AND locked_by = %s AND status = 'processing' AND locked_until > now()
+            """,
+            (payment_id, runner_id)
+        )
+        held = cur.fetchone() is not None
+        conn.commit()
+        return held
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def release_unsent(conn, runner_id: str, rows: list) -> int:
+    """
+    Hand claimed rows whose charge was never sent back to the status they
+    were claimed from, undoing the claim's attempt; returns how many.
+    """
+    released = 0
+    cur = conn.cursor()
+    try:
+        for row in rows:
+            cur.execute(
                 """
                 UPDATE scheduled_payments
-                SET status = 'processing',
-                    last_attempt_at = %s,
-                    attempt_count = %s
-                WHERE id = %s
+                SET status = %s, locked_by = NULL, locked_until = NULL,
+                    attempt_count = GREATEST(COALESCE(attempt_count, 1) - 1, 0)
+                WHERE id = %s AND locked_by = %s AND status = 'processing'
                 """,
-                (now_utc, attempt_count, row["id"])
+                (row["claimed_from"], row["id"], runner_id)
+            )
+            released += cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return released
+
+
+class SliceLeases:
+    """
+    Keeps one slice's leases alive while its charges run: a heartbeat thread
+    renews them every third of the lease, and held() re-checks a row just
+    before its charge is sent. Both use a pooled connection of their own,
+    serialized by a lock, since held() is called from the gateway threads.
+    """
+
+    def __init__(self, pool, runner_id: str, lease_seconds: float):
+        self.pool = pool
+        self.runner_id = runner_id
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._conn = None
+        self._thread = None
+
+    def __enter__(self):
+        self._conn = self.pool.getconn()
+        self._thread = threading.Thread(target=self._heartbeat, name="payment-lease-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopping.set()
+        self._thread.join()
+        self.pool.putconn(self._conn)
+        return False
+
+    def held(self, payment_id: int) -> bool:
+        with self._lock:
+            return lease_held(self._conn, payment_id, self.runner_id)
+
+    def _heartbeat(self):
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                with self._lock:
+                    renew_leases(self._conn, self.runner_id, self.lease_seconds)
+            except Exception:
+                logger.exception("Scheduled payment lease renewal failed", extra={"runner_id": self.runner_id})
+
+
+# Only the live lease holder records a result; recovery may have parked the row as 'unverified'
+_RECORD_WHERE = "WHERE id = %s AND locked_by = %s AND status = 'processing'"
+
+
+def record_result(cursor, row: dict, runner_id: str, result: dict, now_utc: datetime) -> str:
+    """
+    Set the scheduled payment's outcome from a TransactionManager result.
+    Returns 'paid', 'retried' or 'declined'; the caller commits.
+    """
+    attempt_count = row["attempt_count"]
+    if result.get("status") == "paid":
+        cursor.execute(
+            f"""
+            UPDATE scheduled_payments
+            SET status = 'paid',
+                actual_payment_id = %s,
+                processed_at = %s,
+                transaction_reference = %s,
+                payment_method = %s,
+                last_gateway_trankey = %s,
+                last_result_code = %s,
+                last_result = %s,
+                last_decline_reason = NULL,
+                last_error = NULL,
+                next_attempt_at = NULL,
+                locked_until = NULL
+            {_RECORD_WHERE}
+            """,
+            (
+                result.get("payment_id"),
+                now_utc,
+                result.get("ref_num"),
+                result.get("payment_method"),
+                result.get("gateway_key"),
+                result.get("result_code"),
+                result.get("result"),
+                row["id"],
+                runner_id,
             )
+        )
+        outcome = "paid"
+    else:
+        result_text = result.get("result") or result.get("error") or ""
+        decline_reason = result.get("decline_reason") or classify_decline(result_text)
+        retry_at_ct = None
+
+        if decline_reason == "insufficient_funds":
+            retry_at_ct = _next_attempt_timestamp(row["due_date"], attempt_count)
 
-            manager = TransactionManager(cursor)
-            result = manager.execute_payment(
-                debt_id=row["debt_id"],
-                amount=row["amount"],
-                card_token=row["card_token"],
-                scheduled_payment_id=row["id"],
-                attempt_count=attempt_count,
-                update_scheduled=False,
-                raise_on_decline=False
+        if retry_at_ct:
+            status, next_attempt_at, outcome = "retrying", retry_at_ct.astimezone(timezone.utc), "retried"
+        else:
+            status, next_attempt_at, outcome = "declined", None, "declined"
+        cursor.execute(
+            f"""
+            UPDATE scheduled_payments
+            SET status = %s,
+                processed_at = %s,
+                transaction_reference = %s,
+                payment_method = %s,
+                last_gateway_trankey = %s,
+                last_result_code = %s,
+                last_result = %s,
+                last_decline_reason = %s,
+                last_error = %s,
+                next_attempt_at = %s,
+                locked_until = NULL
+            {_RECORD_WHERE}
+            """,
+            (
+                status,
+                now_utc,
+                result.get("ref_num"),
+                result.get("payment_method"),
+                result.get("gateway_key"),
+                result.get("result_code"),
+                result.get("result"),
+                decline_reason,
+                result.get("error"),
+                next_attempt_at,
+                row["id"],
+                runner_id,
             )
+        )
+    if cursor.rowcount != 1:
+        # The lease lapsed mid-charge and recovery parked the row as 'unverified'. It stays that
+        # way for an operator to check, but says what the charge did; the payment row still stands
+        cursor.execute(
+            """
+            UPDATE scheduled_payments SET last_error = %s
+            WHERE id = %s AND locked_by = %s AND status = 'unverified'
+            """,
+            (LATE_RESULT_ERROR.format(outcome=outcome, payment_id=result.get("payment_id")), row["id"], runner_id)
+        )
+        logger.error(
+            "Scheduled payment left the lease before its result was recorded",
+            extra={"scheduled_payment_id": row["id"], "payment_id": result.get("payment_id")},
+        )
+    return outcome
 
-            if result.get("status") == "paid":
-                cursor.execute(
-                    """
-                    UPDATE scheduled_payments
-                    SET status = 'paid',
-                        actual_payment_id = %s,
-                        processed_at = %s,
-                        transaction_reference = %s,
-                        payment_method = %s,
-                        last_gateway_trankey = %s,
-                        last_result_code = %s,
-                        last_result = %s,
-                        last_decline_reason = NULL,
-                        last_error = NULL,
-                        next_attempt_at = NULL
-                    WHERE id = %s
-                    """,
-                    (
-                        result.get("payment_id"),
-                        now_utc,
-                        result.get("ref_num"),
-                        result.get("payment_method"),
-                        result.get("gateway_key"),
-                        result.get("result_code"),
-                        result.get("result"),
-                        row["id"],
-                    )
-                )
-                processed += 1
-                continue
-
-            result_text = result.get("result") or result.get("error") or ""
-            decline_reason = result.get("decline_reason") or classify_decline(result_text)
-            retry_at_ct = None
-
-            if decline_reason == "insufficient_funds":
-                retry_at_ct = _next_attempt_timestamp(row["due_date"], attempt_count)
-
-            if retry_at_ct:
-                retry_at_utc = retry_at_ct.astimezone(timezone.utc)
-                cursor.execute(
-                    """
-                    UPDATE scheduled_payments
-                    SET status = 'retrying',
-                        processed_at = %s,
-                        transaction_reference = %s,
-                        payment_method = %s,
-                        last_gateway_trankey = %s,
-                        last_result_code = %s,
-                        last_result = %s,
-                        last_decline_reason = %s,
-                        last_error = %s,
-                        next_attempt_at = %s
-                    WHERE id = %s
-                    """,
-                    (
-                        now_utc,
-                        result.get("ref_num"),
-                        result.get("payment_method"),
-                        result.get("gateway_key"),
-                        result.get("result_code"),
-                        result.get("result"),
-                        decline_reason,
-                        result.get("error"),
-                        retry_at_utc,
-                        row["id"],
-                    )
-                )
-                retried += 1
-            else:
-                cursor.execute(
-                    """
-                    UPDATE scheduled_payments
-                    SET status = 'declined',
-                        processed_at = %s,
-                        transaction_reference = %s,
-                        payment_method = %s,
-                        last_gateway_trankey = %s,
-                        last_result_code = %s,
-                        last_result = %s,
-                        last_decline_reason = %s,
-                        last_error = %s,
-                        next_attempt_at = NULL
-                    WHERE id = %s
-                    """,
-                    (
-                        now_utc,
-                        result.get("ref_num"),
-                        result.get("payment_method"),
-                        result.get("gateway_key"),
-                        result.get("result_code"),
-                        result.get("result"),
-                        decline_reason,
-                        result.get("error"),
-                        row["id"],
-                    )
-                )
-                declined += 1
 
+def mark_unverified(cursor, row: dict, runner_id: str | None, error: Exception, now_utc: datetime):
+    """
+    A charge got no answer: park the row as 'unverified' for a manual check;
+    the caller commits. runner_id None is a charge run by hand, with no lease.
+    """
+    where, params = (_RECORD_WHERE, (row["id"], runner_id)) if runner_id else ("WHERE id = %s", (row["id"],))
+    cursor.execute(
+        f"""
+        UPDATE scheduled_payments
+        SET status = 'unverified', processed_at = %s, last_error = %s, locked_until = NULL
+        {where}
+        """,
+        (now_utc, OUTCOME_UNKNOWN_ERROR.format(error)) + params
+    )
+
+
+def _record_outcome(conn, cursor, manager, stats: PaymentRunStats, row: dict, runner_id: str, outcome):
+    """Record one dispatched charge in its own transaction and count it in `stats`."""
+    if outcome is _LEASE_LOST:
+        # Recovered as 'unverified' (or run by hand) before the charge was sent; nothing was charged
+        stats.errors += 1
+        logger.warning("Scheduled payment skipped: lease lost before its charge",
+                       extra={"scheduled_payment_id": row["id"], "runner_id": runner_id})
+        return
+    if outcome is not None and outcome["status"] == "unknown":
+        stats.errors += 1
+        logger.error(
+            "Scheduled payment charge outcome unknown",
+            extra={"scheduled_payment_id": row["id"], "error": str(outcome["exception"])},
+        )
+        try:
+            mark_unverified(cursor, row, runner_id, outcome["exception"], datetime.now(timezone.utc))
+            conn.commit()
+        except Exception:
+            # Left to lapse into 'unverified' with its lease
+            conn.rollback()
+            logger.exception("Marking a scheduled payment unverified failed",
+                             extra={"scheduled_payment_id": row["id"]})
+        return
+    try:
+        result = manager.record_payment(
+            row["debt_id"],
+            row["amount"],
+            outcome,
+            scheduled_payment_id=row["id"],
+            update_scheduled=False,
+            raise_on_decline=False
+        )
+        stats.counts[record_result(cursor, row, runner_id, result, datetime.now(timezone.utc))] += 1
         conn.commit()
+    except Exception:
+        # The row keeps its lease and turns 'unverified' when it lapses
+        conn.rollback()
+        stats.errors += 1
+        logger.exception(
+            "Recording a scheduled payment failed",
+            extra={"scheduled_payment_id": row["id"], "charge": (outcome or {}).get("status")},
+        )
+
+
+# Retry is safe: a new attempt only claims rows still due, and rows the failed
+# attempt left mid-charge become 'unverified' rather than being charged again
+@job_queue.task("scheduled_payments", queue="payments", priority=10, max_attempts=3)
+@route_label("job:scheduled_payments")
+def run_due_scheduled_payments(run_window: str, batch_limit: int | None = None,
+                               time_budget: float | None = None) -> dict:
+    """
+    Drain the installments due now, one claimed slice at a time, until none
+    are left, batch_limit (PAYMENT_RUN_BATCH_LIMIT; 0 = no limit) have been
+    claimed or time_budget seconds (PAYMENT_RUN_TIME_BUDGET) have passed.
+    Slices are sized from the gateway latency seen so far to take about
+    PAYMENT_RUN_SLICE_SECONDS. Gateway calls run on up to
+    PAYMENT_RUN_CONCURRENCY threads (see app.services.payment_dispatch); the
+    ledger is written here, one debt's installments in due order. The run is
+    summarized in payment_runs.
+    """
+    batch_limit = PAYMENT_RUN_BATCH_LIMIT if batch_limit is None else batch_limit
+    time_budget = PAYMENT_RUN_TIME_BUDGET if time_budget is None else time_budget
+    started_utc = datetime.now(timezone.utc)
+    started = monotonic()
+    deadline = started + time_budget
+    runner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    pool = get_pool()
+    conn = pool.getconn()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    stats = PaymentRunStats()
+    run_id = None
+    stop_reason = STOP_FAILED
+
+    try:
+        run_id = start_run(conn, run_window, runner_id, started_utc)
+        stats.recovered = len(recover_expired_leases(conn))
+        manager = TransactionManager(cursor)
+        limiter = RateLimiter(PAYMENT_RUN_RATE_LIMIT)
+        claim_size = PAYMENT_RUN_CLAIM_SIZE
+        latency = None
+
+        while True:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                stop_reason = STOP_TIME_BUDGET
+                break
+            if batch_limit and stats.claimed >= batch_limit:
+                stop_reason = STOP_BATCH_LIMIT
+                break
+            claim_size = next_claim_size(
+                latency, remaining, claim_size, PAYMENT_RUN_CONCURRENCY, PAYMENT_RUN_RATE_LIMIT,
+                PAYMENT_RUN_SLICE_SECONDS, PAYMENT_RUN_CLAIM_MAX,
+            )
+            limit = min(claim_size, batch_limit - stats.claimed) if batch_limit else claim_size
+            lease_seconds = slice_lease_seconds(limit, PAYMENT_RUN_CONCURRENCY, PAYMENT_RUN_RATE_LIMIT)
+            rows = claim_due_payments(conn, runner_id, datetime.now(timezone.utc), limit, lease_seconds)
+            if not rows:
+                stop_reason = STOP_DRAINED
+                break
+            stats.claimed += len(rows)
+            stats.slices += 1
+            slice_latencies = []
+            # Installments whose charge went to the gateway; the rest can be handed back
+            sent = set()
+            try:
+                with SliceLeases(pool, runner_id, lease_seconds) as leases:
+                    charges = {
+                        row["id"]: manager.prepare_charge(
+                            row["debt_id"], row["amount"], row["card_token"], row["id"], row["attempt_count"]
+                        )
+                        for row in rows
+                    }
+                    # Only reads so far; no transaction stays open across the gateway calls
+                    conn.commit()
+
+                    def charge(row, charges=charges, leases=leases, sent=sent):
+                        if not leases.held(row["id"]):
+                            return _LEASE_LOST, None
+                        request = charges[row["id"]]
+                        if not request:
+                            return None, None
+                        sent.add(row["id"])
+                        call_started = perf_counter()
+                        outcome = manager.charge(request)
+                        return outcome, perf_counter() - call_started
+
+                    dispatched = dispatch_ordered(
+                        rows, key=lambda row: row["debt_id"], call=charge,
+                        concurrency=PAYMENT_RUN_CONCURRENCY, limiter=limiter
+                    )
+                    for row, (outcome, seconds) in dispatched:
+                        if seconds is not None:
+                            slice_latencies.append(seconds)
+                        _record_outcome(conn, cursor, manager, stats, row, runner_id, outcome)
+            except BaseException:
+                conn.rollback()
+                try:
+                    released = release_unsent(conn, runner_id, [row for row in rows if row["id"] not in sent])
+                    if released:
+                        logger.warning("Scheduled payments handed back after a failed slice",
+                                       extra={"runner_id": runner_id, "released": released})
+                except Exception:
+                    # Left to lapse into 'unverified' with their leases
+                    logger.exception("Handing back unsent scheduled payments failed", extra={"runner_id": runner_id})
+                raise
+            if slice_latencies:
+                stats.latencies.extend(slice_latencies)
+                latency = percentile(sorted(slice_latencies), 0.5)
+
+        summary = stats.summary(monotonic() - started)
         return {
+            "run_id": run_id,
             "run_window": run_window,
-            "now_ct": now_ct.isoformat(),
-            "processed": processed,
-            "retried": retried,
-            "declined": declined,
-            "total": len(rows)
+            "now_ct": started_utc.astimezone(CT_TZ).isoformat(),
+            "stop_reason": stop_reason,
+            "processed": stats.counts["paid"],
+            "total": stats.claimed,
+            **summary,
         }
     finally:
+        if run_id is not None:
+            try:
+                if stop_reason == STOP_FAILED:
+                    conn.rollback()
+                finish_run(conn, run_id, stop_reason, stats.summary(monotonic() - started))
+            except Exception:
+                logger.exception("Recording the payment run summary failed", extra={"run_id": run_id})
         cursor.close()
-        conn.close()
+        pool.putconn(conn)
@@ -1,13 +1,14 @@
 from decimal import Decimal
 from datetime import datetime
-from typing import Optional
-from app.services.usa_epay import USAePayService, USAePayDecline, USAePayError
+from typing import Any, Dict, Optional
+from app.core.finance import calculate_split
+from app.services.usa_epay import USAePayService, USAePayDecline, USAePayError, USAePayOutcomeUnknown, get_usa_epay
 from app.services.decline import classify_decline
 
 class TransactionManager:
-    def __init__(self, db_cursor):
+    def __init__(self, db_cursor, usa_epay: Optional[USAePayService] = None):
         self.cursor = db_cursor
-        self.usa_epay = USAePayService()
+        self.usa_epay = usa_epay or get_usa_epay()
 
     def execute_payment(
         self,
@@ -27,59 +28,121 @@ class TransactionManager:
         3. Records payment in 'payments' table
         4. Updates 'debts' table (balance, total_paid, last_payment)
         5. Marks 'scheduled_payments' as paid (if applicable)
+
+        The steps are also available separately (prepare_charge, charge,
+        record_payment) so a caller can run the gateway call off the
+        database thread.
+        """
+        request = self.prepare_charge(debt_id, amount, card_token, scheduled_payment_id, attempt_count)
+        outcome = self.charge(request) if request else None
+        return self.record_payment(
+            debt_id, amount, outcome,
+            scheduled_payment_id=scheduled_payment_id,
+            update_scheduled=update_scheduled,
+            raise_on_decline=raise_on_decline,
+        )
+
+    def prepare_charge(
+        self,
+        debt_id: int,
+        amount: Decimal,
+        card_token: Optional[str],
+        scheduled_payment_id: Optional[int] = None,
+        attempt_count: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        run_transaction() arguments for a charge, with the debtor's details for
+        USA ePay reporting/AVS. None when there is no card to charge.
         """
-        # 1. Run Transaction if token exists
+        if not card_token:
+            return None
+
+        # Fetch debtor information for USA ePay reporting/AVS
+        self.cursor.execute("""
+            SELECT 
+                dr.first_name, dr.last_name, dr.email, dr.address_1, dr.address_2, dr.city, dr.state, dr.zip_code, dr.phone,
+                d.client_reference_number
+            FROM debts d
+            JOIN debtors dr ON d.debtor_id = dr.id
+            WHERE d.id = %s
+        """, (debt_id,))
+        debtor = self.cursor.fetchone()
+        
+        customer_data = {}
+        if debtor:
+            customer_data = {
+                "first_name": debtor['first_name'],
+                "last_name": debtor['last_name'],
+                "email": debtor['email'],
+                "custid": debtor['client_reference_number'],
+                "address": debtor['address_1'],
+                "address2": debtor['address_2'],
+                "city": debtor['city'],
+                "state": debtor['state'],
+                "zip": debtor['zip_code'],
+                "phone": debtor['phone']
+            }
+
+        stored_credential = "installment" if scheduled_payment_id else None
+        # Use debt_id as invoice for simple tracking
+        attempt_suffix = attempt_count if attempt_count is not None else 1
+        invoice_id = f"Debt-{debt_id}-SP{scheduled_payment_id or 'manual'}-A{attempt_suffix}"
+        return {
+            "token_id": card_token,
+            "amount": amount,
+            "invoice": invoice_id,
+            "customer_data": customer_data,
+            "stored_credential": stored_credential,
+        }
+
+    def charge(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a prepared charge. Uses no database state, so it can run on a
+        worker thread; declines and gateway errors are returned in the
+        outcome rather than raised. "unknown" means the gateway may have
+        charged the card without us hearing back.
+        """
+        try:
+            return {"status": "approved", "response": self.usa_epay.run_transaction(**request)}
+        except USAePayDecline as e:
+            return {"status": "declined", "exception": e}
+        except USAePayError as e:
+            return {"status": "error", "exception": e}
+        except USAePayOutcomeUnknown as e:
+            return {"status": "unknown", "exception": e}
+
+    def record_payment(
+        self,
+        debt_id: int,
+        amount: Decimal,
+        outcome: Optional[Dict[str, Any]],
+        scheduled_payment_id: Optional[int] = None,
+        update_scheduled: bool = True,
+        raise_on_decline: bool = True,
+    ):
+        """
+        Write the ledger for a charge() outcome (None: an internal payment
+        with no card) and return the payment result. An "unknown" outcome
+        writes nothing and raises its USAePayOutcomeUnknown.
+        """
+        if outcome is not None and outcome["status"] == "unknown":
+            raise outcome["exception"]
         payment_ref = "Internal - No Token"
         payment_method = "internal"
         result_code = None
         result_text = None
         gateway_key = None
         error_text = None
-        if card_token:
+        if outcome is not None:
             payment_method = "card_token"
-            # Fetch debtor information for USA ePay reporting/AVS
-            self.cursor.execute("""
-                SELECT 
-                    dr.first_name, dr.last_name, dr.email, dr.address_1, dr.address_2, dr.city, dr.state, dr.zip_code, dr.phone,
-                    d.client_reference_number
-                FROM debts d
-                JOIN debtors dr ON d.debtor_id = dr.id
-                WHERE d.id = %s
-            """, (debt_id,))
-            debtor = self.cursor.fetchone()
-            
-            customer_data = {}
-            if debtor:
-                customer_data = {
-                    "first_name": debtor['first_name'],
-                    "last_name": debtor['last_name'],
-                    "email": debtor['email'],
-                    "custid": debtor['client_reference_number'],
-                    "address": debtor['address_1'],
-                    "address2": debtor['address_2'],
-                    "city": debtor['city'],
-                    "state": debtor['state'],
-                    "zip": debtor['zip_code'],
-                    "phone": debtor['phone']
-                }
-
-            try:
-                stored_credential = "installment" if scheduled_payment_id else None
-                # Use debt_id as invoice for simple tracking
-                attempt_suffix = attempt_count if attempt_count is not None else 1
-                invoice_id = f"Debt-{debt_id}-SP{scheduled_payment_id or 'manual'}-A{attempt_suffix}"
-                epay_resp = self.usa_epay.run_transaction(
-                    token_id=card_token,
-                    amount=amount,
-                    invoice=invoice_id,
-                    customer_data=customer_data,
-                    stored_credential=stored_credential
-                )
+            if outcome["status"] == "approved":
+                epay_resp = outcome["response"]
                 payment_ref = epay_resp.get("refnum", "USAePay Tokenized")
                 gateway_key = epay_resp.get("key")
                 result_code = epay_resp.get("result_code", "A")
                 result_text = epay_resp.get("result", "Approved")
-            except USAePayDecline as e:
+            elif outcome["status"] == "declined":
+                e = outcome["exception"]
                 decline_data = e.data or {}
                 payment_ref = decline_data.get("refnum")
                 gateway_key = decline_data.get("key")
@@ -161,7 +224,8 @@ class TransactionManager:
                     "gateway_key": gateway_key,
                     "error": error_text,
                 }
-            except USAePayError as e:
+            else:
+                e = outcome["exception"]
                 error_text = str(e)
                 decline_reason = classify_decline(error_text)
                 self.cursor.execute(
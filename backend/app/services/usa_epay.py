@@ -1,13 +1,32 @@
 import os
-import os
 import hashlib
+import math
+import random
+import threading
+import time
 import uuid
 import requests
 import base64
+from collections import deque
 from decimal import Decimal
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+from requests.adapters import HTTPAdapter
+
+# Seconds to open a connection / to wait for the gateway's answer
+USA_EPAY_CONNECT_TIMEOUT = float(os.getenv("USA_EPAY_CONNECT_TIMEOUT", "5"))
+USA_EPAY_READ_TIMEOUT = float(os.getenv("USA_EPAY_READ_TIMEOUT", "45"))
+# Keep-alive connections kept open to the gateway
+USA_EPAY_POOL_SIZE = int(os.getenv("USA_EPAY_POOL_SIZE", "16"))
+# Extra attempts for idempotent requests, with jittered exponential backoff (seconds)
+USA_EPAY_RETRIES = int(os.getenv("USA_EPAY_RETRIES", "2"))
+USA_EPAY_RETRY_BACKOFF = float(os.getenv("USA_EPAY_RETRY_BACKOFF", "0.5"))
+
+_RETRY_STATUSES = (429, 502, 503, 504)
+# Latency samples kept per endpoint for percentiles
+_LATENCY_SAMPLES = 1024
+
 
 class USAePayError(Exception):
     def __init__(self, message: str, data: Optional[Dict[str, Any]] = None):
@@ -18,12 +37,163 @@ class USAePayError(Exception):
 class USAePayDecline(USAePayError):
     pass
 
-class USAePayService:
+
+class USAePayOutcomeUnknown(Exception):
+    """
+    A non-idempotent request may have reached the gateway but no usable
+    answer came back: a read timeout, a dropped connection, or a 5xx from the
+    gateway or a proxy in front of it (status_code). Unlike USAePayError it
+    is not a decline: the card may have been charged, so check before trying
+    again.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _EndpointStats:
+    __slots__ = ("count", "errors", "retries", "total_ms", "max_ms", "recent")
+
     def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent: deque = deque(maxlen=_LATENCY_SAMPLES)
+
+    def to_dict(self) -> dict:
+        ordered = sorted(self.recent)
+
+        def percentile(fraction):
+            if not ordered:
+                return None
+            return round(ordered[max(0, math.ceil(len(ordered) * fraction) - 1)], 2)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": percentile(0.5),
+            "p99_ms": percentile(0.99),
+        }
+
+
+class USAePayTransport:
+    """
+    HTTP client shared by every USAePayService: one requests.Session with a
+    keep-alive connection pool, connect/read timeouts on every request, and
+    per-endpoint latency stats. Only requests marked idempotent are retried
+    (on connection errors, timeouts and 429/502/503/504), with jittered
+    backoff; a sale is never sent twice, and a 5xx answer to one raises
+    USAePayOutcomeUnknown. Safe to use from several threads.
+    """
+
+    def __init__(self, pool_size: int = USA_EPAY_POOL_SIZE, connect_timeout: float = USA_EPAY_CONNECT_TIMEOUT,
+                 read_timeout: float = USA_EPAY_READ_TIMEOUT, retries: int = USA_EPAY_RETRIES,
+                 backoff: float = USA_EPAY_RETRY_BACKOFF, sleep=time.sleep):
+        self.session = requests.Session()
+        # Retries are decided here, per request, not by urllib3
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _EndpointStats] = {}
+
+    def request(self, method: str, url: str, endpoint: str, idempotent: bool = False, **kwargs) -> requests.Response:
+        """
+        Send one request; `endpoint` labels it in stats(). Raises USAePayError
+        when the gateway cannot be reached or an idempotent request keeps
+        failing, USAePayOutcomeUnknown when a non-idempotent request was
+        possibly delivered but got no answer or a 5xx.
+        """
+        attempts = 1 + (max(self.retries, 0) if idempotent else 0)
+        for attempt in range(1, attempts + 1):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self._record(endpoint, started, error=True, retry=attempt > 1)
+                if attempt < attempts:
+                    self._backoff(attempt)
+                    continue
+                if idempotent or isinstance(e, requests.exceptions.ConnectTimeout):
+                    # Never sent, or harmless to have sent
+                    raise USAePayError(f"{endpoint} failed: {e.__class__.__name__}: {e}")
+                raise USAePayOutcomeUnknown(f"{endpoint} got no answer: {e.__class__.__name__}: {e}")
+            self._record(endpoint, started, error=response.status_code >= 500, retry=attempt > 1)
+            if response.status_code in _RETRY_STATUSES and attempt < attempts:
+                self._backoff(attempt)
+                continue
+            if not idempotent and response.status_code >= 500:
+                # Failed somewhere between the proxy and the processor; the request may have gone through
+                raise USAePayOutcomeUnknown(
+                    f"{endpoint} answered {response.status_code}", status_code=response.status_code
+                )
+            return response
+
+    def _backoff(self, attempt: int):
+        self._sleep(random.uniform(0, self.backoff * (2 ** (attempt - 1))))
+
+    def _record(self, endpoint: str, started: float, error: bool, retry: bool):
+        duration_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = _EndpointStats()
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.recent.append(duration_ms)
+            if error:
+                stats.errors += 1
+            if retry:
+                stats.retries += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in self._stats.items()}
+
+
+_transport: Optional[USAePayTransport] = None
+_service: Optional["USAePayService"] = None
+_shared_lock = threading.Lock()
+
+
+def get_transport() -> USAePayTransport:
+    """The process-wide USA ePay transport, created on first use."""
+    global _transport
+    with _shared_lock:
+        if _transport is None:
+            _transport = USAePayTransport()
+        return _transport
+
+
+def get_usa_epay() -> "USAePayService":
+    """The process-wide USA ePay client, created on first use rather than at import."""
+    global _service
+    if _service is None:
+        transport = get_transport()
+        with _shared_lock:
+            if _service is None:
+                _service = USAePayService(transport)
+    return _service
+
+
+class USAePayService:
+    def __init__(self, transport: Optional[USAePayTransport] = None):
         # Configuration
         self.api_key = os.getenv("USA_EPAY_API_KEY")
         self.api_pin = os.getenv("USA_EPAY_API_PIN")
         self.base_url = os.getenv("USA_EPAY_BASE_URL", "https://sandbox.usaepay.com/api/v2")
+        self.transport = transport or get_transport()
 
     def _generate_auth_header(self):
         """
@@ -74,7 +244,9 @@ class USAePayService:
             "creditcard": creditcard
         }
         
-        response = requests.post(url, json=payload, headers=self._generate_auth_header())
+        response = self.transport.request(
+            "POST", url, "POST /transactions", json=payload, headers=self._generate_auth_header()
+        )
         
         if response.status_code not in (200, 201):
            raise USAePayError(f"Tokenization failed: {response.status_code} - {response.text}")
@@ -146,7 +318,9 @@ class USAePayService:
                 traits["stored_credential"] = stored_credential
             payload["traits"] = traits
         
-        response = requests.post(url, json=payload, headers=self._generate_auth_header())
+        response = self.transport.request(
+            "POST", url, "POST /transactions", json=payload, headers=self._generate_auth_header()
+        )
         
         if response.status_code not in (200, 201):
             raise USAePayError(f"Transaction Request Failed: {response.status_code} - {response.text}")
@@ -209,7 +383,9 @@ class USAePayService:
                 traits["stored_credential"] = stored_credential
             payload["traits"] = traits
 
-        response = requests.post(url, json=payload, headers=self._generate_auth_header())
+        response = self.transport.request(
+            "POST", url, "POST /transactions", json=payload, headers=self._generate_auth_header()
+        )
 
         if response.status_code not in (200, 201):
             raise USAePayError(f"Transaction Request Failed: {response.status_code} - {response.text}")
@@ -271,7 +447,9 @@ class USAePayService:
                 traits["stored_credential"] = stored_credential
             payload["traits"] = traits
 
-        response = requests.post(url, json=payload, headers=self._generate_auth_header())
+        response = self.transport.request(
+            "POST", url, "POST /transactions", json=payload, headers=self._generate_auth_header()
+        )
 
         if response.status_code not in (200, 201):
             raise USAePayError(f"Auth Request Failed: {response.status_code} - {response.text}")
@@ -294,7 +472,7 @@ class USAePayService:
             "trankey": trankey
         }
 
-        response = requests.post(url, json=payload, headers=self._generate_auth_header())
+        response = self.transport.request("POST", url, "POST /tokens", json=payload, headers=self._generate_auth_header())
 
         if response.status_code not in (200, 201):
             raise USAePayError(f"Token creation failed: {response.status_code} - {response.text}")
@@ -313,7 +491,9 @@ class USAePayService:
         Voids a previous transaction.
         """
         url = f"{self.base_url}/transactions/{ref_num}/void"
-        response = requests.post(url, headers=self._generate_auth_header())
+        response = self.transport.request(
+            "POST", url, "POST /transactions/{refnum}/void", headers=self._generate_auth_header()
+        )
         
         if response.status_code != 200:
             raise USAePayError(f"Void Failed: {response.status_code} - {response.text}")
@@ -332,7 +512,9 @@ class USAePayService:
         """
         url = f"{self.base_url}/account"
         try:
-            response = requests.get(url, headers=self._generate_auth_header())
+            response = self.transport.request(
+                "GET", url, "GET /account", idempotent=True, headers=self._generate_auth_header()
+            )
             if response.status_code == 200:
                 # Success - authentication is valid
                 return True, "Account Verified"
@@ -346,7 +528,7 @@ class USAePayService:
         Fetches account information for debugging.
         """
         url = f"{self.base_url}/account"
-        response = requests.get(url, headers=self._generate_auth_header())
+        response = self.transport.request("GET", url, "GET /account", idempotent=True, headers=self._generate_auth_header())
         content_type = response.headers.get("Content-Type", "")
         data: Dict[str, Any] = {
             "status_code": response.status_code,
@@ -0,0 +1,170 @@
+"""
+Job worker: runs the job_queue (see app.services.job_queue) outside the web process.
+
+    python -m app.worker
+
+JOB_WORKER_QUEUES lists the queues this process serves and how many jobs of
+each it runs at once, e.g. "ingest:1,campaigns:1,payments:1,default:2".
+With ENABLE_SCHEDULER=true the worker also queues the 05:00 / 17:00 CT
+scheduled payment runs (one per window per day, however many workers run).
+"""
+import importlib
+import logging
+import os
+import signal
+import socket
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.core.database import close_pool, pooled_connection
+from app.services import job_queue
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKER_QUEUES = os.getenv("JOB_WORKER_QUEUES", "ingest:1,campaigns:1,payments:1,default:2")
+JOB_WORKER_POLL_INTERVAL = float(os.getenv("JOB_WORKER_POLL_INTERVAL", "2"))
+SCHEDULE_INTERVAL = 60
+
+# Modules whose import registers the job tasks
+TASK_MODULES = (
+    "app.services.ingest",
+    "app.routers.campaigns",
+    "app.services.scheduled_runner",
+)
+
+
+def parse_queues(spec: str) -> Dict[str, int]:
+    """'ingest:1,default:2' -> {'ingest': 1, 'default': 2}; a bare name runs one at a time."""
+    queues: Dict[str, int] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, count = part.partition(":")
+        concurrency = int(count) if count else 1
+        if concurrency < 1:
+            raise ValueError(f"Queue '{name}' needs a concurrency of at least 1")
+        queues[name.strip()] = concurrency
+    if not queues:
+        raise ValueError("JOB_WORKER_QUEUES names no queues")
+    return queues
+
+
+class Worker:
+    """One consumer thread per unit of queue concurrency, plus heartbeat and scheduler threads."""
+
+    def __init__(self, queues: Dict[str, int], poll_interval: float = JOB_WORKER_POLL_INTERVAL,
+                 visibility_timeout: float = job_queue.JOB_QUEUE_VISIBILITY_TIMEOUT, schedule: bool = False,
+                 worker_id: Optional[str] = None):
+        self.queues = queues
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.schedule = schedule
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stopping = threading.Event()
+        self.threads: List[threading.Thread] = []
+        self.consumers: List[threading.Thread] = []
+
+    def start(self):
+        for queue, concurrency in self.queues.items():
+            for n in range(concurrency):
+                self.consumers.append(self._spawn(self._consume, f"job-{queue}-{n}", queue))
+        self._spawn(self._heartbeat, "job-heartbeat")
+        if self.schedule:
+            self._spawn(self._schedule, "job-scheduler")
+        logger.info("Job worker started", extra={"worker_id": self.worker_id, "queues": self.queues})
+
+    def _spawn(self, target, name: str, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        return thread
+
+    def stop(self, *_):
+        # Running jobs finish; anything cut off by the platform is reclaimed when its lease lapses
+        self.stopping.set()
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+    def run_once(self, queue: str) -> bool:
+        """Claim and run one job from `queue`; False when nothing was ready."""
+        with pooled_connection() as conn:
+            job = job_queue.claim(conn, queue, self.worker_id, self.visibility_timeout)
+        if job is None:
+            return False
+        job_queue.run_job(job, self.worker_id)
+        return True
+
+    def _consume(self, queue: str):
+        while not self.stopping.is_set():
+            try:
+                if self.run_once(queue):
+                    continue
+            except Exception:
+                logger.exception("Job queue poll failed", extra={"queue": queue})
+            self.stopping.wait(self.poll_interval)
+
+    def _heartbeat(self):
+        interval = self.visibility_timeout / 3
+        while True:
+            if self.stopping.is_set():
+                # Keep leases alive until the last running job has finished
+                busy = [thread for thread in self.consumers if thread.is_alive()]
+                if not busy:
+                    return
+                busy[0].join(interval)
+            else:
+                self.stopping.wait(interval)
+            try:
+                with pooled_connection() as conn:
+                    job_queue.heartbeat(conn, self.worker_id, self.visibility_timeout)
+            except Exception:
+                logger.exception("Job heartbeat failed")
+
+    def _schedule(self):
+        from app.services.scheduled_runner import enqueue_due_payment_runs
+
+        while not self.stopping.is_set():
+            try:
+                with pooled_connection() as conn:
+                    cur = conn.cursor()
+                    try:
+                        queued = enqueue_due_payment_runs(cur, datetime.now(timezone.utc))
+                        conn.commit()
+                    finally:
+                        cur.close()
+                if queued:
+                    logger.info("Queued scheduled payment runs", extra={"windows": queued})
+            except Exception:
+                logger.exception("Scheduling payment runs failed")
+            self.stopping.wait(SCHEDULE_INTERVAL)
+
+
+def main():
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    for module in TASK_MODULES:
+        importlib.import_module(module)
+
+    worker = Worker(
+        parse_queues(JOB_WORKER_QUEUES),
+        schedule=os.getenv("ENABLE_SCHEDULER", "false").lower() == "true",
+    )
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.start()
+    try:
+        worker.join()
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: debt view lookups as a server-side prepared statement vs
+ad-hoc execution (parsed and planned on every call).
+
+Usage (from backend/):
+    python -m scripts.bench_debt_view --iterations 2000 --query by_id --arg 1
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import asyncpg
+
+from app.core.database import _async_connect_kwargs
+from app.services.debt_view import DEBT_VIEW_QUERIES
+
+
+def _coerce(query_name: str, raw: str):
+    if query_name == "by_id":
+        return [int(raw)]
+    if query_name == "search_name":
+        return [f"%{raw}%"]
+    if query_name == "search_client_ref":
+        return [raw]
+    return []
+
+
+def _summary(label: str, timings: list) -> dict:
+    ordered = sorted(timings)
+    p99_index = max(0, int(len(ordered) * 0.99) - 1)
+    result = {
+        "label": label,
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[p99_index] * 1000,
+    }
+    print(f"{label:<10} mean={result['mean_ms']:.3f}ms p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms")
+    return result
+
+
+async def run(iterations: int, query_name: str, args: list, warmup: int):
+    sql = DEBT_VIEW_QUERIES[query_name]
+
+    # statement_cache_size=0 forces an unnamed statement (parse + plan) per call
+    adhoc_conn = await asyncpg.connect(statement_cache_size=0, **_async_connect_kwargs())
+    prepared_conn = await asyncpg.connect(statement_cache_size=0, **_async_connect_kwargs())
+    try:
+        for _ in range(warmup):
+            await adhoc_conn.fetch(sql, *args)
+        adhoc = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await adhoc_conn.fetch(sql, *args)
+            adhoc.append(time.perf_counter() - started)
+
+        stmt = await prepared_conn.prepare(sql)
+        for _ in range(warmup):
+            await stmt.fetch(*args)
+        prepared = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await stmt.fetch(*args)
+            prepared.append(time.perf_counter() - started)
+    finally:
+        await adhoc_conn.close()
+        await prepared_conn.close()
+
+    print(f"query={query_name} iterations={iterations}")
+    adhoc_summary = _summary("ad-hoc", adhoc)
+    prepared_summary = _summary("prepared", prepared)
+    if prepared_summary["mean_ms"]:
+        print(f"speedup (mean): {adhoc_summary['mean_ms'] / prepared_summary['mean_ms']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prepared vs ad-hoc debt view queries")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--query", choices=sorted(DEBT_VIEW_QUERIES), default="by_id")
+    parser.add_argument("--arg", default="1", help="Debt id, name fragment or client reference")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.iterations, args.query, _coerce(args.query, args.arg), args.warmup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Benchmark: CSVImporter.process against a local Postgres, per engine and
+batch size, on a synthetic placement (scripts.synthetic_placement) or a
+client file.
+
+Each run executes in a fresh interpreter, so its peak RSS (ru_maxrss, with
+the parallel engine's workers reported separately) belongs to that run
+alone. DB round trips are the statements sql_metrics recorded in the run:
+every execute / executemany / copy_expert on the importer's connections.
+The copy engine stages INGEST_COPY_CHUNK_ROWS rows per COPY, so its batch
+size is passed that way; the parallel engine splits by bytes and runs once
+per --workers value instead.
+
+Before each run the portfolio's debts, and the debtors only they referenced,
+are deleted, so every run is a first placement. With --replay the file is
+loaded once more before the measured run, which then re-places accounts the
+portfolio already holds (through the delta upsert with --delta).
+
+Point DATABASE_URL at a scratch database with database/schema.sql applied
+(DB_SSLMODE=disable for a local server); the benchmark deletes data. It
+refuses to run against a database that is not on this machine, and resets
+only the "Ingest benchmark" portfolio unless --allow-reset is given for
+another --portfolio-id.
+
+Usage (from backend/):
+    python -m scripts.bench_ingest --rows 100000 --engines batch,copy --batch-sizes 500,1000,5000
+    python -m scripts.bench_ingest --rows 200000 --engines parallel --workers 2,4 --dirty-rate 0.01
+    python -m scripts.bench_ingest --file /path/to/placement.csv --replay --delta
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from scripts.synthetic_placement import write_placement_file
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+BENCH_PORTFOLIO = "Ingest benchmark"
+_LOCAL_HOSTS = ("", "localhost", "127.0.0.1", "::1")
+
+
+def run_once(path: str, portfolio_id: int, engine: str, batch_size: int, workers: int, delta: bool) -> dict:
+    """One measured import in this process; called in the child interpreter."""
+    import resource
+
+    from app.core.sql_metrics import registry
+    from app.services.ingest import CSVImporter
+
+    with open(path, "rb") as f:
+        importer = CSVImporter(f)
+        importer.process(portfolio_id, batch_size=batch_size, engine=engine, workers=workers, delta=delta)
+    stats = importer.stats
+    return {
+        "rows": stats.get("rows"),
+        "rows_failed": stats.get("rows_failed"),
+        "seconds": stats.get("seconds"),
+        "rows_per_second": stats.get("rows_per_second"),
+        "round_trips": sum(route["count"] for route in registry.snapshot()["routes"]),
+        # Linux reports kilobytes
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "workers_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def _bench_portfolio(conn) -> int:
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT id FROM portfolios WHERE name = %s ORDER BY id LIMIT 1", (BENCH_PORTFOLIO,))
+        row = cur.fetchone()
+        if row:
+            return row[0]
+        cur.execute("INSERT INTO clients (name) VALUES (%s) RETURNING id", (BENCH_PORTFOLIO,))
+        client_id = cur.fetchone()[0]
+        cur.execute(
+            "INSERT INTO portfolios (client_id, name, commission_percentage) VALUES (%s, %s, 0) RETURNING id",
+            (client_id, BENCH_PORTFOLIO)
+        )
+        portfolio_id = cur.fetchone()[0]
+        conn.commit()
+        return portfolio_id
+    finally:
+        cur.close()
+
+
+def _require_local_database(conn):
+    """Refuse a server other than this machine's, whichever setting pointed at it."""
+    host = conn.get_dsn_parameters().get("host") or ""
+    if host not in _LOCAL_HOSTS and not host.startswith("/"):
+        raise SystemExit(f"Refusing to benchmark against database host '{host}'; it deletes data. Use a local scratch database.")
+
+
+def _require_resettable(conn, portfolio_id: int, allow_reset: bool):
+    """Only the benchmark's own portfolio is reset unless --allow-reset is given."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT name FROM portfolios WHERE id = %s", (portfolio_id,))
+        row = cur.fetchone()
+    finally:
+        cur.close()
+    if row is None:
+        raise SystemExit(f"Portfolio {portfolio_id} does not exist")
+    if row[0] != BENCH_PORTFOLIO and not allow_reset:
+        raise SystemExit(
+            f"Portfolio {portfolio_id} ('{row[0]}') is not the '{BENCH_PORTFOLIO}' portfolio; each run deletes "
+            "its debts. Pass --allow-reset to benchmark against it anyway."
+        )
+
+
+def reset_portfolio(conn, portfolio_id: int):
+    """Delete the portfolio's debts and the debtors no other debt references."""
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM debts WHERE portfolio_id = %s RETURNING debtor_id", (portfolio_id,))
+        debtor_ids = list({row[0] for row in cur.fetchall() if row[0] is not None})
+        cur.execute(
+            """
+            DELETE FROM debtors d
+            WHERE d.id = ANY(%s::uuid[])
+              AND NOT EXISTS (SELECT 1 FROM debts x WHERE x.debtor_id = d.id)
+            """,
+            (debtor_ids,)
+        )
+        conn.commit()
+    finally:
+        cur.close()
+    # Reclaim dead tuples so later runs do not pay for earlier ones
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        cur.execute("VACUUM ANALYZE debts")
+        cur.execute("VACUUM ANALYZE debtors")
+    finally:
+        cur.close()
+        conn.autocommit = False
+
+
+def _run_child(args: dict, env: dict) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-m", "scripts.bench_ingest", "--run-one", json.dumps(args)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"Run {args} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _configs(engines, batch_sizes, workers):
+    for engine in engines:
+        if engine == "parallel":
+            for count in workers:
+                yield engine, batch_sizes[0], count
+        else:
+            for batch_size in batch_sizes:
+                yield engine, batch_size, None
+
+
+def _print_row(engine: str, batch_size: int, workers, result: dict):
+    label = f"{engine} w={workers}" if workers else f"{engine} b={batch_size}"
+    print(
+        f"{label:<16} rows={result['rows']} failed={result['rows_failed']} "
+        f"seconds={result['seconds']:.3f} rows/s={result['rows_per_second'] or 0:,.0f} "
+        f"round_trips={result['round_trips']} peak_rss={result['peak_rss_mb']}MB"
+        + (f" workers_rss={result['workers_peak_rss_mb']}MB" if workers else "")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSVImporter against a local Postgres")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic rows when --file is not given")
+    parser.add_argument("--file", help="Existing placement CSV")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--debts-per-debtor", type=float, default=1.5)
+    parser.add_argument("--dirty-rate", type=float, default=0.0)
+    parser.add_argument("--engines", default="batch,copy,parallel")
+    parser.add_argument("--batch-sizes", default="500,1000,5000")
+    parser.add_argument("--workers", default="4", help="Worker counts for the parallel engine")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per configuration; the best is reported")
+    parser.add_argument("--portfolio-id", type=int, help="Defaults to a portfolio created for the benchmark")
+    parser.add_argument("--allow-reset", action="store_true",
+                        help="Let --portfolio-id name a portfolio other than the benchmark's; its debts are deleted")
+    parser.add_argument("--replay", action="store_true", help="Measure a re-placement of a loaded file")
+    parser.add_argument("--delta", action="store_true", help="Import with delta=True")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_once(**json.loads(args.run_one))))
+        return
+
+    from app.core.database import get_db_connection
+
+    engines = [engine for engine in args.engines.split(",") if engine]
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",") if size]
+    workers = [int(count) for count in args.workers.split(",") if count]
+
+    path = args.file
+    tmp = None
+    if not path:
+        tmp = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+        tmp.close()
+        path = write_placement_file(tmp.name, args.rows, seed=args.seed, debts_per_debtor=args.debts_per_debtor,
+                                    dirty_rate=args.dirty_rate)
+    conn = get_db_connection()
+    results = []
+    try:
+        _require_local_database(conn)
+        portfolio_id = args.portfolio_id or _bench_portfolio(conn)
+        _require_resettable(conn, portfolio_id, args.allow_reset)
+        for engine, batch_size, count in _configs(engines, batch_sizes, workers):
+            env = dict(os.environ, SQL_METRICS_ENABLED="true", SQL_SLOW_QUERY_EXPLAIN="false",
+                       INGEST_COPY_CHUNK_ROWS=str(batch_size))
+            run = {"path": path, "portfolio_id": portfolio_id, "engine": engine, "batch_size": batch_size,
+                   "workers": count, "delta": args.delta}
+            best = None
+            for _ in range(args.repeat):
+                reset_portfolio(conn, portfolio_id)
+                if args.replay:
+                    _run_child(dict(run, engine="copy", delta=False), env)
+                result = _run_child(run, env)
+                if best is None or result["seconds"] < best["seconds"]:
+                    best = result
+            _print_row(engine, batch_size, count, best)
+            results.append({"engine": engine, "batch_size": batch_size, "workers": count, **best})
+        reset_portfolio(conn, portfolio_id)
+    finally:
+        conn.close()
+        if tmp:
+            os.remove(tmp.name)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
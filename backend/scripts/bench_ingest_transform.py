@@ -0,0 +1,106 @@
+"""
+Benchmark: per-row dict rebuilding (DictReader + normalize_header per cell,
+uncached strptime/Decimal) vs the compiled RowTransformer over csv.reader
+tuples. CPU only, no database.
+
+Usage (from backend/):
+    python -m scripts.bench_ingest_transform --rows 200000
+    python -m scripts.bench_ingest_transform --file /path/to/placement.csv
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from app.services.ingest import CSVImporter, parse_date, parse_money
+from scripts.synthetic_placement import write_placement_file
+
+_parse_date = parse_date.__wrapped__
+_parse_money = parse_money.__wrapped__
+
+
+def _legacy_row(importer: CSVImporter, row: dict):
+    """The pre-compiled per-row path, kept here for comparison."""
+    os.getenv("ENABLE_INGEST_DEBUG", "false")
+    clean = {importer.normalize_header(k): v for k, v in row.items()}
+    os.getenv("ENABLE_INGEST_DEBUG", "false")
+    dob = _parse_date(clean.get('date_of_birth'))
+    zip_5 = (clean.get('zip_code') or '')[:5]
+    fallback_seed = "|".join([
+        (clean.get('first_name') or '').strip().lower(),
+        (clean.get('last_name') or '').strip().lower(),
+        str(dob or ''),
+        zip_5
+    ])
+    debtor = (
+        importer.hash_ssn(clean.get('ssn'), fallback_seed), clean.get('first_name'), clean.get('last_name'), dob,
+        clean.get('address_line_1'), clean.get('address_line_2'), clean.get('city'), clean.get('state'), zip_5,
+        importer.sanitize_phone(clean.get('primary_phone')),
+        (clean.get('mobile_consent', 'False') or '').lower() == 'true', clean.get('email_address'),
+    )
+    debt = (
+        clean.get('client_reference'), clean.get('original_account'), clean.get('original_creditor'),
+        clean.get('current_creditor') or clean.get('original_creditor'),
+        _parse_date(clean.get('date_opened')), _parse_date(clean.get('charge_off_date')),
+        _parse_money(clean.get('principal_balance')), _parse_money(clean.get('fees_costs')),
+        _parse_money(clean.get('total_placed')), _parse_money(clean.get('total_placed')),
+        _parse_date(clean.get('last_payment_date')), _parse_money(clean.get('last_payment_amt')),
+    )
+    return debtor, debt
+
+
+def run_legacy(path: str) -> list:
+    importer = CSVImporter(None)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [_legacy_row(importer, row) for row in csv.DictReader(f)]
+
+
+def run_compiled(path: str) -> list:
+    parse_date.cache_clear()
+    parse_money.cache_clear()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        transformer = CSVImporter(f).compile_transformer(next(reader))
+        return [transformer.transform(values) for values in reader if values]
+
+
+def _timed(label: str, fn, path: str, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    rate = len(result) / best if best else 0.0
+    print(f"{label:<10} rows={len(result)} best={best:.3f}s rows/s={rate:,.0f}")
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest row transformation")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic rows when --file is not given")
+    parser.add_argument("--file", help="Existing placement CSV")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = args.file
+    tmp = None
+    if not path:
+        tmp = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+        tmp.close()
+        path = write_placement_file(tmp.name, args.rows)
+    try:
+        legacy, legacy_s = _timed("legacy", run_legacy, path, args.repeat)
+        compiled, compiled_s = _timed("compiled", run_compiled, path, args.repeat)
+        if legacy != compiled:
+            raise SystemExit("Output mismatch between legacy and compiled transforms")
+        print(f"speedup: {legacy_s / compiled_s:.2f}x (outputs identical)")
+    finally:
+        if tmp:
+            os.remove(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
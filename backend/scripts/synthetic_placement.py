@@ -0,0 +1,147 @@
+"""
+Synthetic client placement file in the debt_file_structure.md layout, using
+the client headers CSVImporter.HEADER_MAPPING recognises.
+
+Usage (from backend/):
+    python -m scripts.synthetic_placement --rows 100000 --out /tmp/placement.csv
+    python -m scripts.synthetic_placement --rows 100000 --debts-per-debtor 3 --dirty-rate 0.02
+"""
+import argparse
+import csv
+import random
+from typing import Iterator, List, Sequence
+
+PLACEMENT_HEADERS = [
+    "PSSN_SIN", "PFName", "PLName", "PBirthdate",
+    "1stAddress1", "1stAddress2", "1stCity", "1stState", "1stZipPostal", "1stPhone", "PEmail",
+    "IssuerAccountNumber", "ClientAccountID", "IssuerName", "CurrentCreditorName",
+    "AccountOpenDate", "CODate", "Principal", "Orig_FeeBalance", "CurBalance",
+    "LastPayDate", "LastPayAmount",
+]
+
+_FIRST = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth"]
+_LAST = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
+_CITIES = [("Beverly Hills", "CA", "90210"), ("New York", "NY", "10001"), ("Chicago", "IL", "60601"),
+           ("Houston", "TX", "77001"), ("Phoenix", "AZ", "85001")]
+_ISSUERS = ["First Bank Card", "Metro Credit Union", "Summit Lending", "Harbor Retail Credit"]
+
+# Dirty values seen in client files, by what the importer does with them:
+# date   - unreadable date, loaded as NULL
+# amount - unreadable balance, rejected while parsing
+# state  - full state name, rejected by the database (debtors.state is VARCHAR(2))
+# phone  - punctuation and an extension, stripped by sanitize_phone
+DIRTY_KINDS = ("date", "amount", "state", "phone")
+_BAD_DATES = ["13/45/2019", "N/A", "2020-02-30", "00/00/0000", "pending"]
+_BAD_AMOUNTS = ["12x", "N/A", "$1,2,3.4.5", "USD"]
+_DATE_COLUMNS = [PLACEMENT_HEADERS.index(h) for h in ("PBirthdate", "AccountOpenDate", "CODate", "LastPayDate")]
+_AMOUNT_COLUMNS = [PLACEMENT_HEADERS.index(h) for h in ("Principal", "CurBalance")]
+_STATE_COLUMN = PLACEMENT_HEADERS.index("1stState")
+_PHONE_COLUMN = PLACEMENT_HEADERS.index("1stPhone")
+_STATE_NAMES = {"CA": "California", "NY": "New York", "IL": "Illinois", "TX": "Texas", "AZ": "Arizona"}
+
+
+def _date(rng: random.Random, start_year: int, end_year: int, pool: List[str]) -> str:
+    # Real files reuse a small set of dates (same charge-off batch, same open month)
+    if pool and rng.random() < 0.9:
+        return rng.choice(pool)
+    value = f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(start_year, end_year)}"
+    pool.append(value)
+    return value
+
+
+def _dirty(row: List[str], kind: str, rng: random.Random):
+    if kind == "date":
+        row[rng.choice(_DATE_COLUMNS)] = rng.choice(_BAD_DATES)
+    elif kind == "amount":
+        row[rng.choice(_AMOUNT_COLUMNS)] = rng.choice(_BAD_AMOUNTS)
+    elif kind == "state":
+        row[_STATE_COLUMN] = _STATE_NAMES[row[_STATE_COLUMN]]
+    elif kind == "phone":
+        row[_PHONE_COLUMN] = f"+1 {row[_PHONE_COLUMN]} ext. {rng.randint(1, 999)}"
+
+
+def generate_rows(rows: int, seed: int = 7, debts_per_debtor: float = 1.5,
+                  blank_ssn_rate: float = 0.01, dirty_rate: float = 0.0,
+                  dirty_kinds: Sequence[str] = DIRTY_KINDS) -> Iterator[List[str]]:
+    """
+    Yield `rows` placement rows; debtors repeat so about `debts_per_debtor` debts share an SSN.
+    About `dirty_rate` of the rows carry one value of a kind from `dirty_kinds`; the
+    clean values do not depend on it, so the same seed differs only in the dirty cells.
+    """
+    unknown = set(dirty_kinds) - set(DIRTY_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown dirty value kinds: {', '.join(sorted(unknown))}")
+    rng = random.Random(seed)
+    dirty_rng = random.Random(seed + 1)
+    debtor_count = max(1, int(rows / max(debts_per_debtor, 1.0)))
+    opened_pool: List[str] = []
+    charge_off_pool: List[str] = []
+    payment_pool: List[str] = []
+    for i in range(rows):
+        d = rng.randrange(debtor_count)
+        drng = random.Random(seed * 1_000_003 + d)
+        city, state, zip_code = drng.choice(_CITIES)
+        ssn = "" if drng.random() < blank_ssn_rate else f"{900000000 + d:09d}"
+        principal = round(rng.uniform(150, 9000), 2)
+        fees = round(principal * rng.choice((0, 0, 0.05, 0.1)), 2)
+        paid = rng.random() < 0.6
+        row = [
+            ssn,
+            drng.choice(_FIRST),
+            drng.choice(_LAST),
+            f"{drng.randint(1, 12):02d}/{drng.randint(1, 28):02d}/{drng.randint(1950, 2000)}",
+            f"{drng.randint(1, 9999)} Main St",
+            "" if drng.random() < 0.8 else f"Apt {drng.randint(1, 400)}",
+            city,
+            state,
+            f"{zip_code}-{drng.randint(1000, 9999)}" if drng.random() < 0.3 else zip_code,
+            f"({drng.randint(200, 999)}) {drng.randint(200, 999)}-{drng.randint(1000, 9999)}",
+            f"debtor{d}@example.com" if drng.random() < 0.7 else "",
+            f"4{rng.randint(10**14, 10**15 - 1)}",
+            f"CR-{i:08d}",
+            rng.choice(_ISSUERS),
+            "CollectSecure Portfolio Trust",
+            _date(rng, 2012, 2019, opened_pool),
+            _date(rng, 2019, 2023, charge_off_pool),
+            f"${principal:,.2f}",
+            f"{fees:.2f}",
+            f"${principal + fees:,.2f}",
+            _date(rng, 2019, 2023, payment_pool) if paid else "",
+            f"{round(rng.uniform(10, 200), 2):.2f}" if paid else "",
+        ]
+        if dirty_rate and dirty_kinds and dirty_rng.random() < dirty_rate:
+            _dirty(row, dirty_rng.choice(dirty_kinds), dirty_rng)
+        yield row
+
+
+def write_placement_file(path: str, rows: int, seed: int = 7, debts_per_debtor: float = 1.5,
+                         blank_ssn_rate: float = 0.01, dirty_rate: float = 0.0,
+                         dirty_kinds: Sequence[str] = DIRTY_KINDS) -> str:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(PLACEMENT_HEADERS)
+        writer.writerows(generate_rows(rows, seed=seed, debts_per_debtor=debts_per_debtor,
+                                       blank_ssn_rate=blank_ssn_rate, dirty_rate=dirty_rate,
+                                       dirty_kinds=dirty_kinds))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic placement CSV")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--out", default="placement_synthetic.csv")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--debts-per-debtor", type=float, default=1.5,
+                        help="Average debts per SSN; 1 means every row is a new debtor")
+    parser.add_argument("--blank-ssn-rate", type=float, default=0.01)
+    parser.add_argument("--dirty-rate", type=float, default=0.0, help="Share of rows with one dirty value")
+    parser.add_argument("--dirty-kinds", default=",".join(DIRTY_KINDS))
+    args = parser.parse_args()
+    write_placement_file(args.out, args.rows, seed=args.seed, debts_per_debtor=args.debts_per_debtor,
+                         blank_ssn_rate=args.blank_ssn_rate, dirty_rate=args.dirty_rate,
+                         dirty_kinds=[kind for kind in args.dirty_kinds.split(",") if kind])
+    print(f"Wrote {args.rows} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
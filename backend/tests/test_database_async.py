@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.core import database
+from app.core.database import PoolTimeout, fetch_all, fetch_one, get_async_db
+
+
+class FakeRecord(dict):
+    pass
+
+
+class FakeAsyncConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def fetch(self, query, *args):
+        self.calls.append((query, args))
+        return [FakeRecord(row) for row in self.rows]
+
+    async def fetchrow(self, query, *args):
+        self.calls.append((query, args))
+        return FakeRecord(self.rows[0]) if self.rows else None
+
+
+class FakeAsyncPool:
+    def __init__(self, conn=None):
+        self.conn = conn
+        self.released = []
+
+    async def acquire(self, timeout=None):
+        if self.conn is None:
+            raise asyncio.TimeoutError()
+        return self.conn
+
+    async def release(self, conn):
+        self.released.append(conn)
+
+
+def test_fetch_helpers_return_dicts():
+    conn = FakeAsyncConnection([{"id": 1, "action_type": "Call"}])
+    rows = asyncio.run(fetch_all(conn, "SELECT * FROM interaction_logs WHERE debt_id = $1", 7))
+    assert rows == [{"id": 1, "action_type": "Call"}]
+    assert type(rows[0]) is dict
+    assert conn.calls[0][1] == (7,)
+
+    assert asyncio.run(fetch_one(FakeAsyncConnection([]), "SELECT 1")) is None
+
+
+def test_get_async_db_releases_connection(monkeypatch):
+    conn = FakeAsyncConnection([])
+    pool = FakeAsyncPool(conn)
+    monkeypatch.setitem(database._async_pools, "primary", pool)
+
+    async def borrow():
+        gen = get_async_db()
+        got = await gen.__anext__()
+        await gen.aclose()
+        return got
+
+    assert asyncio.run(borrow()) is conn
+    assert pool.released == [conn]
+
+
+def test_get_async_db_timeout_maps_to_pool_timeout(monkeypatch):
+    monkeypatch.setitem(database._async_pools, "primary", FakeAsyncPool(None))
+
+    async def borrow():
+        await get_async_db().__anext__()
+
+    with pytest.raises(PoolTimeout):
+        asyncio.run(borrow())
@@ -0,0 +1,185 @@
+import threading
+import time
+
+import pytest
+from psycopg2 import extensions
+
+from app.core import database
+from app.core.database import ConnectionPool, PoolTimeout, ReplicaLagMonitor, get_budgeted_db
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            raise Exception("server closed the connection unexpectedly")
+        self.conn.executed.append(sql)
+        if self.conn.autocommit:
+            return
+        self.conn.status = extensions.TRANSACTION_STATUS_INTRANS
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.autocommit = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+        self.executed = []
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**kwargs):
+    opened = []
+
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    options = {"min_size": 0, "max_size": 2, "timeout": 0.2, "max_lifetime": 0, "max_idle": 0, "ping_after": 60}
+    options.update(kwargs)
+    return ConnectionPool(connect, **options), opened
+
+
+def test_pool_reuses_returned_connection():
+    pool, opened = make_pool()
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(opened) == 1
+    assert pool.stats()["borrows"] == 2
+
+
+def test_pool_rolls_back_on_exception():
+    pool, opened = make_pool()
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.cursor().execute("UPDATE debts SET status = 'Paid'")
+            raise ValueError("boom")
+    assert conn.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_pool_times_out_when_exhausted():
+    pool, _ = make_pool(max_size=1)
+    conn = pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn(timeout=0.05)
+    pool.putconn(conn)
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_pool_waiter_gets_released_connection():
+    pool, _ = make_pool(max_size=1, timeout=2)
+    conn = pool.getconn()
+
+    def release():
+        time.sleep(0.05)
+        pool.putconn(conn)
+
+    threading.Thread(target=release).start()
+    assert pool.getconn() is conn
+    stats = pool.stats()
+    assert stats["waits"] == 1
+    assert stats["wait_time_max_ms"] > 0
+
+
+def test_pool_replaces_dead_and_expired_connections():
+    pool, opened = make_pool(ping_after=0)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.broken = True
+    replacement = pool.getconn()
+    assert replacement is not conn
+    assert conn.closed
+    assert pool.stats()["ping_failures"] == 1
+    pool.putconn(replacement)
+
+    pool, opened = make_pool(max_lifetime=0.01)
+    conn = pool.getconn()
+    time.sleep(0.02)
+    pool.putconn(conn)
+    assert conn.closed
+    assert pool.stats()["recycled"] == 1
+    assert pool.stats()["size"] == 0
+
+
+def test_pool_warm_opens_min_size():
+    pool, opened = make_pool(min_size=2)
+    pool.warm()
+    stats = pool.stats()
+    assert stats["idle"] == 2
+    assert len(opened) == 2
+
+
+def test_replica_monitor_routes_by_lag():
+    monitor = ReplicaLagMonitor(max_lag=5, interval=60)
+    # Unknown lag is never trusted
+    assert not monitor.usable()
+
+    assert monitor.begin_check()
+    # A second caller does not refresh while the first is checking
+    assert not monitor.begin_check()
+    monitor.record(2.5)
+    assert monitor.usable()
+    # Cached until the interval passes
+    assert not monitor.begin_check()
+
+    monitor.record(12)
+    assert not monitor.usable()
+
+    monitor.record_failure(Exception("could not connect to server"))
+    assert not monitor.usable()
+    assert monitor.stats()["error"] == "could not connect to server"
+
+
+def test_budgeted_db_sets_and_resets_timeouts(monkeypatch):
+    pool, opened = make_pool()
+    monkeypatch.setattr(database, "get_pool", lambda read_only=False: pool)
+
+    dependency = get_budgeted_db("report")
+    gen = dependency()
+    conn = next(gen)
+    assert conn.executed == [database.QUERY_BUDGETS["report"].set_sql]
+    assert not conn.autocommit
+    conn.cursor().execute("SELECT 1")
+    with pytest.raises(StopIteration):
+        next(gen)
+
+    assert conn.executed[-1] == database.RESET_BUDGET_SQL
+    assert conn.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_budget_reset_failure_discards_connection(monkeypatch):
+    pool, opened = make_pool()
+    monkeypatch.setattr(database, "get_pool", lambda read_only=False: pool)
+
+    with database.pooled_connection(budget="agent") as conn:
+        conn.broken = True
+    assert conn.closed
+    assert pool.stats()["size"] == 0
+
+    with pytest.raises(ValueError):
+        get_budgeted_db("overnight")
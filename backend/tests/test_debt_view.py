@@ -0,0 +1,56 @@
+from datetime import date
+from decimal import Decimal
+
+from app.services.debt_view import DEBT_VIEW_QUERIES, build_debt_view_query, map_debt_row
+
+
+def _row(**overrides):
+    row = {
+        "debt_id": 42,
+        "original_account_number": "4111000011112222",
+        "client_reference_number": "CR-1",
+        "original_creditor": "First Bank",
+        "current_creditor": "Elite Portfolio",
+        "date_opened": date(2019, 3, 1),
+        "charge_off_date": date(2021, 6, 30),
+        "principal_balance": Decimal("1200.50"),
+        "fees_costs": None,
+        "amount_due": Decimal("1300.00"),
+        "last_payment_date": None,
+        "last_payment_amount": None,
+        "status": "New",
+        "debtor_id": "0b9e5c1e-0000-4000-8000-000000000001",
+        "first_name": "Jane",
+        "last_name": "Doe",
+        "dob": date(1980, 1, 2),
+        "address_1": "1 Main St",
+        "address_2": None,
+        "city": "Dallas",
+        "state": "TX",
+        "zip_code": "75201",
+        "phone": "2145550100",
+        "mobile_consent": False,
+        "email": "jane@example.com",
+        "ssn_hash": "abc",
+        "do_not_contact": False,
+    }
+    row.update(overrides)
+    return row
+
+
+def test_map_debt_row_matches_response_shape():
+    mapped = map_debt_row(_row())
+    assert mapped["id"] == 42
+    assert mapped["charge_off_date"] == "2021-06-30"
+    assert mapped["principal_balance"] == 1200.5
+    assert mapped["fees_costs"] == 0.0
+    assert mapped["last_payment_date"] is None
+    assert mapped["debtor"]["id"] == "0b9e5c1e-0000-4000-8000-000000000001"
+    assert mapped["debtor"]["dob"] == "1980-01-02"
+
+
+def test_debt_view_queries_are_parameterized():
+    assert "$1" in DEBT_VIEW_QUERIES["by_id"]
+    assert "LIMIT 10" in DEBT_VIEW_QUERIES["search_name"]
+    assert "%s" not in "".join(DEBT_VIEW_QUERIES.values())
+    assert build_debt_view_query("d.id = $1", limit=5).rstrip().endswith("LIMIT 5")
@@ -0,0 +1,98 @@
+import pytest
+
+from app.services import ingest
+from app.services.ingest import CSVImporter
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        self.conn.statements.append((query, params))
+
+    def fetchall(self):
+        return self.conn.select_rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+        self.select_rows = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Debtor upserts hand back an id per hash unless the hash is listed in `hidden`."""
+    calls = {"upserts": [], "debts": [], "debt_sql": [], "hidden": set(), "counts": (0, 0)}
+
+    def execute_values(cur, sql, values, template=None, page_size=100, fetch=False):
+        assert page_size >= len(values)  # one round trip per statement
+        if "INSERT INTO debtors" in sql:
+            calls["upserts"].append([debtor[0] for debtor in values])
+            return [(f"id-{debtor[0]}", debtor[0]) for debtor in values if debtor[0] not in calls["hidden"]]
+        calls["debts"].extend(values)
+        calls["debt_sql"].append(sql)
+        if fetch:
+            return [calls["counts"]]
+
+    monkeypatch.setattr(ingest, "execute_values", execute_values)
+    return calls
+
+
+def _row(ssn_hash, reference):
+    debtor = (ssn_hash,) + (None,) * 11
+    debt = (reference,) + (None,) * 11
+    return debtor, debt
+
+
+def test_repeat_debtors_skip_the_upsert_once_their_batch_commits(database):
+    importer = CSVImporter(None)
+    conn = FakeConnection()
+
+    importer.process_batch(conn, [_row("a", "C-1"), _row("b", "C-2"), _row("a", "C-3")], 7)
+    importer.process_batch(conn, [_row("a", "C-4"), _row("c", "C-5")], 7)
+
+    # One statement resolves every debtor of a batch; "a" is not looked up again
+    assert database["upserts"] == [["a", "b"], ["c"]]
+    assert conn.statements == []
+    assert [debt[0] for debt in database["debts"]] == ["id-a", "id-b", "id-a", "id-a", "id-c"]
+    assert importer.debtor_cache_hits == 1
+
+
+def test_concurrently_inserted_debtors_are_read_back(database):
+    database["hidden"].add("b")
+    importer = CSVImporter(None)
+    conn = FakeConnection()
+    conn.select_rows = [("id-b", "b")]
+
+    importer.process_batch(conn, [_row("a", "C-1"), _row("b", "C-2")], 7)
+
+    (query, params), = conn.statements
+    assert "FROM debtors" in query and params == (["b"],)
+    assert [debt[0] for debt in database["debts"]] == ["id-a", "id-b"]
+
+
+def test_ids_from_a_rolled_back_batch_are_not_cached(database, monkeypatch):
+    importer = CSVImporter(None)
+    conn = FakeConnection()
+    monkeypatch.setattr(ingest, "record_checkpoint", lambda cur, job_id, checkpoint: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        importer.process_batch(conn, [_row("a", "C-1")], 7)
+    assert importer.debtor_ids == {}
+    assert conn.rollbacks == 1
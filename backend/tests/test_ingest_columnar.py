@@ -0,0 +1,156 @@
+import csv
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from app.services import ingest_copy, ingest_errors
+from app.services.ingest import CSVImporter
+from app.services.ingest_columnar import ColumnarTransformer
+from app.services.ingest_sources import ARROW, PARQUET, inspect_placement, sniff_format
+from app.services.object_store import LocalObjectStore
+
+from test_ingest_copy import FakeConnection, _checkpoints
+
+CSV = (
+    "PSSN_SIN,PFName,PLName,PBirthdate,1stZipPostal,1stPhone,mobile_consent,ClientAccountID,"
+    "IssuerAccountNumber,IssuerName,CurrentCreditor,CODate,CurBalance,Principal,LastPayAmount\n"
+    "123456789,Ann,Lee,01/02/1980,90210-1234,(555) 123-4567,TRUE,C-1,A-1,Bank,,2020-03-04,\"$1,200.50\",1000,\n"
+    ",Bo,Tan,2/30/1980,60601,,false,C-2,A-2,Bank,Agency,1/5/2021,300,300,12.5\n"
+    ", cy , RAY ,1975-07-08,,,,C-3,A-3,,,,,,\n"
+    "987654321,Di,Fox,,10001,555 000 1111,,C-4,A-4,Bank,,bad,12x,5,\n"
+)
+
+
+def _table():
+    rows = list(csv.reader(io.StringIO(CSV)))
+    return pa.table({name: [row[i] for row in rows[1:]] for i, name in enumerate(rows[0])})
+
+
+def _row_path():
+    importer = CSVImporter(io.StringIO(CSV))
+    reader = csv.reader(io.StringIO(CSV))
+    transformer = importer.compile_transformer(next(reader))
+    results = []
+    for values in reader:
+        try:
+            results.append(transformer.transform(values))
+        except ValueError as e:
+            results.append(str(e))
+    return results
+
+
+def test_columnar_transform_matches_row_transform():
+    table = _table()
+    transformer = ColumnarTransformer(CSVImporter(io.BytesIO()), table.column_names)
+    rows, errors = transformer.transform(table.to_batches()[0])
+
+    expected = _row_path()
+    assert errors == {3: expected[3]}
+    assert rows[:3] == expected[:3]
+    assert rows[3] is None
+
+
+def test_typed_columns_are_used_directly():
+    batch = pa.record_batch({
+        "PSSN_SIN": ["111223333"],
+        "PBirthdate": pa.array([datetime.date(1980, 1, 2)], pa.date32()),
+        "1stZipPostal": [90210],
+        "mobile_consent": [True],
+        "CODate": pa.array([datetime.datetime(2021, 5, 6, 13, 0)], pa.timestamp("us")),
+        "Principal": pa.array([Decimal("10.25")], pa.decimal128(12, 2)),
+        "CurBalance": [99.5],
+    })
+    rows, errors = ColumnarTransformer(CSVImporter(io.BytesIO()), batch.schema.names).transform(batch)
+    debtor, debt = rows[0]
+    assert errors == {}
+    assert debtor[3] == datetime.date(1980, 1, 2)
+    assert debtor[8] == "90210"
+    assert debtor[10] is True
+    assert debt[5] == datetime.date(2021, 5, 6)
+    assert debt[6] == Decimal("10.25")
+    assert debt[8] == debt[9] == Decimal("99.5")
+
+
+def test_sniff_format():
+    assert sniff_format(b"PAR1\x15\x04") == PARQUET
+    assert sniff_format(b"ARROW1") == ARROW
+    assert sniff_format(b"\xff\xff\xff\xff") == ARROW
+    assert sniff_format(b"PSSN_S") is None
+
+
+def _import(stream, engine, **kwargs):
+    conn = FakeConnection()
+    importer = CSVImporter(stream, job_id="job-1", file_format=PARQUET)
+    importer.get_db = lambda: conn
+    importer.release_db = lambda c: None
+    return importer.process(portfolio_id=7, engine=engine, **kwargs), importer, conn
+
+
+def test_parquet_placement_loads_in_batches_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest_copy, "INGEST_COPY_CHUNK_ROWS", 2)
+    monkeypatch.setattr(ingest_errors, "execute_values", lambda cur, sql, rows: None)
+    store = LocalObjectStore(str(tmp_path))
+    with store.open_write("placements/p.parquet") as f:
+        pq.write_table(_table(), f, row_group_size=2)
+    assert inspect_placement(store, "placements/p.parquet") == (None, PARQUET, [])
+
+    with store.open_read("placements/p.parquet") as raw:
+        count, importer, conn = _import(raw, "copy")
+    assert count == 4
+    # Checkpoint offsets count rows for columnar files
+    assert _checkpoints(conn) == [(2, 2), (4, 4)]
+    assert importer.stats["rows_failed"] == 1
+    staged = [line.split("\t")[0] for chunk in conn.copied for line in chunk.splitlines()]
+    assert staged == ["0", "1", "2"]
+
+    with store.open_read("placements/p.parquet") as raw:
+        count, importer, conn = _import(raw, "copy", resume_from=(2, 2))
+    assert count == 4
+    assert [line.split("\t")[0] for chunk in conn.copied for line in chunk.splitlines()] == ["2"]
+
+
+def test_parquet_batch_engine_rejects_rows_the_database_refuses(tmp_path, monkeypatch):
+    import psycopg2
+
+    buffer = io.BytesIO()
+    pq.write_table(_table(), buffer)
+    buffer.seek(0)
+    importer = CSVImporter(buffer, job_id="job-1", file_format=PARQUET)
+    conn = FakeConnection()
+    importer.get_db = lambda: conn
+    importer.release_db = lambda c: None
+    loaded, rejected = [], []
+
+    def insert_batch(cursor, rows, portfolio_id):
+        if any(debt[0] == "C-2" for _, debt in rows):
+            raise psycopg2.DataError("value too long")
+        loaded.extend(debt[0] for _, debt in rows)
+
+    monkeypatch.setattr(importer, "_insert_batch", insert_batch)
+    monkeypatch.setattr(ingest_errors, "execute_values", lambda cur, sql, rows: rejected.extend(rows))
+    assert importer.process(portfolio_id=7, batch_size=10, engine="batch") == 4
+    assert sorted(loaded) == ["C-1", "C-3"]
+    # (job, row number, line, stage, reason, raw values)
+    assert sorted((row[1], row[3], row[5][7]) for row in rejected) == [(2, "load", "C-2"), (4, "parse", "C-4")]
+    assert rejected[0][2] is None
+
+
+@pytest.mark.parametrize("writer", ["file", "stream"])
+def test_arrow_ipc_reader_skips_to_the_checkpoint(writer):
+    from app.services.ingest_columnar import BatchReader
+
+    table = _table()
+    buffer = io.BytesIO()
+    new_writer = pa.ipc.new_file if writer == "file" else pa.ipc.new_stream
+    with new_writer(buffer, table.schema) as out:
+        out.write_table(table, max_chunksize=3)
+    buffer.seek(0)
+
+    batches = list(BatchReader(buffer, ARROW, batch_rows=2, skip_rows=1))
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert [value for batch in batches for value in batch.column("ClientAccountID").to_pylist()] == ["C-2", "C-3", "C-4"]
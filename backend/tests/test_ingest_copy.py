@@ -0,0 +1,223 @@
+import csv
+import io
+
+import pytest
+from psycopg2 import extensions
+
+from app.services import ingest_copy
+from app.services.ingest import CSVImporter, DEBT_COLUMNS, DEBTOR_COLUMNS, OffsetLineReader, resolve_engine
+from app.services.ingest_copy import CopyStream, STAGE_COLUMNS, copy_field, copy_lines
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        self.conn.statements.append(query)
+        self.conn.params.append(params)
+        self.rowcount = 3 if "INSERT" in query else -1
+
+    def copy_expert(self, query, file, size=8192):
+        chunks = []
+        while True:
+            data = file.read(size)
+            if not data:
+                break
+            chunks.append(data)
+        self.conn.copied.append("".join(chunks))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+        self.params = []
+        self.copied = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+
+CSV = (
+    "PSSN_SIN,PFName,PLName,PBirthdate,1stZipPostal,ClientAccountID,IssuerAccountNumber,CurBalance,Principal\n"
+    "123456789,Ann,Lee,01/02/1980,90210-1234,C-1,A-1,\"$1,200.50\",1000\n"
+    "123456789,Ann,Lee,01/02/1980,90210,C-2,A-2,300,300\n"
+    ",Bo,Tab\tName,,60601,C-3,A-3,,\n"
+)
+
+
+def test_copy_field_escapes_text_format():
+    assert copy_field(None) == "\\N"
+    assert copy_field(True) == "t"
+    assert copy_field("a\tb\\c\nd") == "a\\tb\\\\c\\nd"
+    assert list(copy_lines([(1, None, "x")])) == ["1\t\\N\tx\n"]
+
+
+def test_copy_stream_respects_read_size():
+    stream = CopyStream(iter(["abc\n", "defgh\n", "ij\n"]))
+    assert stream.read(5) == "abc\nd"
+    assert stream.read(100) == "efgh\nij\n"
+    assert stream.read(5) == ""
+
+
+def test_copy_engine_stages_rows_and_merges(monkeypatch):
+    monkeypatch.setattr(ingest_copy, "INGEST_COPY_CHUNK_ROWS", 2)
+    conn = FakeConnection()
+    importer = CSVImporter(io.StringIO(CSV))
+    monkeypatch.setattr(importer, "get_db", lambda: conn)
+    monkeypatch.setattr(importer, "release_db", lambda c: None)
+
+    progress = []
+    assert importer.process(portfolio_id=7, progress_cb=progress.append, engine="copy") == 3
+    assert progress == [2, 3]
+
+    # Two chunks, each staged with one COPY
+    assert len(conn.copied) == 2
+    first = [line.split("\t") for line in conn.copied[0].splitlines()]
+    assert len(first[0]) == len(STAGE_COLUMNS) == 1 + len(DEBTOR_COLUMNS) + len(DEBT_COLUMNS)
+    row = dict(zip(STAGE_COLUMNS, first[0]))
+    assert row["row_num"] == "0"
+    assert row["zip_code"] == "90210"
+    assert row["dob"] == "1980-01-02"
+    assert row["face_value"] == row["amount_due"] == "1200.50"
+    # Both Ann rows share a debtor hash so DISTINCT ON collapses them
+    assert first[0][1] == first[1][1]
+
+    last = dict(zip(STAGE_COLUMNS, conn.copied[1].rstrip("\n").split("\t")))
+    assert last["last_name"] == "Tab\\tName"
+    assert last["dob"] == "\\N"
+
+    statements = "\n".join(conn.statements)
+    assert "CREATE UNLOGGED TABLE" in conn.statements[0]
+    assert "DISTINCT ON (ssn_hash)" in statements
+    assert "ON CONFLICT (portfolio_id, client_reference_number)" in statements
+    assert conn.statements[-1].startswith("DROP TABLE IF EXISTS")
+
+    assert importer.stats["engine"] == "copy"
+    assert importer.stats["chunks"] == 2
+    assert importer.stats["debts_inserted"] == 6
+    assert importer.stats["rows"] == 3
+
+
+def test_offset_line_reader_tracks_record_ends():
+    data = b'a,b\n1,"two\nlines"\n3,x\n'
+    lines = OffsetLineReader(io.BytesIO(data))
+    reader = csv.reader(lines)
+    ends = []
+    for record in reader:
+        ends.append((record, lines.offset))
+    assert ends == [(["a", "b"], 4), (["1", "two\nlines"], 18), (["3", "x"], len(data))]
+
+
+def _checkpoints(conn):
+    return [params[:2] for query, params in zip(conn.statements, conn.params) if "checkpoint_offset" in query]
+
+
+def test_copy_engine_checkpoints_each_chunk_and_resumes(monkeypatch):
+    monkeypatch.setattr(ingest_copy, "INGEST_COPY_CHUNK_ROWS", 2)
+    data = CSV.encode("utf-8")
+    second_row_end = data.index(b"\n", data.index(b"C-2")) + 1
+
+    def run(**kwargs):
+        conn = FakeConnection()
+        importer = CSVImporter(io.BytesIO(data), job_id="job-1")
+        importer.get_db = lambda: conn
+        importer.release_db = lambda c: None
+        count = importer.process(portfolio_id=7, engine="copy", **kwargs)
+        return count, importer, conn
+
+    count, importer, conn = run()
+    assert count == 3
+    assert _checkpoints(conn) == [(second_row_end, 2), (len(data), 3)]
+    assert importer.position == len(data)
+    # Recorded before the chunk's commit, i.e. in the same transaction
+    checkpoint_index = next(i for i, q in enumerate(conn.statements) if "checkpoint_offset" in q)
+    assert "INSERT INTO debts" in conn.statements[checkpoint_index - 1]
+
+    count, importer, conn = run(resume_from=(second_row_end, 2))
+    assert count == 3
+    assert importer.stats["rows"] == 3
+    staged = [line.split("\t") for chunk in conn.copied for line in chunk.splitlines()]
+    assert [row[0] for row in staged] == ["2"]
+    assert _checkpoints(conn) == [(len(data), 3)]
+
+
+def test_resume_needs_a_binary_stream():
+    with pytest.raises(ValueError):
+        CSVImporter(io.StringIO(CSV)).process(portfolio_id=1, engine="copy", resume_from=(10, 1))
+
+
+def test_resolve_engine(monkeypatch):
+    monkeypatch.setenv("INGEST_ENGINE", "COPY")
+    assert resolve_engine() == "copy"
+    assert resolve_engine("batch") == "batch"
+    with pytest.raises(ValueError):
+        resolve_engine("parquet")
+
+
+def _write_csv(tmp_path, rows=40):
+    lines = ["PSSN_SIN,PFName,PLName,1stZipPostal,ClientAccountID,IssuerAccountNumber,CurBalance"]
+    for i in range(rows):
+        # Debtor 1000 + i % 7 repeats across ranges
+        lines.append(f"{1000 + i % 7},First{i % 7},Last,90210,C-{i},A-{i},{i}.25")
+    path = tmp_path / "placement.csv"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_split_ranges_are_line_aligned(tmp_path):
+    from app.services.ingest_parallel import read_header, split_ranges
+
+    path = _write_csv(tmp_path)
+    headers, start = read_header(path)
+    assert headers[0] == "PSSN_SIN"
+    ranges = split_ranges(path, start, chunk_bytes=100)
+    assert len(ranges) > 3
+    data = open(path, "rb").read()
+    assert ranges[0][0] == start and ranges[-1][1] == len(data)
+    for (_, end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert end == next_start
+        assert data[end - 1:end] == b"\n"
+
+
+def test_parallel_engine_matches_copy_engine(tmp_path, monkeypatch):
+    path = _write_csv(tmp_path)
+    monkeypatch.setattr(ingest_copy, "INGEST_COPY_CHUNK_ROWS", 1000)
+
+    def run(engine, **kwargs):
+        conn = FakeConnection()
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            importer = CSVImporter(f)
+            importer.get_db = lambda: conn
+            importer.release_db = lambda c: None
+            count = importer.process(portfolio_id=1, engine=engine, **kwargs)
+        staged = [line.split("\t") for chunk in conn.copied for line in chunk.splitlines()]
+        return count, importer, staged
+
+    from app.services import ingest_parallel
+
+    monkeypatch.setattr(ingest_parallel, "INGEST_PARALLEL_CHUNK_BYTES", 200)
+    copy_count, _, copy_rows = run("copy")
+    parallel_count, importer, parallel_rows = run("parallel", workers=2)
+
+    assert parallel_count == copy_count == 40
+    assert importer.stats["workers"] == 2
+    assert importer.stats["ranges"] > 1
+    # Same staged values in the same order; row_num is only required to be increasing
+    assert [row[1:] for row in parallel_rows] == [row[1:] for row in copy_rows]
+    row_nums = [int(row[0]) for row in parallel_rows]
+    assert row_nums == sorted(row_nums)
@@ -0,0 +1,78 @@
+from app.services.ingest import CSVImporter
+from app.services.ingest_copy import CopyStagingLoader
+from app.services.ingest_delta import DELTA_CONFLICT_SQL, DeltaTracker, content_hash_sql
+
+from test_ingest_batch import FakeConnection, _row, database  # noqa: F401
+
+
+def test_changed_accounts_update_only_when_their_hash_differs():
+    assert "WHERE debts.content_hash IS DISTINCT FROM EXCLUDED.content_hash" in DELTA_CONFLICT_SQL
+    # Payments already taken off amount_due survive a new placed balance
+    assert "amount_due = debts.amount_due + (EXCLUDED.face_value - " in DELTA_CONFLICT_SQL
+    assert "status" not in DELTA_CONFLICT_SQL and "last_payment" not in DELTA_CONFLICT_SQL
+    assert content_hash_sql("s").startswith("debt_content_hash(s.original_account_number, ")
+
+
+def test_batch_engine_counts_new_changed_and_unchanged(database):
+    database["counts"] = (1, 1)
+    importer = CSVImporter(None, job_id="job-1")
+    importer.delta = DeltaTracker("job-1")
+    conn = FakeConnection()
+
+    rows = [_row("a", "C-1"), _row("b", "C-2"), _row("c", "C-3"), _row("a", "C-1"), _row("d", None)]
+    importer.process_batch(conn, rows, 7)
+
+    assert "DO UPDATE SET" in database["debt_sql"][0] and "FROM upserted" in database["debt_sql"][0]
+    # The repeated C-1 is sent once (its last row); the row without a reference is its own account
+    assert [debt[2] for debt in database["debts"]] == ["C-1", "C-2", "C-3", None]
+    assert database["debts"][0][0] == "id-a"
+    assert importer.delta.counts == {"new": 1, "changed": 1, "unchanged": 2}
+    assert importer.delta.references == {"C-1", "C-2", "C-3"}
+    (query, params), = [statement for statement in conn.statements if "debts_new" in statement[0]]
+    assert params == (1, 1, 2, "job-1")
+
+
+def test_plain_import_still_skips_existing_accounts(database):
+    importer = CSVImporter(None)
+    importer.process_batch(FakeConnection(), [_row("a", "C-1"), _row("a", "C-1")], 7)
+
+    sql = database["debt_sql"][0]
+    assert "DO NOTHING" in sql and "content_hash" in sql
+    assert len(database["debts"]) == 2
+
+
+class CopyCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        self.conn.statements.append(query)
+
+    def copy_expert(self, query, file, size=8192):
+        while file.read(size):
+            pass
+
+    def fetchone(self):
+        return (2, 1)
+
+    def close(self):
+        pass
+
+
+def test_copy_engine_upserts_one_staged_row_per_reference():
+    conn = FakeConnection()
+    conn.cursor = lambda: CopyCursor(conn)
+    delta = DeltaTracker()
+    loader = CopyStagingLoader(conn, 7, delta=delta)
+
+    rows = [(i,) + debtor + debt for i, (debtor, debt) in
+            enumerate([_row("a", "C-1"), _row("b", "C-1"), _row("c", "C-2"), _row("d", None), _row("e", None)])]
+    loader.load(rows)
+
+    upsert = next(query for query in conn.statements if "INSERT INTO debts" in query)
+    assert "DISTINCT ON (s.client_reference_number, CASE WHEN s.client_reference_number IS NULL" in upsert
+    assert "s.row_num DESC" in upsert
+    # Accounts: C-1, C-2 and two without a reference
+    assert delta.counts == {"new": 2, "changed": 1, "unchanged": 1}
+    assert loader.stats["debts_inserted"] == 2
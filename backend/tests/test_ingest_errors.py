@@ -0,0 +1,109 @@
+import io
+
+import psycopg2
+import pytest
+
+from app.services import ingest_copy, ingest_errors
+from app.services.ingest import CSVImporter, DEBT_COLUMNS, DEBTOR_COLUMNS
+from app.services.ingest_errors import RejectCollector, TooManyRejects, load_isolating
+
+from test_ingest_copy import FakeConnection
+
+ACCOUNT = 1 + len(DEBTOR_COLUMNS) + DEBT_COLUMNS.index("original_account_number")
+
+CSV = (
+    "PSSN_SIN,PFName,PLName,ClientAccountID,IssuerAccountNumber,Principal\n"
+    "100000001,Ann,Lee,C-1,A-1,100\n"
+    "100000002,Bo,Tan,C-2,A-2,12x\n"
+    "100000003,Cy,Ray,C-3,,300\n"
+    "100000004,Di,Fox,C-4,A-4,400\n"
+    "100000005,Ed,Hill,C-5,A-5,500\n"
+)
+
+
+@pytest.fixture
+def written_rejects(monkeypatch):
+    written = []
+    monkeypatch.setattr(ingest_errors, "execute_values", lambda cur, sql, rows: written.extend(rows))
+    return written
+
+
+def test_load_isolating_bisects_out_bad_rows():
+    conn = FakeConnection()
+    cur = conn.cursor()
+    loaded, rejected = [], []
+
+    def insert(items):
+        if any(item % 5 == 0 for item in items):
+            raise psycopg2.DataError("invalid input syntax for type numeric")
+        loaded.append(list(items))
+
+    load_isolating(conn, cur, list(range(1, 17)), insert, lambda item, reason: rejected.append((item, reason)))
+
+    assert rejected == [(5, "invalid input syntax for type numeric"), (10, "invalid input syntax for type numeric"),
+                        (15, "invalid input syntax for type numeric")]
+    assert sorted(item for part in loaded for item in part) == [i for i in range(1, 17) if i % 5]
+    # Good rows still go in slices, not one by one
+    assert len(loaded) < 10
+    assert conn.statements.count("SAVEPOINT ingest_rows") == conn.statements.count("RELEASE SAVEPOINT ingest_rows")
+
+
+def test_load_isolating_fast_path_uses_no_savepoints():
+    conn = FakeConnection()
+    load_isolating(conn, conn.cursor(), [1, 2, 3], lambda items: None, lambda item, reason: None)
+    assert conn.statements == []
+
+
+def test_batch_engine_rejects_bad_rows_and_loads_the_rest(monkeypatch, written_rejects):
+    conn = FakeConnection()
+    importer = CSVImporter(io.BytesIO(CSV.encode()), job_id="job-1")
+    importer.get_db = lambda: conn
+    importer.release_db = lambda c: None
+    loaded = []
+
+    def insert_batch(cursor, rows, portfolio_id):
+        if any(not debt[1] for _, debt in rows):
+            raise psycopg2.IntegrityError('null value in column "original_account_number" violates not-null constraint')
+        loaded.extend(debt[0] for _, debt in rows)
+
+    monkeypatch.setattr(importer, "_insert_batch", insert_batch)
+    assert importer.process(portfolio_id=1, batch_size=10, engine="batch") == 5
+
+    assert sorted(loaded) == ["C-1", "C-4", "C-5"]
+    assert importer.stats["rows_failed"] == 2
+    rejects = {row[1]: row for row in written_rejects}
+    job_id, row_number, line_number, stage, reason, raw = rejects[2]
+    assert (job_id, line_number, stage, reason) == ("job-1", 3, "parse", "Invalid amount '12x'")
+    assert raw == ["100000002", "Bo", "Tan", "C-2", "A-2", "12x"]
+    assert rejects[3][3] == "load" and "not-null" in rejects[3][4]
+    assert rejects[3][5][4] == ""
+    assert any("rows_failed = COALESCE" in q for q in conn.statements)
+
+
+def test_copy_engine_rejects_rows_the_database_refuses(monkeypatch, written_rejects):
+    merged = []
+
+    def merge(self, cur, rows, analyze=True):
+        if any(row[ACCOUNT] == "" for row in rows):
+            raise psycopg2.DataError("value violates check constraint")
+        merged.extend(row[0] for row in rows)
+        return len(rows), len(rows)
+
+    monkeypatch.setattr(ingest_copy.CopyStagingLoader, "_merge", merge)
+    conn = FakeConnection()
+    importer = CSVImporter(io.BytesIO(CSV.encode()), job_id="job-2")
+    importer.get_db = lambda: conn
+    importer.release_db = lambda c: None
+
+    assert importer.process(portfolio_id=1, engine="copy") == 5
+    assert sorted(merged) == [0, 3, 4]
+    assert importer.stats["debts_inserted"] == 3
+    assert sorted((row[1], row[3]) for row in written_rejects) == [(2, "parse"), (3, "load")]
+
+
+def test_reject_limit_stops_the_import():
+    rejects = RejectCollector(max_rejects=2)
+    rejects.add(1, 2, ["a"], "bad", "parse")
+    rejects.add(2, 3, ["b"], "bad", "parse")
+    with pytest.raises(TooManyRejects):
+        rejects.add(3, 4, ["c"], "bad", "parse")
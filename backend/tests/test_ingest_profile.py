@@ -0,0 +1,101 @@
+import contextlib
+import io
+
+from app.services import ingest_profile
+from app.services.ingest import CSVImporter
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+
+    def execute(self, query, params=None):
+        self.conn.queries.append(query)
+        if "FROM debtors" in query:
+            self.result = [(h,) for h in params[0] if h in self.conn.debtors]
+        else:
+            self.result = [(sum(1 for ref in params[1] if ref in self.conn.references),)]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Read-only stand-in: knows some debtors and some portfolio references."""
+
+    def __init__(self, debtors=(), references=()):
+        self.debtors = set(debtors)
+        self.references = set(references)
+        self.queries = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+CSV = (
+    "PSSN_SIN,PFName,PLName,PBirthdate,ClientAccountID,CODate,CurBalance,Principal\n"
+    "123456789,Ann,Lee,01/02/1980,C-1,2020-03-04,\"$1,200.50\",1000\n"
+    "123456789,Ann,Lee,13/45/1980,C-2,,300,300\n"
+    "222334444,Bo,Tan,,C-2,soon,50,50\n"
+    "555667777,Cy,Ray,,C-3,,12x,5\n"
+    "555667777,Cy,Ray,,,,1,1\n"
+)
+
+
+def _profile(conn, **kwargs):
+    importer = CSVImporter(io.BytesIO(CSV.encode("utf-8")), **kwargs)
+    importer.read_db = lambda: contextlib.nullcontext(conn)
+    return importer.profile(portfolio_id=7), importer
+
+
+def test_profile_counts_keys_dates_and_totals_without_writing():
+    existing = CSVImporter(io.BytesIO()).hash_ssn("123456789")
+    conn = FakeConnection(debtors={existing}, references={"C-1"})
+    profile, importer = _profile(conn)
+
+    assert profile["rows"] == 5
+    assert profile["rows_failed"] == 1
+    assert profile["errors"] == [{"row_number": 4, "reason": "Invalid amount '12x'"}]
+    assert profile["debtors"] == {"distinct": 3, "existing": 1, "new": 2, "rows_existing": 2, "rows_new": 2}
+    assert profile["debts"] == {
+        "would_insert": 2, "existing_reference": 1, "duplicate_reference": 1, "missing_reference": 0,
+    }
+    assert profile["invalid_dates"] == {"dob": 1, "date_opened": 0, "charge_off_date": 1, "last_payment_date": 0}
+    assert profile["totals"]["face_value"] == "1551.50"
+    assert profile["totals"]["principal_balance"] == "1351.00"
+    assert importer.stats["engine"] == "profile"
+    # Reads only, and one lookup per key type for a file under INGEST_PROFILE_LOOKUP_ROWS keys
+    assert conn.commits == 0
+    assert all(query.lstrip().startswith("SELECT") for query in conn.queries)
+    assert profile["lookups"] == 2
+
+
+def test_profile_looks_keys_up_in_slices(monkeypatch):
+    monkeypatch.setattr(ingest_profile, "INGEST_PROFILE_LOOKUP_ROWS", 2)
+    conn = FakeConnection()
+    importer = CSVImporter(io.BytesIO(CSV.encode("utf-8")))
+    importer.read_db = lambda: contextlib.nullcontext(conn)
+    progress = []
+    profiler = ingest_profile.PlacementProfiler(conn, 7, lookup_rows=2)
+    ingest_profile._profile_csv(importer, profiler, progress_cb=progress.append)
+    profile = profiler.result()
+
+    # A debtor already looked up is not looked up again
+    debtor_lookups = [query for query in conn.queries if "FROM debtors" in query]
+    assert len(debtor_lookups) == 2
+    assert profile["debtors"]["rows_new"] == 4
+    assert progress == [2]
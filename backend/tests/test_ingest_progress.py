@@ -0,0 +1,122 @@
+import asyncio
+import contextlib
+
+from psycopg2 import extensions
+
+from app.core import database
+from app.services.ingest_progress import IngestProgressReporter, ProgressBroker
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        self.conn.executed.append(params)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, status=extensions.TRANSACTION_STATUS_IDLE):
+        self.executed = []
+        self.commits = 0
+        self.status = status
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return self.status
+
+
+class FakeImporter:
+    def __init__(self, conn):
+        self.conn = conn
+        self.position = None
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_reporter_throttles_and_reuses_job_connection():
+    conn = FakeConnection()
+    clock = Clock()
+    reporter = IngestProgressReporter("job-1", total_bytes=1900, interval=2.0, clock=clock)
+    reporter.bind(FakeImporter(conn))
+
+    for rows in range(100, 1100, 100):
+        clock.now += 0.5
+        reporter.importer.position = rows
+        reporter(rows)
+
+    # 10 batches over 5 seconds, at most one write per 2 seconds
+    assert reporter.writes == 3
+    assert conn.commits == 3
+    rows, position, rate, eta = conn.executed[-1][:4]
+    assert (rows, position) == (900, 900)
+    assert rate == 200.0
+    assert eta == 5  # 1000 bytes left at 900 bytes per 4.5 seconds
+
+
+def test_reporter_uses_side_connection_while_job_connection_is_busy(monkeypatch):
+    busy = FakeConnection(status=extensions.TRANSACTION_STATUS_INTRANS)
+    side = FakeConnection()
+
+    @contextlib.contextmanager
+    def fake_pooled_connection(*args, **kwargs):
+        yield side
+
+    monkeypatch.setattr(database, "pooled_connection", fake_pooled_connection)
+    reporter = IngestProgressReporter("job-2", position_fn=lambda: 10, clock=Clock())
+    reporter.bind(FakeImporter(busy))
+    reporter(50)
+
+    assert busy.executed == []
+    assert side.commits == 1
+    assert side.executed[0][:2] == (50, 10)
+
+
+def test_reporter_survives_write_failures(monkeypatch):
+    class BrokenConnection(FakeConnection):
+        def cursor(self):
+            raise RuntimeError("server closed the connection")
+
+    reporter = IngestProgressReporter("job-3", clock=Clock()).bind(FakeImporter(BrokenConnection()))
+    reporter(10)
+    assert reporter.writes == 1
+
+
+def test_broker_fans_out_latest_state_per_job():
+    async def run():
+        broker = ProgressBroker()
+
+        async def no_listener():
+            pass
+
+        broker._ensure_listener = no_listener
+        first = await broker.subscribe("a")
+        second = await broker.subscribe("a")
+        other = await broker.subscribe("b")
+
+        broker._on_notify(None, 1, "ingest_progress", '{"id": "a", "rows_processed": 5}')
+        broker.unsubscribe("a", second)
+        broker._on_notify(None, 1, "ingest_progress", '{"id": "a", "rows_processed": 9}')
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert [first.get_nowait()["rows_processed"], first.get_nowait()["rows_processed"]] == [5, 9]
+    assert second.qsize() == 1
+    assert other.empty()
@@ -0,0 +1,113 @@
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from app.services import ingest_copy
+from app.services.ingest import CSVImporter
+from app.services.ingest_sources import GZIP, ZIP, ZSTD, inspect_placement, open_placement, sniff_compression
+from app.services.object_store import LocalObjectStore
+
+from test_ingest_copy import CSV, FakeConnection, _checkpoints
+
+
+def _store(tmp_path, key, data):
+    store = LocalObjectStore(str(tmp_path))
+    with store.open_write(key) as f:
+        f.write(data)
+    return store
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _import(stream, **kwargs):
+    conn = FakeConnection()
+    importer = CSVImporter(stream, job_id="job-1")
+    importer.get_db = lambda: conn
+    importer.release_db = lambda c: None
+    return importer.process(portfolio_id=7, engine="copy", **kwargs), conn
+
+
+def test_sniff_compression_reads_content_not_extension():
+    assert sniff_compression(gzip.compress(b"a,b\n")[:4]) == GZIP
+    assert sniff_compression(_zip({"a.csv": "x"})[:4]) == ZIP
+    assert sniff_compression(b"\x28\xb5\x2f\xfd") == ZSTD
+    assert sniff_compression(b"PSSN") is None
+
+
+def test_gzip_placement_streams_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest_copy, "INGEST_COPY_CHUNK_ROWS", 2)
+    data = CSV.encode("utf-8")
+    store = _store(tmp_path, "placements/p.csv.gz", gzip.compress(data))
+    assert inspect_placement(store, "placements/p.csv.gz") == (GZIP, None, [])
+
+    with open_placement(store, "placements/p.csv.gz", GZIP) as (stream, total, position_fn):
+        count, conn = _import(stream)
+        assert total == store.size("placements/p.csv.gz")
+        assert 0 < position_fn() <= total
+    assert count == 3
+    # Checkpoints count decompressed bytes
+    assert _checkpoints(conn)[-1] == (len(data), 3)
+
+    second_row_end = data.index(b"\n", data.index(b"C-2")) + 1
+    with open_placement(store, "placements/p.csv.gz", GZIP) as (stream, total, position_fn):
+        count, conn = _import(stream, resume_from=(second_row_end, 2))
+    assert count == 3
+    assert [line.split("\t")[0] for chunk in conn.copied for line in chunk.splitlines()] == ["2"]
+
+
+def test_zstd_placement_streams_and_resumes(tmp_path, monkeypatch):
+    zstandard = pytest.importorskip("zstandard")
+    monkeypatch.setattr(ingest_copy, "INGEST_COPY_CHUNK_ROWS", 2)
+    data = CSV.encode("utf-8")
+    store = _store(tmp_path, "placements/p.csv.zst", zstandard.ZstdCompressor().compress(data))
+    assert inspect_placement(store, "placements/p.csv.zst") == (ZSTD, None, [])
+
+    with open_placement(store, "placements/p.csv.zst", ZSTD) as (stream, total, position_fn):
+        count, conn = _import(stream)
+    assert count == 3
+    assert _checkpoints(conn)[-1] == (len(data), 3)
+
+    second_row_end = data.index(b"\n", data.index(b"C-2")) + 1
+    with open_placement(store, "placements/p.csv.zst", ZSTD) as (stream, total, position_fn):
+        count, conn = _import(stream, resume_from=(second_row_end, 2))
+    assert count == 3
+    assert [line.split("\t")[0] for chunk in conn.copied for line in chunk.splitlines()] == ["2"]
+
+    with open_placement(store, "placements/p.csv.zst", ZSTD) as (stream, total, position_fn):
+        stream.seek(second_row_end)
+        with pytest.raises(io.UnsupportedOperation):
+            stream.seek(0)
+
+
+def test_zip_members_are_listed_and_read_one_at_a_time(tmp_path):
+    archive = _zip({
+        "march.csv": CSV,
+        "april/APRIL.CSV": CSV.splitlines(keepends=True)[0] + CSV.splitlines(keepends=True)[1],
+        "__MACOSX/._march.csv": "junk",
+        "readme.txt": "not a placement",
+    })
+    store = _store(tmp_path, "placements/p.zip", archive)
+
+    compression, _, members = inspect_placement(store, "placements/p.zip")
+    assert compression == ZIP
+    assert [name for name, _ in members] == ["march.csv", "april/APRIL.CSV"]
+
+    with open_placement(store, "placements/p.zip", ZIP, "april/APRIL.CSV") as (stream, total, position_fn):
+        count, _ = _import(stream)
+        assert position_fn is None
+        assert total == members[1][1]
+    assert count == 1
+
+
+def test_zip_without_csv_members_is_refused(tmp_path):
+    store = _store(tmp_path, "placements/p.zip", _zip({"readme.txt": "x"}))
+    with pytest.raises(ValueError):
+        inspect_placement(store, "placements/p.zip")
@@ -0,0 +1,50 @@
+import hashlib
+from datetime import date
+from decimal import Decimal
+
+from app.services.ingest import CSVImporter, DEBT_COLUMNS, DEBTOR_COLUMNS, parse_date, parse_money
+
+
+def compile(headers):
+    return CSVImporter(None).compile_transformer(headers)
+
+
+def test_transformer_maps_client_headers_by_position():
+    transformer = compile(["ClientAccountID", "PFName", "PLName", "PSSN_SIN", "1stZipPostal", "CurBalance", "CODate"])
+    debtor, debt = transformer.transform(["C-9", "Ann", "Lee", "123456789", "90210-1111", "$1,000.10", "3/4/2021"])
+
+    assert len(debtor) == len(DEBTOR_COLUMNS) and len(debt) == len(DEBT_COLUMNS)
+    row = dict(zip(DEBTOR_COLUMNS, debtor))
+    assert row["ssn_hash"] == hashlib.sha256(b"123456789").hexdigest()
+    assert row["zip_code"] == "90210"
+    assert row["mobile_consent"] is False
+    loan = dict(zip(DEBT_COLUMNS, debt))
+    assert loan["client_reference_number"] == "C-9"
+    assert loan["face_value"] == loan["amount_due"] == Decimal("1000.10")
+    assert loan["fees_costs"] == Decimal("0.00")
+    assert loan["charge_off_date"] == date(2021, 3, 4)
+
+
+def test_transformer_handles_duplicates_short_rows_and_missing_ssn():
+    # Both creditor headers normalize to current_creditor: the later column wins
+    transformer = compile(["CurrentCreditor", "CurrentCreditorName", "IssuerName", "PFName", "PLName", "PBirthdate"])
+    debtor, debt = transformer.transform(["Old Co", "New Co", "Issuer", " Bo ", "Tab"])
+
+    assert dict(zip(DEBT_COLUMNS, debt))["current_creditor"] == "New Co"
+    row = dict(zip(DEBTOR_COLUMNS, debtor))
+    assert row["dob"] is None
+    # Same deterministic fallback seed as before: first|last|dob|zip
+    assert row["ssn_hash"] == hashlib.sha256(b"bo|tab||").hexdigest()
+
+    _, debt = transformer.transform(["", "", "Issuer"])
+    assert dict(zip(DEBT_COLUMNS, debt))["current_creditor"] == "Issuer"
+
+
+def test_parsers_are_memoized():
+    parse_date.cache_clear()
+    for _ in range(3):
+        assert parse_date("01/02/2020") == date(2020, 1, 2)
+    assert parse_date("2020-13-45") is None
+    assert parse_date.cache_info().hits == 2
+    assert parse_money("$2,500.00") == Decimal("2500.00")
+    assert parse_money("") == Decimal("0.00")
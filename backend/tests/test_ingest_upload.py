@@ -0,0 +1,88 @@
+import os
+import zipfile
+from contextlib import contextmanager
+
+import pytest
+
+from app.routers import ingest as ingest_router
+from app.services.object_store import LocalObjectStore, StoredObject
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if self.conn.fail:
+            raise RuntimeError("insert failed")
+
+    def fetchone(self):
+        return ("job-1",)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def _stored(tmp_path, data=b"SSN,Name\n1,A\n"):
+    store = LocalObjectStore(str(tmp_path))
+    with store.open_write("placements/p.csv") as f:
+        f.write(data)
+    return store, StoredObject(key="placements/p.csv", size=len(data), sha256="0" * 64)
+
+
+def _use(monkeypatch, conn):
+    @contextmanager
+    def pooled_connection():
+        yield conn
+
+    monkeypatch.setattr(ingest_router, "pooled_connection", pooled_connection)
+    monkeypatch.setattr(ingest_router.job_queue, "enqueue", lambda cur, task, payload: 1)
+
+
+def test_a_failed_job_insert_removes_the_stored_object(tmp_path, monkeypatch):
+    conn = FakeConnection(fail=True)
+    _use(monkeypatch, conn)
+    store, stored = _stored(tmp_path)
+
+    with pytest.raises(RuntimeError):
+        ingest_router._queue_ingest_job(stored, store, "p.csv", 7, "copy", None)
+
+    assert conn.rollbacks == 1
+    assert not os.path.exists(store.local_path(stored.key))
+
+
+def test_an_unreadable_archive_removes_the_stored_object(tmp_path, monkeypatch):
+    _use(monkeypatch, FakeConnection())
+    store, stored = _stored(tmp_path, b"PK\x03\x04 not really a zip")
+
+    with pytest.raises((ValueError, zipfile.BadZipFile)):
+        ingest_router._queue_ingest_job(stored, store, "p.zip", 7, "copy", None)
+
+    assert not os.path.exists(store.local_path(stored.key))
+
+
+def test_a_queued_job_keeps_the_stored_object(tmp_path, monkeypatch):
+    conn = FakeConnection()
+    _use(monkeypatch, conn)
+    store, stored = _stored(tmp_path)
+
+    result = ingest_router._queue_ingest_job(stored, store, "p.csv", 7, "copy", None)
+
+    assert result["job_id"] == "job-1" and conn.commits == 1
+    assert os.path.exists(store.local_path(stored.key))
@@ -0,0 +1,133 @@
+import contextlib
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core import database
+from app.services import job_queue
+from app.services.job_queue import Job
+from app.services.scheduled_runner import enqueue_due_payment_runs
+from app.worker import parse_queues
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 1
+
+    def execute(self, query, params=None):
+        self.conn.executed.append((" ".join(query.split()), params))
+
+    def fetchone(self):
+        return self.conn.results.pop(0) if self.conn.results else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, results=None):
+        self.executed = []
+        self.results = list(results or [])
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def pooled(monkeypatch):
+    conn = FakeConnection()
+
+    @contextlib.contextmanager
+    def fake_pooled_connection(*args, **kwargs):
+        yield conn
+
+    monkeypatch.setattr(database, "pooled_connection", fake_pooled_connection)
+    return conn
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    monkeypatch.setattr(job_queue, "_tasks", dict(job_queue._tasks))
+    calls = []
+
+    @job_queue.task("test:echo", queue="tests", priority=5, max_attempts=2)
+    def echo(value, fail=False):
+        calls.append((value, job_queue.current_job()))
+        if fail:
+            raise RuntimeError("gateway down")
+
+    return calls
+
+
+def test_enqueue_uses_task_defaults_and_dedupes(registered):
+    conn = FakeConnection(results=[(41,), None])
+    cur = conn.cursor()
+
+    assert job_queue.enqueue(cur, "test:echo", {"value": 1}) == 41
+    assert job_queue.enqueue(cur, "test:echo", {"value": 1}, dedupe_key="once") is None
+    query, params = conn.executed[0]
+    assert "ON CONFLICT (dedupe_key) DO NOTHING" in query
+    assert params == ("tests", "test:echo", '{"value": 1}', 5, 2, None, None)
+
+    with pytest.raises(ValueError):
+        job_queue.enqueue(cur, "test:missing")
+
+
+def test_run_job_passes_payload_and_completes(registered, pooled):
+    job_queue.run_job(Job(7, "test:echo", {"value": "a"}, 1, 2), "w1")
+
+    assert registered[0][0] == "a"
+    assert registered[0][1].id == 7
+    assert job_queue.current_job() is None
+    query, params = pooled.executed[-1]
+    assert "status = 'completed'" in query and params == (7, "w1")
+
+
+def test_failed_job_is_retried_with_backoff_then_fails(registered, pooled):
+    job_queue.run_job(Job(8, "test:echo", {"value": "b", "fail": True}, 1, 2), "w1")
+    query, params = pooled.executed[-1]
+    assert "status = 'queued'" in query
+    assert params[0] == job_queue.retry_delay(1)
+    assert "gateway down" in params[1]
+
+    job_queue.run_job(Job(8, "test:echo", {"value": "b", "fail": True}, 2, 2), "w1")
+    query, params = pooled.executed[-1]
+    assert "status = 'failed'" in query
+
+
+def test_job_reclaimed_past_its_attempts_is_not_run(registered, pooled):
+    job_queue.run_job(Job(9, "test:echo", {"value": "c"}, 3, 2), "w1")
+    assert registered == []
+    assert "status = 'failed'" in pooled.executed[-1][0]
+
+
+def test_retry_delay_is_capped():
+    assert job_queue.retry_delay(1) < job_queue.retry_delay(2) < job_queue.retry_delay(3)
+    assert job_queue.retry_delay(50) == job_queue.JOB_QUEUE_RETRY_MAX
+
+
+def test_payment_runs_are_queued_once_per_open_window():
+    conn = FakeConnection(results=[(1,)])
+    # 12:00 CT: the am window is open, the pm window is not
+    queued = enqueue_due_payment_runs(conn.cursor(), datetime(2026, 10, 17, 17, 0, tzinfo=timezone.utc))
+
+    assert queued == ["am"]
+    (query, params), = conn.executed
+    assert params[1] == "scheduled_payments"
+    assert params[-1] == "scheduled_payments:2026-10-17:am"
+
+
+def test_parse_queues():
+    assert parse_queues("ingest:1, campaigns:2,default") == {"ingest": 1, "campaigns": 2, "default": 1}
+    with pytest.raises(ValueError):
+        parse_queues("ingest:0")
+    with pytest.raises(ValueError):
+        parse_queues(" , ")
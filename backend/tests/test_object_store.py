@@ -0,0 +1,55 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+
+from app.services.object_store import LocalObjectStore, iter_upload, new_object_key, save_stream
+
+
+class FakeUpload:
+    def __init__(self, data: bytes, fail_after: int = None):
+        self.buffer = io.BytesIO(data)
+        self.reads = 0
+        self.fail_after = fail_after
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        if self.fail_after is not None and self.reads > self.fail_after:
+            raise ConnectionResetError("client went away")
+        return self.buffer.read(size)
+
+
+def test_save_stream_hashes_in_chunks(tmp_path):
+    data = b"PSSN_SIN,PFName\n" + b"123456789,Ann\n" * 5000
+    store = LocalObjectStore(str(tmp_path))
+    upload = FakeUpload(data)
+
+    stored = asyncio.run(save_stream(store, "placements/a.csv", iter_upload(upload, chunk_bytes=4096)))
+
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert upload.reads > len(data) // 4096
+    with store.open_read("placements/a.csv") as f:
+        assert f.read() == data
+
+
+def test_failed_upload_removes_partial_object(tmp_path):
+    store = LocalObjectStore(str(tmp_path))
+    upload = FakeUpload(b"x" * 10000, fail_after=2)
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(save_stream(store, "placements/b.csv", iter_upload(upload, chunk_bytes=1024)))
+    assert not (tmp_path / "placements" / "b.csv").exists()
+
+
+def test_local_store_rejects_keys_outside_root(tmp_path):
+    store = LocalObjectStore(str(tmp_path / "root"))
+    with pytest.raises(ValueError):
+        store.local_path("../escape.csv")
+
+
+def test_object_keys_are_unique_and_keep_extension():
+    first, second = new_object_key("../../Portfolio A.csv"), new_object_key("Portfolio A.csv")
+    assert first != second
+    assert first.startswith("placements/Portfolio A_") and first.endswith(".csv")
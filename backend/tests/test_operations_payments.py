@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers import operations
+from app.services.usa_epay import USAePayOutcomeUnknown
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+
+    def execute(self, query, params=None):
+        self.db.executed.append((" ".join(query.split()), params))
+
+    def fetchone(self):
+        return dict(self.db.row) if self.db.row else None
+
+    def close(self):
+        pass
+
+
+class FakeDB:
+    def __init__(self, row=None):
+        self.row = row
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def statements(self, prefix):
+        return [(query, params) for query, params in self.executed if query.startswith(prefix)]
+
+
+class NoAnswerManager:
+    def __init__(self, cursor=None, status_code=None):
+        self.status_code = status_code
+        self.calls = []
+
+    def execute_payment(self, **kwargs):
+        self.calls.append(kwargs)
+        raise USAePayOutcomeUnknown("POST /transactions got no answer", status_code=self.status_code)
+
+
+INSTALLMENT = {
+    "id": 9, "amount": Decimal("25.00"), "status": "pending", "due_date": "2026-10-17", "attempt_count": 0,
+    "debt_id": 3, "card_token": "tok",
+}
+
+
+def _unverified(db):
+    return db.statements("UPDATE scheduled_payments SET status = 'unverified'")
+
+
+def test_auto_run_parks_an_installment_with_no_answer():
+    db = FakeDB()
+    manager = NoAnswerManager()
+
+    operations._auto_run_installment(db.cursor(), manager, 3, Decimal("25.00"), "tok", 9)
+
+    assert manager.calls[0]["scheduled_payment_id"] == 9
+    (query, params), = _unverified(db)
+    assert query.endswith("WHERE id = %s") and params[-1] == 9
+
+
+def test_auto_run_leaves_other_failures_to_the_plan(caplog):
+    db = FakeDB()
+
+    class FailingManager(NoAnswerManager):
+        def execute_payment(self, **kwargs):
+            raise RuntimeError("card expired")
+
+    operations._auto_run_installment(db.cursor(), FailingManager(), 3, Decimal("25.00"), "tok", 9)
+
+    assert _unverified(db) == []
+    assert "Auto-run payment failed" in caplog.text
+
+
+def test_debug_run_parks_the_installment_and_answers_504(monkeypatch):
+    monkeypatch.setenv("ENABLE_DEBUG_ENDPOINTS", "true")
+    monkeypatch.setattr(operations, "TransactionManager", NoAnswerManager)
+    db = FakeDB(INSTALLMENT)
+
+    with pytest.raises(HTTPException) as exc:
+        operations.debug_run_next_installment(1, db=db)
+
+    assert exc.value.status_code == 504 and "unverified" in exc.value.detail
+    (query, params), = _unverified(db)
+    assert params[-1] == 9
+    assert db.commits == 1 and db.rollbacks == 0
+
+
+def test_one_off_payment_with_no_answer_says_to_check_the_gateway(monkeypatch):
+    monkeypatch.setattr(operations, "TransactionManager", lambda cursor: NoAnswerManager(status_code=502))
+    db = FakeDB({"card_token": "tok"})
+
+    with pytest.raises(HTTPException) as exc:
+        operations.run_one_off_payment(3, Decimal("40.00"), db=db, user={"sub": "agent-1"})
+
+    assert exc.value.status_code == 502
+    assert "may have gone through" in exc.value.detail and "before retrying" in exc.value.detail
+    (query, params), = db.statements("INSERT INTO audit_logs")
+    assert "payment.one_off.outcome_unknown" in params
+    assert db.commits == 1
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from app.services.payment_dispatch import RateLimiter, dispatch_ordered
+
+
+def test_calls_for_one_key_wait_for_the_previous_result():
+    active = set()
+    overlaps = []
+    lock = threading.Lock()
+    handled = []
+
+    def call(item):
+        debt, _ = item
+        with lock:
+            if debt in active:
+                overlaps.append(item)
+            active.add(debt)
+        time.sleep(0.01)
+        with lock:
+            active.discard(debt)
+        return item
+
+    items = [(1, "a"), (2, "a"), (1, "b"), (3, "a"), (1, "c"), (2, "b")]
+    for item, result in dispatch_ordered(items, key=lambda item: item[0], call=call, concurrency=4):
+        assert result == item
+        handled.append(item)
+
+    assert overlaps == []
+    assert sorted(handled) == sorted(items)
+    assert [item for item in handled if item[0] == 1] == [(1, "a"), (1, "b"), (1, "c")]
+
+
+def test_concurrency_bounds_calls_in_flight():
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def call(item):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.01)
+        with lock:
+            state["now"] -= 1
+
+    list(dispatch_ordered(range(20), key=lambda item: item, call=call, concurrency=3))
+    assert 1 < state["peak"] <= 3
+
+
+def test_a_failing_call_stops_further_dispatch():
+    started = []
+
+    def call(item):
+        started.append(item)
+        if item == 0:
+            raise RuntimeError("gateway down")
+        return item
+
+    with pytest.raises(RuntimeError):
+        list(dispatch_ordered(range(10), key=lambda item: item, call=call, concurrency=1))
+    assert started == [0]
+
+
+def test_rate_limiter_spaces_calls():
+    clock = {"now": 100.0}
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(round(seconds, 3))
+
+    limiter = RateLimiter(4, clock=lambda: clock["now"], sleep=sleep)
+    for _ in range(3):
+        limiter.acquire()
+    assert sleeps == [0.25, 0.5]
+
+    RateLimiter(0, clock=lambda: clock["now"], sleep=sleep).acquire()
+    assert sleeps == [0.25, 0.5]
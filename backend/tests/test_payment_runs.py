@@ -0,0 +1,36 @@
+from app.services.payment_runs import PaymentRunStats, next_claim_size, percentile
+
+
+def test_percentile_is_nearest_rank():
+    ordered = [float(n) for n in range(1, 101)]
+    assert percentile(ordered, 0.5) == 50.0
+    assert percentile(ordered, 0.99) == 99.0
+    assert percentile([0.3], 0.99) == 0.3
+    assert percentile([], 0.5) is None
+
+
+def test_claim_size_follows_gateway_latency():
+    sizing = dict(concurrency=8, rate_limit=0, slice_seconds=10, max_size=500)
+    # 8 calls in flight at 0.4s each: 20 charges/s, 200 per 10s slice
+    assert next_claim_size(0.4, 3000, 50, **sizing) == 200
+    # A slow gateway shrinks the slice
+    assert next_claim_size(4.0, 3000, 200, **sizing) == 20
+    # The rate cap and the remaining budget bound it too
+    assert next_claim_size(0.1, 3000, 50, **dict(sizing, rate_limit=5)) == 50
+    assert next_claim_size(0.4, 2, 200, **sizing) == 40
+    assert next_claim_size(0.001, 3000, 50, **sizing) == 500
+    # No measurement yet
+    assert next_claim_size(None, 3000, 50, **sizing) == 50
+
+
+def test_summary_reports_throughput_and_latency():
+    stats = PaymentRunStats()
+    stats.counts.update(paid=8, declined=1, retried=1)
+    stats.latencies = [0.2] * 9 + [1.5]
+
+    summary = stats.summary(seconds=2.0)
+
+    assert summary["charges_per_second"] == 5.0
+    assert summary["latency_p50_ms"] == 200.0
+    assert summary["latency_p99_ms"] == 1500.0
+    assert (summary["approved"], summary["declined"], summary["retried"]) == (8, 1, 1)
@@ -0,0 +1,321 @@
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.services import scheduled_runner
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 1
+
+    def execute(self, query, params=None):
+        if self.conn.fail_on and self.conn.fail_on in str(params):
+            raise RuntimeError("database went away")
+        self.conn.executed.append((" ".join(query.split()), params))
+
+    def fetchone(self):
+        return self.conn.fetched
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.fail_on = None
+        self.fetched = (1,)
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn):
+        pass
+
+
+class FakeLeases:
+    def __init__(self, pool, runner_id, lease_seconds):
+        self.conn = pool.conn
+        self.conn.leases.append(lease_seconds)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def held(self, payment_id):
+        return payment_id not in self.conn.lost
+
+
+class FakeManager:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def prepare_charge(self, debt_id, amount, card_token, scheduled_payment_id, attempt_count):
+        return {"invoice": f"SP{scheduled_payment_id}-A{attempt_count}"}
+
+    def charge(self, request):
+        return {"status": "approved", "response": request}
+
+    def record_payment(self, debt_id, amount, outcome, scheduled_payment_id=None, **kwargs):
+        self.cursor.execute("INSERT INTO payments", (scheduled_payment_id,))
+        return {"status": "paid", "payment_id": 100 + scheduled_payment_id, "ref_num": outcome["response"]["invoice"]}
+
+
+def _row(payment_id, debt_id):
+    return {
+        "id": payment_id, "plan_id": 1, "amount": Decimal("25.00"), "due_date": date(2026, 10, 1),
+        "attempt_count": 1, "next_attempt_at": datetime(2026, 10, 1, 10, tzinfo=timezone.utc),
+        "claimed_from": "pending", "debt_id": debt_id, "card_token": "tok",
+    }
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    conn = FakeConnection()
+    slices = [[_row(1, 10), _row(2, 11)], [_row(3, 10)], []]
+    claims = []
+
+    def claim(conn_, runner_id, now, limit, lease_seconds):
+        claims.append(limit)
+        return slices.pop(0)
+
+    monkeypatch.setattr(scheduled_runner, "get_pool", lambda: FakePool(conn))
+    monkeypatch.setattr(scheduled_runner, "claim_due_payments", claim)
+    monkeypatch.setattr(scheduled_runner, "recover_expired_leases", lambda conn_: [])
+    monkeypatch.setattr(scheduled_runner, "TransactionManager", FakeManager)
+    monkeypatch.setattr(scheduled_runner, "SliceLeases", FakeLeases)
+    monkeypatch.setattr(scheduled_runner, "PAYMENT_RUN_CLAIM_SIZE", 2)
+    monkeypatch.setattr(scheduled_runner, "PAYMENT_RUN_RATE_LIMIT", 0)
+    monkeypatch.setattr(scheduled_runner, "start_run", lambda conn_, window, runner_id, started_at: 42)
+    conn.runs = []
+    monkeypatch.setattr(
+        scheduled_runner, "finish_run", lambda conn_, run_id, reason, summary: conn.runs.append((run_id, reason, summary))
+    )
+    conn.claims = claims
+    conn.leases = []
+    conn.lost = set()
+    return conn
+
+
+def test_each_result_commits_in_its_own_transaction(runner):
+    summary = scheduled_runner.run_due_scheduled_payments("am", batch_limit=10)
+
+    assert summary["processed"] == 3 and summary["total"] == 3 and summary["errors"] == 0
+    # The first slice is PAYMENT_RUN_CLAIM_SIZE; later ones follow the measured latency
+    assert runner.claims[0] == 2 and len(runner.claims) == 3
+    # One commit after each slice's reads, then one per recorded result
+    assert runner.commits == 2 + 3
+    updates = [params for query, params in runner.executed if query.startswith("UPDATE scheduled_payments")]
+    assert sorted(params[-2] for params in updates) == [1, 2, 3]
+    assert len({params[-1] for params in updates}) == 1
+    assert all("locked_by = %s" in query for query, _ in runner.executed if query.startswith("UPDATE"))
+
+
+def test_a_failed_record_rolls_back_only_that_installment(runner):
+    runner.fail_on = "(2,)"
+
+    summary = scheduled_runner.run_due_scheduled_payments("am", batch_limit=10)
+
+    assert summary["processed"] == 2
+    assert summary["errors"] == 1
+    assert runner.rollbacks == 1
+
+
+def test_a_charge_without_an_answer_is_marked_unverified(runner, monkeypatch):
+    class NoAnswerManager(FakeManager):
+        def charge(self, request):
+            if request["invoice"].startswith("SP2-"):
+                return {"status": "unknown", "exception": TimeoutError("read timed out")}
+            return super().charge(request)
+
+    monkeypatch.setattr(scheduled_runner, "TransactionManager", NoAnswerManager)
+
+    summary = scheduled_runner.run_due_scheduled_payments("am", batch_limit=10)
+
+    assert summary["processed"] == 2 and summary["errors"] == 1
+    assert ("INSERT INTO payments", (2,)) not in runner.executed
+    (query, params), = [entry for entry in runner.executed if "SET status = 'unverified'" in entry[0]]
+    assert params[-2] == 2 and "read timed out" in params[1]
+    assert runner.rollbacks == 0
+
+
+def test_a_row_whose_lease_was_lost_is_not_charged(runner, monkeypatch):
+    charged = []
+
+    class RecordingManager(FakeManager):
+        def charge(self, request):
+            charged.append(request["invoice"])
+            return super().charge(request)
+
+    monkeypatch.setattr(scheduled_runner, "TransactionManager", RecordingManager)
+    runner.lost = {2}
+
+    summary = scheduled_runner.run_due_scheduled_payments("am", batch_limit=10)
+
+    assert sorted(charged) == ["SP1-A1", "SP3-A1"]
+    assert summary["processed"] == 2 and summary["errors"] == 1
+    assert ("INSERT INTO payments", (2,)) not in runner.executed
+
+
+def test_a_failed_slice_hands_unsent_rows_back(runner, monkeypatch):
+    class FailingManager(FakeManager):
+        def prepare_charge(self, debt_id, amount, card_token, scheduled_payment_id, attempt_count):
+            if scheduled_payment_id == 3:
+                raise RuntimeError("plan lookup failed")
+            return super().prepare_charge(debt_id, amount, card_token, scheduled_payment_id, attempt_count)
+
+    monkeypatch.setattr(scheduled_runner, "TransactionManager", FailingManager)
+
+    with pytest.raises(RuntimeError):
+        scheduled_runner.run_due_scheduled_payments("am", batch_limit=10)
+
+    released = [params for query, params in runner.executed if "SET status = %s, locked_by = NULL" in query]
+    assert [params[:2] for params in released] == [("pending", 3)]
+
+
+def test_slice_lease_covers_the_worst_case(monkeypatch):
+    monkeypatch.setattr(scheduled_runner, "USA_EPAY_CONNECT_TIMEOUT", 5)
+    monkeypatch.setattr(scheduled_runner, "USA_EPAY_READ_TIMEOUT", 45)
+    monkeypatch.setattr(scheduled_runner, "PAYMENT_LEASE_MARGIN_SECONDS", 60)
+
+    # ceil(50 / 8) = 7 rounds of 50 s, 50 starts at 20/s, and the margin
+    assert scheduled_runner.slice_lease_seconds(50, 8, 20) == 7 * 50 + 2.5 + 60
+    assert scheduled_runner.slice_lease_seconds(3, 8, 0) == 50 + 60
+
+
+def test_slice_leases_renew_and_recheck_on_their_own_connection():
+    conn = FakeConnection()
+
+    with scheduled_runner.SliceLeases(FakePool(conn), "runner-a", 0.03) as leases:
+        assert leases.held(5)
+        conn.fetched = None
+        assert not leases.held(6)
+        while not any("SET locked_until" in query for query, _ in conn.executed):
+            time.sleep(0.01)
+
+    renew = next(params for query, params in conn.executed if "SET locked_until" in query)
+    assert renew == (0.03, "runner-a")
+    checks = [params for query, params in conn.executed if query.startswith("SELECT 1 FROM scheduled_payments")]
+    assert checks == [(5, "runner-a"), (6, "runner-a")]
+
+
+def test_a_charge_run_by_hand_is_marked_unverified_without_a_lease():
+    conn = FakeConnection()
+
+    scheduled_runner.mark_unverified(
+        conn.cursor(), _row(7, 12), None, TimeoutError("read timed out"), datetime(2026, 10, 1, 10, tzinfo=timezone.utc)
+    )
+
+    (query, params), = conn.executed
+    assert query.endswith("WHERE id = %s") and "locked_by" not in query
+    assert params[-1] == 7 and "read timed out" in params[1]
+
+
+def test_batch_limit_caps_the_claims(runner):
+    summary = scheduled_runner.run_due_scheduled_payments("am", batch_limit=2)
+
+    assert runner.claims == [2]
+    assert summary["total"] == 2
+    assert summary["stop_reason"] == "batch_limit"
+
+
+def test_batch_limit_defaults_only_when_not_given(runner, monkeypatch):
+    monkeypatch.setattr(scheduled_runner, "PAYMENT_RUN_BATCH_LIMIT", 1)
+
+    assert scheduled_runner.run_due_scheduled_payments("am")["stop_reason"] == "batch_limit"
+    assert runner.claims == [1]
+    # An explicit 0 means no limit rather than falling back to the default
+    assert scheduled_runner.run_due_scheduled_payments("am", batch_limit=0)["stop_reason"] == "drained"
+
+
+def test_results_recorded_before_a_crash_stay_committed(runner, monkeypatch):
+    class CrashingManager(FakeManager):
+        def charge(self, request):
+            if request["invoice"].startswith("SP3-"):
+                raise RuntimeError("worker thread died")
+            return super().charge(request)
+
+    monkeypatch.setattr(scheduled_runner, "TransactionManager", CrashingManager)
+
+    with pytest.raises(RuntimeError):
+        scheduled_runner.run_due_scheduled_payments("am", batch_limit=10)
+    # Both results of the first slice were committed before the second slice failed
+    assert runner.commits >= 3
+    assert runner.runs[0][1] == "failed" and runner.runs[0][2]["approved"] == 2
+
+
+def test_drains_until_nothing_is_due_and_records_the_run(runner):
+    summary = scheduled_runner.run_due_scheduled_payments("am", batch_limit=0)
+
+    assert summary["stop_reason"] == "drained"
+    assert summary["slices"] == 2
+    assert summary["latency_p50_ms"] is not None
+    (run_id, reason, recorded), = runner.runs
+    assert (run_id, reason) == (42, "drained")
+    assert recorded["approved"] == 3 and recorded["claimed"] == 3
+
+
+def test_time_budget_stops_the_run(runner):
+    summary = scheduled_runner.run_due_scheduled_payments("am", time_budget=0)
+
+    assert runner.claims == []
+    assert summary["stop_reason"] == "time_budget"
+    assert runner.runs[0][1] == "time_budget"
+
+
+def test_lease_lost_result_is_still_recorded(caplog):
+    conn = FakeConnection()
+    cursor = conn.cursor()
+    cursor.rowcount = 0
+
+    outcome = scheduled_runner.record_result(
+        cursor, _row(4, 12), "runner-a", {"status": "declined", "result": "Do Not Honor"},
+        datetime(2026, 10, 1, 10, tzinfo=timezone.utc),
+    )
+
+    assert outcome == "declined"
+    assert "left the lease" in caplog.text
+    # A row parked as 'unverified' meanwhile keeps that status but carries the late result
+    query, params = conn.executed[-1]
+    assert "SET last_error = %s" in query and "status = 'unverified'" in query
+    assert params[0].startswith("Charge finished after the lease lapsed: declined")
+
+
+def test_several_runners_are_queued_per_window(monkeypatch):
+    keys = []
+
+    def enqueue(cur, task, payload, dedupe_key=None):
+        keys.append(dedupe_key)
+        return len(keys)
+
+    monkeypatch.setattr(scheduled_runner.job_queue, "enqueue", enqueue)
+    queued = scheduled_runner.enqueue_due_payment_runs(
+        None, datetime(2026, 10, 17, 17, 0, tzinfo=timezone.utc), runners=3
+    )
+
+    assert queued == ["am"]
+    assert keys == [
+        "scheduled_payments:2026-10-17:am", "scheduled_payments:2026-10-17:am:1", "scheduled_payments:2026-10-17:am:2",
+    ]
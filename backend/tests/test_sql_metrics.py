@@ -0,0 +1,91 @@
+import asyncio
+
+from psycopg2.extras import RealDictCursor
+
+from app.core import sql_metrics
+from app.core.sql_metrics import (
+    QueryStatsRegistry,
+    fingerprint,
+    instrumented_cursor_class,
+    normalize_sql,
+    route_label,
+)
+
+
+def test_normalize_collapses_literals_and_lists():
+    a = normalize_sql("SELECT * FROM debts WHERE id = 12 AND status = 'New'")
+    b = normalize_sql("select * from debts  where id = %s and status = $2")
+    assert a == "SELECT * FROM debts WHERE id = ? AND status = ?"
+    assert b == "select * from debts where id = ? and status = ?"
+    assert normalize_sql("SELECT 1 FROM t WHERE id IN (1, 2, 3)") == "SELECT ? FROM t WHERE id IN (...)"
+    assert normalize_sql(
+        "INSERT INTO t (a, b) VALUES (1, 'x'), (2, now()) ON CONFLICT (a) DO NOTHING"
+    ) == "INSERT INTO t (a, b) VALUES (...) ON CONFLICT (a) DO NOTHING"
+    assert fingerprint("SELECT 1 -- note")[0] == fingerprint("SELECT 2")[0]
+
+
+def test_registry_aggregates_by_route_and_statement():
+    registry = QueryStatsRegistry(slow_ms=100, slow_log_size=10, max_statements=10)
+    registry.record("GET /work-queue", "SELECT * FROM debts WHERE id = 1", 0.004, rows=1)
+    registry.record("GET /work-queue", "SELECT * FROM debts WHERE id = 2", 0.020, rows=1)
+    assert registry.record("GET /work-queue", "SELECT * FROM debts WHERE id = 3", 0.300, rows=1)
+
+    snap = registry.snapshot()
+    route = snap["routes"][0]
+    assert route["route"] == "GET /work-queue"
+    assert route["count"] == 3
+    assert len(route["statements"]) == 1
+    stmt = route["statements"][0]
+    assert stmt["rows"] == 3
+    assert stmt["p50_ms"] == 25.0
+    assert stmt["histogram"] == {"<=5ms": 1, "<=25ms": 1, "<=500ms": 1}
+
+    assert len(snap["slow_queries"]) == 1
+    assert snap["slow_queries"][0]["duration_ms"] == 300.0
+    registry.attach_explain(stmt["fingerprint"], "Seq Scan on debts")
+    assert registry.snapshot()["slow_queries"][0]["explain"] == "Seq Scan on debts"
+
+    registry.reset()
+    assert registry.snapshot()["routes"] == []
+
+
+def test_registry_caps_distinct_statements():
+    registry = QueryStatsRegistry(slow_ms=1000, max_statements=2)
+    for table in ("a", "b", "c", "d"):
+        registry.record("job:ingest", f"SELECT * FROM {table}", 0.001)
+    statements = registry.snapshot()["routes"][0]["statements"]
+    assert sorted(s["fingerprint"] for s in statements)[-1] == "other"
+    assert len(statements) == 3
+
+
+def test_route_label_scopes_background_work():
+    assert sql_metrics.current_route.get() == "background"
+    with route_label("job:campaign"):
+        assert sql_metrics.current_route.get() == "job:campaign"
+    assert sql_metrics.current_route.get() == "background"
+
+
+def test_instrumented_cursor_class_preserves_factory():
+    cls = instrumented_cursor_class(RealDictCursor)
+    assert issubclass(cls, RealDictCursor)
+    assert instrumented_cursor_class(RealDictCursor) is cls
+
+
+def test_async_helpers_record_timings(monkeypatch):
+    registry = QueryStatsRegistry(slow_ms=1000)
+    monkeypatch.setattr(sql_metrics, "registry", registry)
+
+    class FakeConn:
+        async def fetch(self, query, *args):
+            return [{"id": 1}, {"id": 2}]
+
+    from app.core.database import fetch_all
+
+    async def run():
+        with route_label("GET /work-queue"):
+            return await fetch_all(FakeConn(), "SELECT id FROM debts WHERE portfolio_id = $1", 7)
+
+    assert asyncio.run(run()) == [{"id": 1}, {"id": 2}]
+    route = registry.snapshot()["routes"][0]
+    assert route["route"] == "GET /work-queue"
+    assert route["rows"] == 2
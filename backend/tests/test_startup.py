@@ -0,0 +1,35 @@
+import sys
+
+from app.core import startup
+from app.core.startup import ImportProfiler
+
+
+def test_import_profiler_records_nested_imports(tmp_path, monkeypatch):
+    (tmp_path / "cold_outer.py").write_text("import time\ntime.sleep(0.02)\nimport cold_inner\n")
+    (tmp_path / "cold_inner.py").write_text("import time\ntime.sleep(0.03)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = ImportProfiler()
+    profiler.install()
+    try:
+        import cold_outer  # noqa: F401
+    finally:
+        profiler.uninstall()
+        sys.modules.pop("cold_outer", None)
+        sys.modules.pop("cold_inner", None)
+
+    rows = {row["module"]: row for row in profiler.top(10)}
+    assert rows["cold_outer"]["cumulative_ms"] >= 50
+    assert rows["cold_inner"]["cumulative_ms"] >= 30
+    # Self time excludes the nested import
+    assert rows["cold_outer"]["self_ms"] < rows["cold_outer"]["cumulative_ms"] - 25
+
+
+def test_warm_up_step_failure_is_recorded():
+    def fail():
+        raise RuntimeError("connection refused")
+
+    startup._timed("test_step", fail)
+    entry = startup.stats()["warmup"].pop("test_step")
+    assert entry["ok"] is False
+    assert entry["error"] == "connection refused"
@@ -0,0 +1,114 @@
+import pytest
+import requests
+
+from app.services.usa_epay import USAePayError, USAePayOutcomeUnknown, USAePayService, USAePayTransport
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "application/json"}
+        self._body = body or {}
+        self.text = str(self._body)
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls.append((method, url, timeout))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _transport(*results, retries=2):
+    sleeps = []
+    transport = USAePayTransport(connect_timeout=3, read_timeout=30, retries=retries, backoff=0.5,
+                                 sleep=sleeps.append)
+    transport.session = FakeSession(*results)
+    return transport, sleeps
+
+
+def test_idempotent_requests_retry_with_jittered_backoff():
+    transport, sleeps = _transport(requests.exceptions.ConnectionError("reset"), FakeResponse(503), FakeResponse(200))
+
+    response = transport.request("GET", "https://gw/account", "GET /account", idempotent=True)
+
+    assert response.status_code == 200
+    assert len(transport.session.calls) == 3
+    assert all(call[2] == (3, 30) for call in transport.session.calls)
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+    stats = transport.stats()["GET /account"]
+    assert stats["count"] == 3 and stats["retries"] == 2 and stats["errors"] == 2
+    assert stats["p50_ms"] is not None
+
+
+def test_idempotent_requests_give_up_with_a_gateway_error():
+    transport, _ = _transport(*[requests.exceptions.ConnectionError("down")] * 3)
+
+    with pytest.raises(USAePayError):
+        transport.request("GET", "https://gw/account", "GET /account", idempotent=True)
+    assert len(transport.session.calls) == 3
+
+
+def test_a_sale_is_sent_once():
+    transport, sleeps = _transport(FakeResponse(429), FakeResponse(200))
+
+    response = transport.request("POST", "https://gw/transactions", "POST /transactions", json={})
+
+    assert response.status_code == 429
+    assert len(transport.session.calls) == 1 and sleeps == []
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504])
+def test_a_sale_answered_with_a_server_error_is_an_unknown_outcome(status):
+    transport, sleeps = _transport(FakeResponse(status), FakeResponse(200))
+
+    with pytest.raises(USAePayOutcomeUnknown) as exc:
+        transport.request("POST", "https://gw/transactions", "POST /transactions", json={})
+    assert exc.value.status_code == status
+    assert len(transport.session.calls) == 1 and sleeps == []
+
+
+def test_run_transaction_does_not_report_a_gateway_error_as_a_decline(monkeypatch):
+    monkeypatch.setenv("USA_EPAY_API_KEY", "key")
+    monkeypatch.setenv("USA_EPAY_API_PIN", "pin")
+    transport, _ = _transport(FakeResponse(504))
+
+    with pytest.raises(USAePayOutcomeUnknown):
+        USAePayService(transport).run_transaction(token_id="tok", amount=10, invoice="SP1-A1")
+
+
+def test_a_sale_without_an_answer_is_an_unknown_outcome():
+    transport, _ = _transport(requests.exceptions.ReadTimeout("slow"))
+
+    with pytest.raises(USAePayOutcomeUnknown) as exc:
+        transport.request("POST", "https://gw/transactions", "POST /transactions", json={})
+    assert not isinstance(exc.value, USAePayError)
+    assert len(transport.session.calls) == 1
+
+
+def test_a_sale_that_never_connected_is_a_gateway_error():
+    transport, _ = _transport(requests.exceptions.ConnectTimeout("no route"))
+
+    with pytest.raises(USAePayError):
+        transport.request("POST", "https://gw/transactions", "POST /transactions", json={})
+
+
+def test_services_share_the_transport(monkeypatch):
+    monkeypatch.setenv("USA_EPAY_API_KEY", "key")
+    monkeypatch.setenv("USA_EPAY_API_PIN", "pin")
+    transport, _ = _transport(FakeResponse(200, {"key": "acct"}))
+
+    service = USAePayService(transport)
+
+    assert service.fetch_account()["json"] == {"key": "acct"}
+    assert transport.session.calls[0][0] == "GET"
+    assert list(transport.stats()) == ["GET /account"]
@@ -0,0 +1,23 @@
+-- Fill content_hash for debts inserted without one (anything but the importers)
+CREATE OR REPLACE FUNCTION debts_fill_content_hash() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.content_hash := debt_content_hash(
+        NEW.original_account_number, NEW.original_creditor, NEW.current_creditor, NEW.date_opened,
+        NEW.charge_off_date, NEW.principal_balance, NEW.fees_costs, NEW.face_value
+    );
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS debts_fill_content_hash ON debts;
+CREATE TRIGGER debts_fill_content_hash
+    BEFORE INSERT ON debts
+    FOR EACH ROW WHEN (NEW.content_hash IS NULL)
+    EXECUTE FUNCTION debts_fill_content_hash();
+
+UPDATE debts
+SET content_hash = debt_content_hash(
+    original_account_number, original_creditor, current_creditor, date_opened,
+    charge_off_date, principal_balance, fees_costs, face_value
+)
+WHERE content_hash IS NULL;
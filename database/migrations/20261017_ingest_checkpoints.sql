@@ -0,0 +1,5 @@
+-- Per-batch checkpoints for resumable ingest jobs
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS checkpoint_offset bigint,
+    ADD COLUMN IF NOT EXISTS checkpoint_row bigint,
+    ADD COLUMN IF NOT EXISTS checkpoint_at timestamp with time zone;
@@ -0,0 +1,3 @@
+-- Columnar placements (Parquet / Arrow IPC)
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS file_format varchar(10);
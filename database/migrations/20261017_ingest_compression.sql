@@ -0,0 +1,6 @@
+-- Compressed placements: gzip/zstd streams and zip archives (one job per member)
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS compression varchar(10),
+    ADD COLUMN IF NOT EXISTS archive_member text;
+
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_object_key ON ingest_jobs(object_key);
@@ -0,0 +1,28 @@
+-- Delta (re-placement) ingest: per-debt content hash and per-job change counts
+ALTER TABLE debts
+    ADD COLUMN IF NOT EXISTS content_hash char(32);
+
+CREATE OR REPLACE FUNCTION debt_content_hash(
+    original_account_number text, original_creditor text, current_creditor text, date_opened date,
+    charge_off_date date, principal_balance numeric, fees_costs numeric, face_value numeric
+) RETURNS char(32) LANGUAGE sql IMMUTABLE AS $$
+    SELECT md5(ROW(
+        original_account_number, original_creditor, current_creditor,
+        to_char(date_opened, 'YYYY-MM-DD'), to_char(charge_off_date, 'YYYY-MM-DD'),
+        round(principal_balance, 2), round(fees_costs, 2), round(face_value, 2)
+    )::text)
+$$;
+
+UPDATE debts
+SET content_hash = debt_content_hash(
+    original_account_number, original_creditor, current_creditor, date_opened,
+    charge_off_date, principal_balance, fees_costs, face_value
+)
+WHERE content_hash IS NULL;
+
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS delta boolean NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS debts_new integer,
+    ADD COLUMN IF NOT EXISTS debts_changed integer,
+    ADD COLUMN IF NOT EXISTS debts_unchanged integer,
+    ADD COLUMN IF NOT EXISTS debts_recalled integer;
@@ -0,0 +1,5 @@
+-- Dry-run placement profiles
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS dry_run boolean NOT NULL DEFAULT false,
+    ADD COLUMN IF NOT EXISTS profile jsonb,
+    ADD COLUMN IF NOT EXISTS committed_job_id uuid REFERENCES ingest_jobs(id);
@@ -0,0 +1,4 @@
+-- Ingest engine selection and throughput reporting
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS engine varchar(20) DEFAULT 'batch',
+    ADD COLUMN IF NOT EXISTS rows_per_second numeric(12, 1);
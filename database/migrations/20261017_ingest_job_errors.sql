@@ -0,0 +1,16 @@
+-- Bad-row isolation: rejected rows per ingest job
+CREATE TABLE IF NOT EXISTS ingest_job_errors (
+    id bigserial PRIMARY KEY,
+    job_id uuid REFERENCES ingest_jobs(id) ON DELETE CASCADE,
+    row_number bigint,
+    line_number bigint,
+    stage varchar(10),
+    reason text,
+    raw_row text[],
+    created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_job_errors_job ON ingest_job_errors(job_id, id);
+
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS source_headers text[];
@@ -0,0 +1,5 @@
+-- Placements are streamed into the object store; track the object and its content hash
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS object_key text,
+    ADD COLUMN IF NOT EXISTS content_sha256 char(64),
+    ADD COLUMN IF NOT EXISTS size_bytes bigint;
@@ -0,0 +1,3 @@
+-- Worker processes used by the parallel ingest engine
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS workers integer;
@@ -0,0 +1,5 @@
+-- Live ingest progress (throttled reporter + /ingest/jobs/{id}/events)
+ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS bytes_processed bigint,
+    ADD COLUMN IF NOT EXISTS eta_seconds integer,
+    ADD COLUMN IF NOT EXISTS progress_updated_at timestamp with time zone;
@@ -0,0 +1,22 @@
+-- Durable job queue (replaces in-process BackgroundTasks and APScheduler)
+CREATE TABLE IF NOT EXISTS job_queue (
+    id bigserial PRIMARY KEY,
+    queue varchar(50) NOT NULL DEFAULT 'default',
+    task varchar(100) NOT NULL,
+    payload jsonb NOT NULL DEFAULT '{}',
+    priority smallint NOT NULL DEFAULT 0,
+    status varchar(20) NOT NULL DEFAULT 'queued',
+    attempts integer NOT NULL DEFAULT 0,
+    max_attempts integer NOT NULL DEFAULT 3,
+    run_at timestamp with time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by text,
+    locked_until timestamp with time zone,
+    dedupe_key text UNIQUE,
+    last_error text,
+    created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP,
+    started_at timestamp with time zone,
+    finished_at timestamp with time zone
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_queue_claim ON job_queue(queue, priority DESC, run_at, id)
+    WHERE status IN ('queued', 'running');
@@ -0,0 +1,21 @@
+-- Per-run summaries of scheduled payment runs
+CREATE TABLE IF NOT EXISTS payment_runs (
+    id bigserial PRIMARY KEY,
+    run_window varchar(10),
+    runner_id text,
+    started_at timestamp with time zone NOT NULL,
+    finished_at timestamp with time zone,
+    stop_reason varchar(20),
+    claimed integer,
+    approved integer,
+    declined integer,
+    retried integer,
+    errors integer,
+    recovered integer,
+    slices integer,
+    charges_per_second numeric(10, 2),
+    latency_p50_ms numeric(10, 1),
+    latency_p99_ms numeric(10, 1)
+);
+
+CREATE INDEX IF NOT EXISTS idx_payment_runs_started_at ON payment_runs(started_at);
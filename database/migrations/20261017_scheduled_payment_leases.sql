@@ -0,0 +1,9 @@
+-- Claim/lease model for scheduled payment runs
+ALTER TABLE scheduled_payments
+    ADD COLUMN IF NOT EXISTS locked_by TEXT,
+    ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_scheduled_payments_due ON scheduled_payments(next_attempt_at)
+    WHERE status IN ('pending', 'retrying');
+CREATE INDEX IF NOT EXISTS idx_scheduled_payments_lease ON scheduled_payments(locked_until)
+    WHERE status = 'processing';
@@ -66,7 +66,8 @@ CREATE TABLE debts (
     last_payment_reference VARCHAR(255),
     last_payment_method VARCHAR(50),
     status debt_status DEFAULT 'New',
-    date_assigned TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    date_assigned TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    content_hash CHAR(32) -- debt_content_hash() of the placed fields; delta ingest updates a debt when it changes
 );
 
 -- Payments Table (Split Ledger)
@@ -107,7 +108,7 @@ CREATE TABLE scheduled_payments (
     plan_id INTEGER REFERENCES payment_plans(id) ON DELETE CASCADE,
     amount DECIMAL(12, 2) NOT NULL,
     due_date DATE NOT NULL,
-    status VARCHAR(50) DEFAULT 'pending', -- 'pending', 'paid', 'missed', 'cancelled', 'declined'
+    status VARCHAR(50) DEFAULT 'pending', -- 'pending', 'retrying', 'processing', 'paid', 'declined', 'unverified', 'missed', 'cancelled'
     actual_payment_id INTEGER REFERENCES payments(id),
     processed_at TIMESTAMP WITH TIME ZONE,
     transaction_reference VARCHAR(255),
@@ -120,9 +121,38 @@ CREATE TABLE scheduled_payments (
     last_result VARCHAR(255),
     last_decline_reason VARCHAR(50),
     last_error TEXT,
+    locked_by TEXT, -- payment run holding the row while it is 'processing'
+    locked_until TIMESTAMP WITH TIME ZONE, -- lease; an expired 'processing' row becomes 'unverified'
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX idx_scheduled_payments_due ON scheduled_payments(next_attempt_at)
+    WHERE status IN ('pending', 'retrying');
+CREATE INDEX idx_scheduled_payments_lease ON scheduled_payments(locked_until)
+    WHERE status = 'processing';
+
+-- One row per scheduled payment run (app.services.payment_runs)
+CREATE TABLE payment_runs (
+    id BIGSERIAL PRIMARY KEY,
+    run_window VARCHAR(10),
+    runner_id TEXT,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    finished_at TIMESTAMP WITH TIME ZONE, -- NULL while the run drains (or if it died)
+    stop_reason VARCHAR(20), -- 'drained', 'time_budget', 'batch_limit' or 'failed'
+    claimed INTEGER,
+    approved INTEGER,
+    declined INTEGER,
+    retried INTEGER, -- declined for insufficient funds and rescheduled
+    errors INTEGER,
+    recovered INTEGER, -- expired leases moved to 'unverified' at the start of the run
+    slices INTEGER,
+    charges_per_second DECIMAL(10, 2),
+    latency_p50_ms DECIMAL(10, 1),
+    latency_p99_ms DECIMAL(10, 1)
+);
+
+CREATE INDEX idx_payment_runs_started_at ON payment_runs(started_at);
+
 -- Interaction Logs (Compliance)
 CREATE TYPE action_type AS ENUM ('Call', 'Email', 'SMS', 'Other');
 
@@ -219,12 +249,102 @@ CREATE TABLE ingest_jobs (
     error_message TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     started_at TIMESTAMP WITH TIME ZONE,
-    finished_at TIMESTAMP WITH TIME ZONE
+    finished_at TIMESTAMP WITH TIME ZONE,
+    engine VARCHAR(20) DEFAULT 'batch', -- 'batch' (execute_values), 'copy' (COPY staging) or 'parallel'
+    rows_per_second NUMERIC(12, 1),
+    workers INTEGER, -- parallel engine only
+    object_key TEXT, -- placement object in the ingest store (bucket or local stand-in)
+    content_sha256 CHAR(64),
+    size_bytes BIGINT, -- bytes the job reads: the stored object, or a zip member uncompressed
+    bytes_processed BIGINT, -- live progress, written at most every INGEST_PROGRESS_INTERVAL seconds
+    eta_seconds INTEGER,
+    progress_updated_at TIMESTAMP WITH TIME ZONE,
+    checkpoint_offset BIGINT, -- input bytes committed; POST /ingest/jobs/{id}/resume continues here
+    checkpoint_row BIGINT,
+    checkpoint_at TIMESTAMP WITH TIME ZONE,
+    source_headers TEXT[], -- header row of the file, for the reject download
+    compression VARCHAR(10), -- 'gzip', 'zstd' or 'zip'; NULL for plain CSV
+    archive_member TEXT, -- CSV inside a zip; one job per member, sharing object_key
+    file_format VARCHAR(10), -- 'parquet' or 'arrow'; NULL for CSV
+    dry_run BOOLEAN NOT NULL DEFAULT FALSE, -- profile only (see app.services.ingest_profile); writes no rows
+    profile JSONB, -- dry-run result
+    committed_job_id UUID REFERENCES ingest_jobs(id), -- import queued from this dry run
+    delta BOOLEAN NOT NULL DEFAULT FALSE, -- re-placement: update changed accounts (app.services.ingest_delta)
+    debts_new INTEGER, -- delta jobs: accounts inserted / updated / already up to date
+    debts_changed INTEGER,
+    debts_unchanged INTEGER,
+    debts_recalled INTEGER -- accounts in the portfolio missing from the file; NULL after a resume
 );
 
 CREATE INDEX idx_ingest_jobs_status ON ingest_jobs(status);
+CREATE INDEX idx_ingest_jobs_object_key ON ingest_jobs(object_key);
+
+-- Rows an ingest job rejected (parse errors, or rows the database refused)
+CREATE TABLE ingest_job_errors (
+    id BIGSERIAL PRIMARY KEY,
+    job_id UUID REFERENCES ingest_jobs(id) ON DELETE CASCADE,
+    row_number BIGINT, -- data row, 1-based, header excluded
+    line_number BIGINT, -- file line; approximate after resuming past multi-line records
+    stage VARCHAR(10), -- 'parse' or 'load'
+    reason TEXT,
+    raw_row TEXT[],
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_ingest_job_errors_job ON ingest_job_errors(job_id, id);
+
+-- Durable background jobs, run by `python -m app.worker`
+CREATE TABLE job_queue (
+    id BIGSERIAL PRIMARY KEY,
+    queue VARCHAR(50) NOT NULL DEFAULT 'default',
+    task VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    priority SMALLINT NOT NULL DEFAULT 0, -- higher runs first
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- 'queued', 'running', 'completed' or 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP, -- not claimable before; retry backoff
+    locked_by TEXT,
+    locked_until TIMESTAMP WITH TIME ZONE, -- visibility timeout; claimable again once it lapses
+    dedupe_key TEXT UNIQUE,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX idx_job_queue_claim ON job_queue(queue, priority DESC, run_at, id)
+    WHERE status IN ('queued', 'running');
 
 -- Idempotency: prevent duplicate debts per portfolio
 CREATE UNIQUE INDEX debts_unique_portfolio_client_ref
     ON debts (portfolio_id, client_reference_number)
     WHERE client_reference_number IS NOT NULL;
+
+-- Fingerprint of a debt's placed fields, so a re-placement can tell changed accounts apart
+CREATE OR REPLACE FUNCTION debt_content_hash(
+    original_account_number TEXT, original_creditor TEXT, current_creditor TEXT, date_opened DATE,
+    charge_off_date DATE, principal_balance NUMERIC, fees_costs NUMERIC, face_value NUMERIC
+) RETURNS CHAR(32) LANGUAGE sql IMMUTABLE AS $$
+    SELECT md5(ROW(
+        original_account_number, original_creditor, current_creditor,
+        to_char(date_opened, 'YYYY-MM-DD'), to_char(charge_off_date, 'YYYY-MM-DD'),
+        round(principal_balance, 2), round(fees_costs, 2), round(face_value, 2)
+    )::text)
+$$;
+
+-- Debts written outside the importers get their fingerprint too, so a delta does not see them as changed
+CREATE OR REPLACE FUNCTION debts_fill_content_hash() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.content_hash := debt_content_hash(
+        NEW.original_account_number, NEW.original_creditor, NEW.current_creditor, NEW.date_opened,
+        NEW.charge_off_date, NEW.principal_balance, NEW.fees_costs, NEW.face_value
+    );
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER debts_fill_content_hash
+    BEFORE INSERT ON debts
+    FOR EACH ROW WHEN (NEW.content_hash IS NULL)
+    EXECUTE FUNCTION debts_fill_content_hash();
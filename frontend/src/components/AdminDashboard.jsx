@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { uploadPortfolio, fetchPortfolios, fetchIngestJob } from '../services/api';
+import { uploadPortfolio, fetchPortfolios, fetchIngestJob, streamIngestJob, resumeIngestJob, commitIngestJob, downloadIngestRejects } from '../services/api';
 import PaymentManager from './PaymentManager';
 import ReportsPanel from './ReportsPanel';
 
@@ -8,7 +8,10 @@ const AdminDashboard = () => {
     const [portfolios, setPortfolios] = useState([]);
     const [selectedPortfolio, setSelectedPortfolio] = useState("");
     const [ingestJob, setIngestJob] = useState(null);
-    const [polling, setPolling] = useState(false);
+    const [streaming, setStreaming] = useState(false);
+    const [streamKey, setStreamKey] = useState(0);
+    const [dryRun, setDryRun] = useState(false);
+    const [delta, setDelta] = useState(false);
 
     useEffect(() => {
         let mounted = true;
@@ -30,25 +33,44 @@ const AdminDashboard = () => {
     }, []);
 
     useEffect(() => {
-        if (!ingestJob?.id || polling) return;
+        if (!ingestJob?.id || streaming) return;
         if (ingestJob.status === "completed" || ingestJob.status === "failed") return;
-        setPolling(true);
-        const interval = setInterval(async () => {
-            try {
-                const job = await fetchIngestJob(ingestJob.id);
-                setIngestJob(job);
-                if (job.status === "completed" || job.status === "failed") {
-                    clearInterval(interval);
-                    setPolling(false);
+        setStreaming(true);
+        const controller = new AbortController();
+        streamIngestJob(ingestJob.id, setIngestJob, controller.signal)
+            .catch(async (e) => {
+                if (controller.signal.aborted) return;
+                try {
+                    setIngestJob(await fetchIngestJob(ingestJob.id));
+                } catch (_) {
+                    // keep the last known state
                 }
-            } catch (e) {
-                clearInterval(interval);
-                setPolling(false);
-            }
-        }, 2000);
+            })
+            .finally(() => setStreaming(false));
 
-        return () => clearInterval(interval);
-    }, [ingestJob, polling]);
+        return () => controller.abort();
+    }, [ingestJob?.id, streamKey]);
+
+    const handleResume = async () => {
+        try {
+            const result = await resumeIngestJob(ingestJob.id);
+            setIngestJob({ ...ingestJob, status: "queued", error_message: null });
+            setUploadStatus(`Resuming from row ${result.resume_from_row}...`);
+            setStreamKey((key) => key + 1);
+        } catch (err) {
+            setUploadStatus("Error: " + err.message);
+        }
+    };
+
+    const handleCommit = async () => {
+        try {
+            const result = await commitIngestJob(ingestJob.id);
+            setIngestJob({ id: result.job_id, status: "queued", filename: ingestJob.filename });
+            setUploadStatus("Importing the profiled file...");
+        } catch (err) {
+            setUploadStatus("Error: " + err.message);
+        }
+    };
 
     const handleFileUpload = async (e) => {
         const file = e.target.files[0];
@@ -60,10 +82,13 @@ const AdminDashboard = () => {
 
         setUploadStatus("Uploading...");
         try {
-            const result = await uploadPortfolio(file, selectedPortfolio);
+            const result = await uploadPortfolio(file, selectedPortfolio, dryRun, delta);
             if (result?.job_id) {
-                setIngestJob({ id: result.job_id, status: "queued", filename: result.filename });
-                setUploadStatus("Queued for processing...");
+                const first = result.jobs?.[0];
+                setIngestJob({ id: result.job_id, status: "queued", filename: first?.filename || result.filename });
+                setUploadStatus(result.jobs?.length > 1
+                    ? `Queued ${result.jobs.length} files from the archive; showing the first...`
+                    : dryRun ? "Queued for profiling..." : "Queued for processing...");
             } else {
                 setUploadStatus("Upload Complete!");
             }
@@ -94,14 +119,22 @@ const AdminDashboard = () => {
                             <option key={p.id} value={p.id}>{p.name}</option>
                         ))}
                     </select>
+                    <label className="flex items-center gap-2 mb-4 text-sm text-slate-700">
+                        <input type="checkbox" checked={dryRun} onChange={(e) => setDryRun(e.target.checked)} />
+                        Dry run (profile the file without importing it)
+                    </label>
+                    <label className="flex items-center gap-2 mb-4 text-sm text-slate-700">
+                        <input type="checkbox" checked={delta} onChange={(e) => setDelta(e.target.checked)} />
+                        Re-placement (update accounts that changed)
+                    </label>
                     <div className="relative border-2 border-dashed border-slate-300 rounded-lg p-12 text-center hover:border-blue-500 hover:bg-slate-100/30 transition-all">
                         <input
                             type="file"
-                            accept=".csv"
+                            accept=".csv,.gz,.zst,.zip,.parquet,.arrow,.feather"
                             onChange={handleFileUpload}
                             className="absolute inset-0 w-full h-full opacity-0 cursor-pointer"
                         />
-                        <p className="text-slate-600 pointer-events-none">Drag & Drop CSV here</p>
+                        <p className="text-slate-600 pointer-events-none">Drag & Drop CSV here (.csv, .csv.gz, .zst, .zip or .parquet)</p>
                         <p className="text-sm text-slate-400 mt-2 pointer-events-none">or click to browse</p>
                     </div>
                     <p className="mt-4 text-center text-sm text-blue-600 font-medium">{uploadStatus}</p>
@@ -112,9 +145,56 @@ const AdminDashboard = () => {
                             {typeof ingestJob.rows_processed !== "undefined" && (
                                 <div><strong>Rows Processed:</strong> {ingestJob.rows_processed}</div>
                             )}
+                            {ingestJob.rows_failed ? (
+                                <div className="text-amber-700">
+                                    <strong>Rows Rejected:</strong> {ingestJob.rows_failed}{" "}
+                                    {ingestJob.dry_run ? null : <button
+                                        onClick={() => downloadIngestRejects(ingestJob.id).catch((err) => setUploadStatus("Error: " + err.message))}
+                                        className="underline text-blue-600 hover:text-blue-700"
+                                    >
+                                        Download rejects
+                                    </button>}
+                                </div>
+                            ) : null}
+                            {ingestJob.rows_per_second ? (
+                                <div><strong>Rate:</strong> {Math.round(ingestJob.rows_per_second)} rows/s</div>
+                            ) : null}
+                            {ingestJob.status === "running" && ingestJob.eta_seconds != null ? (
+                                <div><strong>ETA:</strong> {Math.ceil(ingestJob.eta_seconds / 60)} min</div>
+                            ) : null}
                             {ingestJob.error_message ? (
                                 <div className="text-rose-600"><strong>Error:</strong> {ingestJob.error_message}</div>
                             ) : null}
+                            {ingestJob.delta && ingestJob.status === "completed" ? (
+                                <div>
+                                    <strong>Accounts:</strong> {ingestJob.debts_new} new, {ingestJob.debts_changed} changed, {ingestJob.debts_unchanged} unchanged
+                                    {ingestJob.debts_recalled != null ? `, ${ingestJob.debts_recalled} not in file (recalled)` : ""}
+                                </div>
+                            ) : null}
+                            {ingestJob.profile ? (
+                                <div className="mt-2">
+                                    <div><strong>Debtors:</strong> {ingestJob.profile.debtors.existing} existing, {ingestJob.profile.debtors.new} new</div>
+                                    <div><strong>Accounts to load:</strong> {ingestJob.profile.debts.would_insert} ({ingestJob.profile.debts.existing_reference} already placed, {ingestJob.profile.debts.duplicate_reference} repeated in file)</div>
+                                    <div><strong>Unreadable dates:</strong> {Object.values(ingestJob.profile.invalid_dates).reduce((a, b) => a + b, 0)}</div>
+                                    <div><strong>Face value:</strong> ${ingestJob.profile.totals.face_value}</div>
+                                </div>
+                            ) : null}
+                            {ingestJob.dry_run && ingestJob.status === "completed" && !ingestJob.committed_job_id ? (
+                                <button
+                                    onClick={handleCommit}
+                                    className="mt-2 px-3 py-1 rounded-md bg-blue-600 text-white font-medium hover:bg-blue-700"
+                                >
+                                    Import this file
+                                </button>
+                            ) : null}
+                            {ingestJob.status === "failed" ? (
+                                <button
+                                    onClick={handleResume}
+                                    className="mt-2 px-3 py-1 rounded-md bg-blue-600 text-white font-medium hover:bg-blue-700"
+                                >
+                                    Resume{ingestJob.checkpoint_row ? ` from row ${ingestJob.checkpoint_row}` : ""}
+                                </button>
+                            ) : null}
                         </div>
                     )}
                 </div>
@@ -51,10 +51,10 @@ const PaymentManager = () => {
         loadPayments();
     }, [statusFilter, startDate, endDate]);
 
-    const handleRerun = async (paymentId) => {
+    const handleRerun = async (paymentId, { confirmUnverified = false } = {}) => {
         try {
             setActionMsg({ type: 'info', text: "Rerunning payment..." });
-            await executeScheduledPayment(paymentId);
+            await executeScheduledPayment(paymentId, { confirmUnverified });
             setActionMsg({ type: 'success', text: "Payment Successful!" });
             loadPayments();
         } catch (e) {
@@ -100,6 +100,7 @@ const PaymentManager = () => {
                         <option value="paid">Posted</option>
                         <option value="declined">Declined</option>
                         <option value="retrying">Retrying</option>
+                        <option value="unverified">Unverified</option>
                     </select>
 
                     <button
@@ -184,6 +185,7 @@ const PaymentManager = () => {
                                     <span className={`inline-flex items-center gap-1.5 px-2.5 py-0.5 rounded-full text-xs font-medium border ${p.status === 'paid' ? 'bg-emerald-50 text-emerald-700 border-emerald-100' :
                                             p.status === 'declined' ? 'bg-red-50 text-red-700 border-red-100' :
                                                 p.status === 'retrying' ? 'bg-amber-50 text-amber-700 border-amber-100' :
+                                                p.status === 'unverified' ? 'bg-orange-50 text-orange-700 border-orange-100' :
                                                     'bg-slate-50 text-slate-700 border-slate-200'
                                         }`}>
                                         {p.status === 'paid' && <CheckCircle size={12} />}
@@ -194,6 +196,9 @@ const PaymentManager = () => {
                                     {p.last_result && (
                                         <div className="text-[10px] text-slate-400 mt-1">{p.last_result}</div>
                                     )}
+                                    {p.status === 'unverified' && (
+                                        <div className="text-[10px] text-orange-600 mt-1">Check USA ePay before running again</div>
+                                    )}
                                     {p.next_attempt_at && p.status === 'retrying' && (
                                         <div className="text-[10px] text-amber-600 mt-1">Next retry {new Date(p.next_attempt_at).toLocaleString()}</div>
                                     )}
@@ -207,6 +212,17 @@ const PaymentManager = () => {
                                             <RefreshCw size={12} /> Rerun
                                         </button>
                                     )}
+                                    {p.status === 'unverified' && (
+                                        <button
+                                            onClick={() => {
+                                                if (!window.confirm("This payment may already have been charged. Run it only if USA ePay shows no charge for it. Run it now?")) return;
+                                                handleRerun(p.id, { confirmUnverified: true });
+                                            }}
+                                            className="px-3 py-1.5 bg-orange-600 hover:bg-orange-500 text-white text-[10px] font-bold uppercase rounded-lg shadow-sm active:scale-95 transition-all flex items-center gap-1.5 ml-auto"
+                                        >
+                                            Run After Check
+                                        </button>
+                                    )}
                                     {p.status === 'pending' && (
                                         <button
                                             onClick={() => handleRerun(p.id)}
@@ -76,12 +76,18 @@ export async function logInteraction(debtId, actionType, notes = "") {
     });
 }
 
-export async function uploadPortfolio(file, portfolioId) {
+export async function uploadPortfolio(file, portfolioId, dryRun = false, delta = false) {
     const formData = new FormData();
     formData.append("file", file);
     if (portfolioId) {
         formData.append("portfolio_id", String(portfolioId));
     }
+    if (dryRun) {
+        formData.append("dry_run", "true");
+    }
+    if (delta) {
+        formData.append("delta", "true");
+    }
     return apiFetch("/api/v1/upload", {
         method: "POST",
         body: formData,
@@ -116,8 +122,9 @@ export async function runOneOffPayment(debtId, amount) {
     });
 }
 
-export async function executeScheduledPayment(paymentId) {
-    return apiFetch(`/api/v1/payments/scheduled/${paymentId}/execute`, {
+export async function executeScheduledPayment(paymentId, { confirmUnverified = false } = {}) {
+    const query = confirmUnverified ? "?confirm_unverified=true" : "";
+    return apiFetch(`/api/v1/payments/scheduled/${paymentId}/execute${query}`, {
         method: "POST",
     });
 }
@@ -158,6 +165,68 @@ export async function fetchIngestJob(jobId) {
     return apiFetch(`/api/v1/ingest/jobs/${jobId}`);
 }
 
+export async function resumeIngestJob(jobId) {
+    return apiFetch(`/api/v1/ingest/jobs/${jobId}/resume`, { method: "POST" });
+}
+
+export async function commitIngestJob(jobId) {
+    return apiFetch(`/api/v1/ingest/jobs/${jobId}/commit`, { method: "POST" });
+}
+
+export async function downloadIngestRejects(jobId) {
+    const session = (await supabase.auth.getSession()).data.session;
+    const headers = {};
+    if (session?.access_token) {
+        headers.Authorization = `Bearer ${session.access_token}`;
+    }
+    const response = await fetch(`${API_URL}/api/v1/ingest/jobs/${jobId}/rejects.csv`, { headers });
+    if (!response.ok) {
+        throw new Error(`Reject download failed (${response.status})`);
+    }
+    const disposition = response.headers.get("Content-Disposition") || "";
+    const match = disposition.match(/filename="([^"]+)"/);
+    const url = URL.createObjectURL(await response.blob());
+    const link = document.createElement("a");
+    link.href = url;
+    link.download = match ? match[1] : "rejects.csv";
+    link.click();
+    URL.revokeObjectURL(url);
+}
+
+// Server-sent events over fetch (EventSource cannot send the Authorization header).
+// Calls onUpdate with the job on every change; resolves when the stream ends.
+export async function streamIngestJob(jobId, onUpdate, signal) {
+    const session = (await supabase.auth.getSession()).data.session;
+    const headers = { Accept: "text/event-stream" };
+    if (session?.access_token) {
+        headers.Authorization = `Bearer ${session.access_token}`;
+    }
+    const response = await fetch(`${API_URL}/api/v1/ingest/jobs/${jobId}/events`, { headers, signal });
+    if (!response.ok || !response.body) {
+        throw new Error(`Progress stream failed (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const data = message
+                .split("\n")
+                .filter((line) => line.startsWith("data:"))
+                .map((line) => line.slice(5).trim())
+                .join("\n");
+            if (data) onUpdate(JSON.parse(data));
+        }
+    }
+}
+
 export async function fetchCampaignTemplates() {
     return apiFetch("/api/v1/campaigns/templates");
 }